@@ -0,0 +1,119 @@
+"""
+Activity model for generated study sessions
+When students study: an hour-of-day curve (evening peak, almost nothing at night), a
+day-of-week curve (Friday/Saturday are quiet, Sunday evening catches up) and spikes before
+each user's exams. The exam dates are per enrollment and come from the generator (the
+midterm and final dates generate_course_grades records), so activity ramps up in the days
+before the exams of the courses the user takes.
+
+All session start times of a user are drawn in one go: the curves are turned into
+cumulative weights once, then random.choices samples them by inverse CDF (bisect over
+the cumulative array) for k sessions at a time.
+"""
+import itertools
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Iterable, Optional, Sequence
+
+# Relative intensity per hour of day, 0h..23h
+HOUR_WEIGHTS = (
+    0.60, 0.30, 0.15, 0.08, 0.05, 0.08, 0.25, 0.60,   # 0h-7h
+    1.00, 1.30, 1.40, 1.20, 0.80, 0.90, 1.20, 1.30,   # 8h-15h
+    1.20, 0.90, 0.80, 1.30, 1.90, 2.20, 1.80, 1.10,   # 16h-23h
+)
+# Relative intensity per day of week, Monday..Sunday
+WEEKDAY_WEIGHTS = (1.10, 1.10, 1.05, 1.00, 0.80, 0.70, 1.00)
+# Exams: activity grows linearly over EXAM_RAMP_DAYS up to (1 + EXAM_BOOST) x on the exam day
+EXAM_BOOST = 2.0
+EXAM_RAMP_DAYS = 7
+# Sessions per study day of the previous model (70% one session, 30% two)
+SESSIONS_PER_STUDY_DAY = 1.3
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def load_profile(path: str) -> Dict[str, Any]:
+    """Activity profile from a JSON file: any of hour_weights (24 values), weekday_weights
+    (7 values, Monday first), exam_boost, exam_ramp_days"""
+    with open(path, encoding='utf-8') as f:
+        profile = json.load(f)
+    lengths = {'hour_weights': 24, 'weekday_weights': 7}
+    unknown = set(profile) - set(lengths) - {'exam_boost', 'exam_ramp_days'}
+    if unknown:
+        raise ValueError(f"unknown keys: {', '.join(sorted(unknown))}")
+    for key, length in lengths.items():
+        values = profile.get(key)
+        if values is not None and (len(values) != length or min(values) < 0 or not sum(values)):
+            raise ValueError(f"{key}: {length} non-negative values expected, not all zero")
+    return profile
+
+
+class ActivityModel:
+    """Session start times for a period of `days` days from `start`
+
+    Day intensity = weekday weight x exam spike, scaled to an average of 1 over the days a
+    user is active, so a user studying `weekly_frequency` days a week keeps the same expected
+    number of sessions; they are only moved towards busy days and hours.
+    """
+
+    def __init__(self, start: datetime, days: int,
+                 hour_weights: Sequence[float] = HOUR_WEIGHTS,
+                 weekday_weights: Sequence[float] = WEEKDAY_WEIGHTS,
+                 exam_boost: float = EXAM_BOOST, exam_ramp_days: int = EXAM_RAMP_DAYS):
+        self.start = start
+        self.days = days
+        self.exam_boost = exam_boost
+        self.exam_ramp_days = exam_ramp_days
+        self._weekday_intensity = [weekday_weights[(start + timedelta(days=day)).weekday()] for day in range(days)]
+        self._days = range(days)
+        # Minute of day: hour weight spread evenly over its 60 minutes
+        self._minute_cum = list(itertools.accumulate(hour_weights[m // 60] for m in range(MINUTES_PER_DAY)))
+        self._minutes = range(MINUTES_PER_DAY)
+
+    @classmethod
+    def from_profile(cls, start: datetime, days: int, profile: Optional[Dict[str, Any]] = None) -> 'ActivityModel':
+        return cls(start, days, **(profile or {}))
+
+    def _exam_factor(self, day: int, exam_days: Sequence[int]) -> float:
+        """0 outside the ramps, rising to 1 on an exam day"""
+        factor = 0.0
+        for exam_day in exam_days:
+            before = exam_day - day
+            if 0 <= before < self.exam_ramp_days:
+                factor = max(factor, 1 - before / self.exam_ramp_days)
+        return factor
+
+    def day_intensity(self, active_days: int, exam_dates: Iterable[datetime] = ()) -> List[float]:
+        """Relative intensity of each of the first `active_days` days, average 1"""
+        exam_days = sorted({(d - self.start).days for d in exam_dates})
+        intensity = [
+            weight * (1 + self.exam_boost * self._exam_factor(day, exam_days)) if exam_days else weight
+            for day, weight in enumerate(self._weekday_intensity[:active_days])
+        ]
+        mean = sum(intensity) / len(intensity)
+        return [w / mean for w in intensity]
+
+    def expected_sessions(self, weekly_frequency: float, active_days: int) -> float:
+        return weekly_frequency * SESSIONS_PER_STUDY_DAY / 7 * max(0, min(active_days, self.days))
+
+    def session_starts(self, weekly_frequency: float, active_days: int,
+                       exam_dates: Iterable[datetime] = ()) -> List[datetime]:
+        """Sorted start times of all sessions of one user active for the first `active_days`
+        days, with activity ramping up before `exam_dates` (exam dates of the user's enrollments)"""
+        active_days = min(active_days, self.days)
+        expected = self.expected_sessions(weekly_frequency, active_days)
+        count = int(expected + random.random())  # rounded up with probability = fraction
+        if count == 0:
+            return []
+        day_cum = list(itertools.accumulate(self.day_intensity(active_days, exam_dates)))
+        day_list = random.choices(self._days[:active_days], cum_weights=day_cum, k=count)
+        minute_list = random.choices(self._minutes, cum_weights=self._minute_cum, k=count)
+        start = self.start
+        return sorted(start + timedelta(days=d, minutes=m) for d, m in zip(day_list, minute_list))
+
+    def hourly_share(self) -> List[float]:
+        """Share of sessions per hour of day (for reporting)"""
+        totals = [self._minute_cum[h * 60 + 59] - (self._minute_cum[h * 60 - 1] if h else 0) for h in range(24)]
+        total = sum(totals)
+        return [t / total for t in totals]
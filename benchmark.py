@@ -0,0 +1,365 @@
+"""
+Benchmark suite for DataGenerator and PostgresImporter throughput
+Each scenario runs in its own process so peak RSS is measured per scenario
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+from typing import Dict, Any, Optional
+import psycopg2
+import psycopg2.extensions
+from db import session_settings, startup_options
+from table_registry import default_registry
+
+CONTENT_EXPORT_FILE = 'database-export-2026-01-02.json'
+SCHEMA_FILE = 'create_schema.sql'
+BENCH_DB_CONFIG = {'schema': 'transform'}
+RESULTS_DIR = 'benchmarks'
+
+# name, kind, parameters
+SCENARIOS = {
+    'gen-100': {'kind': 'generate', 'students': 100},
+    'gen-100-small-catalog': {'kind': 'generate', 'students': 100, 'catalog_courses': 2},
+    'gen-100-fast-load': {'kind': 'generate', 'students': 100, 'fast_load': True},
+    'gen-100-uuid7': {'kind': 'generate', 'students': 100, 'uuid_mode': 'v7'},
+    'gen-100-compact-quiz': {'kind': 'generate', 'students': 100, 'compact_quiz_events': True},
+    # courses x modules x lessons from catalog_synth.py instead of the exported catalog
+    'gen-100-synth-catalog': {'kind': 'generate', 'students': 100, 'synth_catalog': [500, 4, 5]},
+    'gen-10k': {'kind': 'generate', 'students': 10000},
+    'gen-100k': {'kind': 'generate', 'students': 100000},
+    'import-1k': {'kind': 'import', 'rows_per_table': 1000},
+    'import-100k': {'kind': 'import', 'rows_per_table': 100000},
+}
+DEFAULT_SCENARIOS = ['gen-100', 'gen-100-small-catalog', 'import-1k']
+
+# Import order of PostgresImporter (parents first)
+IMPORT_TABLES = default_registry().data_tables()
+
+
+class CountingCursor(psycopg2.extensions.cursor):
+    """Cursor that counts database round trips"""
+
+    round_trips = 0
+
+    def execute(self, query, vars=None):
+        CountingCursor.round_trips += 1
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        CountingCursor.round_trips += len(vars_list) if hasattr(vars_list, '__len__') else 1
+        return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        CountingCursor.round_trips += 1
+        return super().copy_expert(sql, file, size)
+
+
+def connect_counting(dsn: str, bulk: bool = True):
+    options = startup_options(session_settings(BENCH_DB_CONFIG, bulk))
+    return psycopg2.connect(dsn, cursor_factory=CountingCursor, options=options)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if platform.system() == 'Darwin':
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+def _rates(rows: Dict[str, int], seconds: float) -> Dict[str, float]:
+    return {table: round(count / seconds, 1) if seconds > 0 else None for table, count in rows.items()}
+
+
+def _diff(after: Dict[str, int], before: Dict[str, int]) -> Dict[str, int]:
+    return {t: c - before.get(t, 0) for t, c in after.items() if c - before.get(t, 0)}
+
+
+def run_generate(params: Dict[str, Any], dsn: Optional[str], work_dir: str) -> Dict[str, Any]:
+    """Run DataGenerator phase by phase and measure rows/sec"""
+    from generate_learning_data import DataGenerator
+    from sinks import FileSink, PostgresSink
+    from ids import IdGenerator
+    from catalog_synth import CatalogSynthesizer, delete_synthetic_catalog
+
+    random.seed(params.get('seed', 42))
+    ids = IdGenerator(params.get('uuid_mode', 'v4'), params.get('seed', 42))
+    conn = None
+    if dsn:
+        conn = connect_counting(dsn)
+        generator = DataGenerator(BENCH_DB_CONFIG, sink=PostgresSink(conn), ids=ids)
+        generator.conn = conn
+        generator.cursor = conn.cursor()
+        generator.clear_behavior_data()
+        # Tables are switched back to LOGGED below so later scenarios are unaffected
+        generator.set_tables_logged(not params.get('fast_load'))
+        generator.load_existing_content()
+        if params.get('synth_catalog'):
+            delete_synthetic_catalog(conn)
+    else:
+        generator = DataGenerator(BENCH_DB_CONFIG, sink=FileSink(os.path.join(work_dir, 'rows')), ids=ids)
+        generator.load_content_from_export(CONTENT_EXPORT_FILE)
+    generator.compact_quiz_events = params.get('compact_quiz_events', False)
+
+    if params.get('catalog_courses'):
+        keep = {c['id'] for c in generator.courses[:params['catalog_courses']]}
+        generator.courses = [c for c in generator.courses if c['id'] in keep]
+
+    phases = []
+    if params.get('synth_catalog'):
+        synthesizer = CatalogSynthesizer(generator.sink, ids, random.Random(params.get('seed', 42)))
+        phases.append(('catalog', lambda: generator.set_content(synthesizer.generate(*params['synth_catalog']))))
+    phases += [
+        ('users', lambda: generator.generate_users(params['students'])),
+        ('enrollments', generator.generate_enrollments),
+        ('behavior', generator.generate_learning_behavior),
+        ('forum', generator.generate_forum_activity),
+        ('grades', generator.generate_course_grades),
+    ]
+
+    result = {'phases': {}}
+    CountingCursor.round_trips = 0
+    total_started = time.perf_counter()
+    for phase, run in phases:
+        rows_before = dict(generator.sink.rows_written)
+        trips_before = CountingCursor.round_trips
+        started = time.perf_counter()
+        run()
+        generator.sink.commit()
+        elapsed = time.perf_counter() - started
+        rows = _diff(generator.sink.rows_written, rows_before)
+        result['phases'][phase] = {
+            'seconds': round(elapsed, 3),
+            'rows': rows,
+            'rows_per_sec': _rates(rows, elapsed),
+            'total_rows_per_sec': round(sum(rows.values()) / elapsed, 1) if elapsed > 0 else None,
+            'db_round_trips': CountingCursor.round_trips - trips_before
+        }
+
+    if conn and params.get('fast_load'):
+        generator.set_tables_logged(True)
+    total_seconds = time.perf_counter() - total_started
+    rows = dict(generator.sink.rows_written)
+    result.update({
+        'seconds': round(total_seconds, 3),
+        'rows': rows,
+        'rows_per_sec': _rates(rows, total_seconds),
+        'total_rows_per_sec': round(sum(rows.values()) / total_seconds, 1),
+        'db_round_trips': CountingCursor.round_trips
+    })
+    generator.sink.close()
+    if conn:
+        if params.get('synth_catalog'):
+            delete_synthetic_catalog(conn)
+        conn.close()
+    return result
+
+
+def write_synthetic_export(path: str, rows_per_table: int, seed: int = 42):
+    """Write a synthetic export with rows_per_table FK-consistent rows in every table"""
+    rng = random.Random(seed)
+    n = rows_per_table
+    start = datetime(2025, 11, 1)
+
+    def ids(count):
+        return [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(count)]
+
+    def ts(i):
+        return (start + timedelta(seconds=i * 37)).isoformat() + '+00:00'
+
+    users = ids(max(1, n // 10))
+    tables = {name: ids(n) for name in IMPORT_TABLES}
+    pick = rng.choice
+    builders = {
+        'profiles': lambda i, id_: {'id': id_, 'user_id': pick(users), 'full_name': f'User {i}', 'created_at': ts(i), 'updated_at': ts(i)},
+        'user_roles': lambda i, id_: {'id': id_, 'user_id': pick(users), 'role': 'student', 'created_at': ts(i)},
+        'courses': lambda i, id_: {'id': id_, 'title': f'Course {i}', 'difficulty_level': pick(['beginner', 'intermediate', 'advanced']), 'is_published': True, 'created_at': ts(i), 'updated_at': ts(i)},
+        'modules': lambda i, id_: {'id': id_, 'course_id': pick(tables['courses']), 'title': f'Module {i}', 'order_index': i % 10, 'created_at': ts(i), 'updated_at': ts(i)},
+        'lessons': lambda i, id_: {'id': id_, 'module_id': pick(tables['modules']), 'title': f'Lesson {i}', 'content_type': 'text', 'order_index': i % 10, 'estimated_minutes': 15, 'metadata': {}, 'created_at': ts(i), 'updated_at': ts(i)},
+        'enrollments': lambda i, id_: {'id': id_, 'user_id': pick(users), 'course_id': pick(tables['courses']), 'status': 'active', 'progress_percentage': i % 100, 'enrolled_at': ts(i), 'completed_at': None},
+        'forum_posts': lambda i, id_: {'id': id_, 'lesson_id': pick(tables['lessons']), 'user_id': pick(users), 'parent_post_id': None, 'content': f'Post {i}', 'created_at': ts(i), 'updated_at': ts(i)},
+        'forum_reactions': lambda i, id_: {'id': id_, 'post_id': pick(tables['forum_posts']), 'user_id': pick(users), 'reaction_type': 'like', 'created_at': ts(i)},
+        'user_sessions': lambda i, id_: {'id': id_, 'user_id': pick(users), 'session_token': id_, 'device_info': {'browser': 'Chrome'}, 'started_at': ts(i), 'ended_at': ts(i + 60), 'is_active': False},
+        'activity_logs': lambda i, id_: {'id': id_, 'user_id': pick(users), 'session_id': pick(tables['user_sessions']), 'timestamp': ts(i), 'action_type': 'view', 'resource_type': 'lesson', 'resource_id': pick(tables['lessons']), 'duration_ms': None, 'metadata': {}, 'client_info': {'url': f'https://example.com/lessons/{i}'}},
+        'interaction_logs': lambda i, id_: {'id': id_, 'user_id': pick(users), 'lesson_id': pick(tables['lessons']), 'session_id': pick(tables['user_sessions']), 'timestamp': ts(i), 'element_id': 'element_nav_next_01', 'interaction_type': 'click', 'metadata': {'type': 'button'}},
+        'lesson_progress': lambda i, id_: {'id': id_, 'user_id': pick(users), 'lesson_id': pick(tables['lessons']), 'is_completed': bool(i % 2), 'progress_percentage': 50, 'time_spent_seconds': 300, 'last_position': {}, 'started_at': ts(i), 'completed_at': None},
+        'quizzes': lambda i, id_: {'id': id_, 'module_id': pick(tables['modules']), 'title': f'Quiz {i}', 'passing_score': 60, 'order_index': 0, 'created_at': ts(i), 'updated_at': ts(i)},
+        'questions': lambda i, id_: {'id': id_, 'quiz_id': pick(tables['quizzes']), 'question_text': f'Question {i}', 'question_type': 'multiple_choice', 'options': ['A', 'B', 'C', 'D'], 'correct_answer': 'A', 'points': 1, 'order_index': i % 10, 'created_at': ts(i), 'updated_at': ts(i)},
+        'quiz_attempts': lambda i, id_: {'id': id_, 'user_id': pick(users), 'quiz_id': pick(tables['quizzes']), 'attempt_number': 1, 'score': 7, 'max_score': 10, 'is_passed': True, 'started_at': ts(i), 'completed_at': ts(i + 10), 'time_spent_seconds': 370},
+        'question_responses': lambda i, id_: {'id': id_, 'attempt_id': pick(tables['quiz_attempts']), 'question_id': pick(tables['questions']), 'user_answer': 'A', 'is_correct': True, 'points_earned': 1, 'time_spent_seconds': 30, 'answered_at': ts(i)},
+        'quiz_interaction_logs': lambda i, id_: {'id': id_, 'user_id': pick(users), 'attempt_id': pick(tables['quiz_attempts']), 'question_id': pick(tables['questions']), 'timestamp': ts(i), 'action_type': 'view', 'answer_given': None, 'is_correct': None, 'time_spent_ms': 0, 'answer_changes_count': 0, 'hint_used': False, 'metadata': {'action': 'view'}},
+        'quiz_question_events': lambda i, id_: {'id': id_, 'user_id': pick(users), 'attempt_id': pick(tables['quiz_attempts']), 'question_id': pick(tables['questions']), 'started_at': ts(i), 'actions': [1, 3, 4], 'offsets_ms': [0, 12000, 15000], 'time_spent_ms': [0, 12000, 3000], 'answers': [None, 'A', None], 'is_correct': True, 'answer_changes_count': 0, 'hint_used': False},
+        'reading_behavior_logs': lambda i, id_: {'id': id_, 'user_id': pick(users), 'lesson_id': pick(tables['lessons']), 'session_id': pick(tables['user_sessions']), 'timestamp': ts(i), 'dwell_time_ms': 60000, 'scroll_depth_percent': 80, 'action_type': 'reading', 'metadata': {}},
+        'course_grades': lambda i, id_: {'id': id_, 'user_id': pick(users), 'course_id': pick(tables['courses']), 'assessment_type': pick(['assignment', 'midterm', 'final']), 'title': f'Grade {i}', 'score': 7.5, 'weight': 0.2, 'graded_at': ts(i)},
+    }
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"export_date": "%s", "is_full_export": true, "tables": {' % datetime.now().isoformat())
+        for t, table_name in enumerate(IMPORT_TABLES):
+            f.write(('' if t == 0 else ', ') + json.dumps(table_name) + ': [')
+            build = builders[table_name]
+            for i, id_ in enumerate(tables[table_name]):
+                f.write(('' if i == 0 else ', ') + json.dumps(build(i, id_), ensure_ascii=False))
+            f.write(']')
+        f.write('}}')
+
+
+def run_import(params: Dict[str, Any], dsn: Optional[str], work_dir: str) -> Dict[str, Any]:
+    """Parse (and, with a database, load) a synthetic export"""
+    from import_to_postgres import PostgresImporter, open_export_file, iter_export_records
+
+    export_path = os.path.join(work_dir, 'synthetic-export.json')
+    write_synthetic_export(export_path, params['rows_per_table'], params.get('seed', 42))
+    result = {'phases': {}, 'export_bytes': os.path.getsize(export_path)}
+
+    # Parse only: decompression + JSON decoding throughput
+    rows = {}
+    started = time.perf_counter()
+    with open_export_file(export_path) as f:
+        for table_name, _ in iter_export_records(f):
+            rows[table_name] = rows.get(table_name, 0) + 1
+    elapsed = time.perf_counter() - started
+    result['phases']['parse'] = {
+        'seconds': round(elapsed, 3), 'rows': rows, 'rows_per_sec': _rates(rows, elapsed),
+        'total_rows_per_sec': round(sum(rows.values()) / elapsed, 1), 'db_round_trips': 0
+    }
+
+    if dsn:
+        importer = PostgresImporter(BENCH_DB_CONFIG)
+        importer.conn = connect_counting(dsn)
+        importer.cursor = importer.conn.cursor()
+        importer.create_schema(SCHEMA_FILE)
+        CountingCursor.round_trips = 0
+        started = time.perf_counter()
+        importer.import_file(export_path)
+        elapsed = time.perf_counter() - started
+        result['phases']['load'] = {
+            'seconds': round(elapsed, 3), 'rows': rows, 'rows_per_sec': _rates(rows, elapsed),
+            'total_rows_per_sec': round(sum(rows.values()) / elapsed, 1),
+            'db_round_trips': CountingCursor.round_trips
+        }
+        importer.disconnect()
+
+    last = result['phases'].get('load', result['phases']['parse'])
+    result.update({k: last[k] for k in ('seconds', 'rows', 'rows_per_sec', 'total_rows_per_sec', 'db_round_trips')})
+    return result
+
+
+def run_scenario(name: str, params: Dict[str, Any], dsn: Optional[str]) -> Dict[str, Any]:
+    """Entry point of the scenario subprocess"""
+    work_dir = tempfile.mkdtemp(prefix=f'bench-{name}-')
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if params['kind'] == 'generate':
+                result = run_generate(params, dsn, work_dir)
+            else:
+                result = run_import(params, dsn, work_dir)
+        result['peak_rss_mb'] = peak_rss_mb()
+        return result
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(previous_path: str, results: Dict[str, Any]):
+    """Print rows/sec change against a previous result file"""
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    print(f"\n📈 So sánh với {previous_path} ({previous.get('git_revision')}):")
+    for name, current in results['scenarios'].items():
+        old = previous.get('scenarios', {}).get(name)
+        if not old or 'total_rows_per_sec' not in old or 'total_rows_per_sec' not in current:
+            continue
+        change = (current['total_rows_per_sec'] / old['total_rows_per_sec'] - 1) * 100
+        marker = "⚠️ " if change < -10 else "  "
+        print(f"  {marker}{name:28s}: {old['total_rows_per_sec']:>12,.0f} → "
+              f"{current['total_rows_per_sec']:>12,.0f} rows/s ({change:+.1f}%)")
+
+
+def print_result(name: str, result: Dict[str, Any]):
+    print(f"\n▶ {name}: {result['seconds']:.2f}s | {result['total_rows_per_sec']:,.0f} rows/s | "
+          f"peak RSS {result['peak_rss_mb']} MB | {result['db_round_trips']} round trips")
+    for phase, stats in result['phases'].items():
+        print(f"   {phase:12s}: {stats['seconds']:8.3f}s | {sum(stats['rows'].values()):9d} rows | "
+              f"{(stats['total_rows_per_sec'] or 0):>12,.0f} rows/s | {stats['db_round_trips']} round trips")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DataGenerator and PostgresImporter throughput')
+    parser.add_argument('scenarios', nargs='*', help=f"Scenarios to run (default: {' '.join(DEFAULT_SCENARIOS)}; "
+                                                     f"available: {' '.join(SCENARIOS)})")
+    parser.add_argument('--dsn', help='Throwaway PostgreSQL database (its transform schema is DROPPED). '
+                                      'Without --dsn rows go to a file sink and imports are parse-only')
+    parser.add_argument('--output', help=f'Result file (default: {RESULTS_DIR}/<timestamp>.json)')
+    parser.add_argument('--compare', help='Previous result file to compare against')
+    args = parser.parse_args()
+
+    names = args.scenarios or DEFAULT_SCENARIOS
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"Không có scenario: {', '.join(unknown)}")
+
+    print("=" * 60)
+    print(" BENCHMARK ".center(60, "="))
+    print("=" * 60)
+    print(f"Target: {'PostgreSQL (' + args.dsn + ')' if args.dsn else 'file sink'}")
+
+    results = {
+        'created_at': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'target': 'postgres' if args.dsn else 'file',
+        'scenarios': {}
+    }
+
+    if args.dsn:
+        # Schema once, in this process; scenarios reuse it
+        with contextlib.closing(connect_counting(args.dsn)) as conn, conn.cursor() as cursor:
+            with open(SCHEMA_FILE, 'r', encoding='utf-8') as f:
+                cursor.execute(f.read())
+            conn.commit()
+            with contextlib.redirect_stdout(io.StringIO()):
+                from import_to_postgres import PostgresImporter
+                importer = PostgresImporter(BENCH_DB_CONFIG)
+                importer.conn, importer.cursor = conn, cursor
+                importer.import_file(CONTENT_EXPORT_FILE)
+
+    for name in names:
+        # Fresh process per scenario: isolated peak RSS, no warm caches
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            result = pool.submit(run_scenario, name, SCENARIOS[name], args.dsn).result()
+        results['scenarios'][name] = dict(SCENARIOS[name], **result)
+        print_result(name, result)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Đã ghi kết quả: {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+Synthetic course catalog for capacity planning
+Generates N courses x M modules x K lessons with quizzes and questions and writes them
+through a RowSink, so content volume can be scaled independently of the export
+"""
+import argparse
+import math
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+from psycopg2.extras import Json
+from db import get_db_config, connect as db_connect
+from ids import IdGenerator
+from sinks import RowSink, PostgresSink, FileSink
+from table_registry import CONTENT_TABLES
+
+# Synthetic courses carry this instructor_id, so they can be removed again (--replace)
+SYNTHETIC_INSTRUCTOR_ID = '00000000-0000-4000-8000-00000000c0de'
+
+CREATED_AT = datetime(2025, 10, 1)
+
+COURSE_COLUMNS = ('id', 'title', 'description', 'instructor_id', 'is_published', 'difficulty_level',
+                  'estimated_hours', 'created_at', 'updated_at')
+MODULE_COLUMNS = ('id', 'course_id', 'title', 'description', 'order_index', 'created_at', 'updated_at')
+LESSON_COLUMNS = ('id', 'module_id', 'title', 'content_type', 'content_url', 'content_text', 'order_index',
+                  'estimated_minutes', 'created_at', 'updated_at')
+QUIZ_COLUMNS = ('id', 'module_id', 'title', 'description', 'time_limit_minutes', 'max_attempts',
+                'passing_score', 'order_index', 'created_at', 'updated_at')
+QUESTION_COLUMNS = ('id', 'quiz_id', 'question_text', 'question_type', 'options', 'correct_answer',
+                    'explanation', 'points', 'order_index', 'topic_tags', 'difficulty_level',
+                    'created_at', 'updated_at')
+
+# Distributions modeled on the sample export (database-export-2026-01-02.json)
+COURSE_DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+COURSE_DIFFICULTY_WEIGHTS = [0.25, 0.50, 0.25]
+# Lessons of harder courses run longer; median lesson of a beginner course is ~18 minutes
+LESSON_MINUTES_FACTOR = {'beginner': 1.0, 'intermediate': 1.15, 'advanced': 1.3}
+LESSON_CONTENT_TYPES = ['text', 'video', 'pdf']
+LESSON_CONTENT_WEIGHTS = [0.70, 0.20, 0.10]
+QUESTION_DIFFICULTIES = ['easy', 'medium', 'hard']
+QUESTION_DIFFICULTY_WEIGHTS = {
+    'beginner': [0.60, 0.35, 0.05],
+    'intermediate': [0.35, 0.50, 0.15],
+    'advanced': [0.15, 0.50, 0.35],
+}
+QUESTION_POINTS = {'easy': ([1], [1]), 'medium': ([1, 2], [0.7, 0.3]), 'hard': ([2, 3], [0.6, 0.4])}
+PASSING_SCORES = [60, 70, 70, 70, 80]
+
+TOPICS = [
+    'Python', 'JavaScript', 'Cơ sở dữ liệu', 'Machine Learning', 'Mạng máy tính', 'Cấu trúc dữ liệu',
+    'Giải thuật', 'Phát triển Web', 'Hệ điều hành', 'An toàn thông tin', 'Điện toán đám mây', 'DevOps'
+]
+MC_OPTIONS = ['Option A', 'Option B', 'Option C', 'Option D']
+TF_OPTIONS = ['Đúng', 'Sai']
+
+
+class CatalogSynthesizer:
+    """Generate a course catalog and write it through a RowSink
+
+    generate() returns the rows as {table: [record, ...]} in export format, so a
+    DataGenerator can use the catalog directly (DataGenerator.set_content).
+    """
+
+    def __init__(self, sink: RowSink, ids: Optional[IdGenerator] = None, rng: Optional[random.Random] = None):
+        self.sink = sink
+        self.ids = ids or IdGenerator()
+        self.rng = rng or random.Random()
+
+    def generate(self, courses: int, modules_per_course: int = 4, lessons_per_module: int = 5,
+                 questions_per_quiz: int = 4, quiz_ratio: float = 0.4) -> Dict[str, List[Dict[str, Any]]]:
+        tables = {name: [] for name in CONTENT_TABLES}
+        for i in range(courses):
+            self._course(i, tables, modules_per_course, lessons_per_module, questions_per_quiz, quiz_ratio)
+            # A course and all its children are queued, safe to flush
+            self.sink.checkpoint()
+        self.sink.commit()
+        return tables
+
+    def _write(self, tables: Dict[str, list], table: str, columns: tuple, record: Dict[str, Any]):
+        tables[table].append(record)
+        self.sink.write(table, columns, tuple(
+            Json(v) if isinstance(v, list) else v for v in (record[c] for c in columns)
+        ))
+
+    def _lesson_minutes(self, difficulty: str) -> int:
+        """Log-normal around 18 minutes (x difficulty factor), rounded to 5, within 5-60"""
+        minutes = self.rng.lognormvariate(math.log(18 * LESSON_MINUTES_FACTOR[difficulty]), 0.35)
+        return max(5, min(60, int(round(minutes / 5)) * 5))
+
+    def _course(self, index: int, tables: Dict[str, list], modules_per_course: int,
+                lessons_per_module: int, questions_per_quiz: int, quiz_ratio: float):
+        rng = self.rng
+        created_at = CREATED_AT + timedelta(minutes=index)
+        topic = TOPICS[index % len(TOPICS)]
+        difficulty = rng.choices(COURSE_DIFFICULTIES, COURSE_DIFFICULTY_WEIGHTS)[0]
+        course_id = self.ids.new(created_at)
+        course = {
+            'id': course_id, 'title': f"{topic} {index + 1}",
+            'description': f"Khóa học {topic} (dữ liệu tổng hợp, mức {difficulty})",
+            'instructor_id': SYNTHETIC_INSTRUCTOR_ID, 'is_published': True,
+            'difficulty_level': difficulty, 'estimated_hours': None,
+            'created_at': created_at, 'updated_at': created_at
+        }
+        # estimated_hours is filled in once the lessons are known; the course row is
+        # written first so it precedes its modules in the sink
+        total_minutes = 0
+        course_rows = []
+
+        for m in range(modules_per_course):
+            module_id = self.ids.new(created_at)
+            course_rows.append(('modules', MODULE_COLUMNS, {
+                'id': module_id, 'course_id': course_id, 'title': f"{topic} - Chương {m + 1}",
+                'description': f"Chương {m + 1} của khóa {topic}", 'order_index': m,
+                'created_at': created_at, 'updated_at': created_at
+            }))
+            for k in range(lessons_per_module):
+                content_type = rng.choices(LESSON_CONTENT_TYPES, LESSON_CONTENT_WEIGHTS)[0]
+                minutes = self._lesson_minutes(difficulty)
+                total_minutes += minutes
+                lesson_id = self.ids.new(created_at)
+                # 'video' / 'pdf' in the title is what the behavior generator keys on
+                prefix = {'video': 'Video: ', 'pdf': 'Tài liệu PDF: '}.get(content_type, '')
+                course_rows.append(('lessons', LESSON_COLUMNS, {
+                    'id': lesson_id, 'module_id': module_id,
+                    'title': f"{prefix}{topic} {m + 1}.{k + 1}", 'content_type': content_type,
+                    'content_url': f"https://example.com/{content_type}/{lesson_id}" if content_type != 'text' else None,
+                    'content_text': f"<h2>{topic} {m + 1}.{k + 1}</h2><p>Nội dung bài học tổng hợp.</p>"
+                                    if content_type == 'text' else None,
+                    'order_index': k, 'estimated_minutes': minutes,
+                    'created_at': created_at, 'updated_at': created_at
+                }))
+            if rng.random() < quiz_ratio:
+                course_rows.extend(self._quiz(module_id, m, topic, difficulty, questions_per_quiz, created_at))
+
+        # Lessons plus about as much practice time
+        course['estimated_hours'] = max(1, round(total_minutes * 2 / 60))
+        self._write(tables, 'courses', COURSE_COLUMNS, course)
+        for table, columns, record in course_rows:
+            self._write(tables, table, columns, record)
+
+    def _quiz(self, module_id: str, module_index: int, topic: str, difficulty: str,
+              questions_per_quiz: int, created_at: datetime) -> List[tuple]:
+        rng = self.rng
+        quiz_id = self.ids.new(created_at)
+        count = max(1, questions_per_quiz + rng.randint(-1, 1))
+        rows = [('quizzes', QUIZ_COLUMNS, {
+            'id': quiz_id, 'module_id': module_id, 'title': f"Kiểm tra Chương {module_index + 1}",
+            'description': f"Bài kiểm tra {topic} chương {module_index + 1}",
+            'time_limit_minutes': max(5, int(round(count * 1.5 / 5)) * 5), 'max_attempts': 3,
+            'passing_score': rng.choice(PASSING_SCORES), 'order_index': 0,
+            'created_at': created_at, 'updated_at': created_at
+        })]
+        for q in range(count):
+            question_difficulty = rng.choices(QUESTION_DIFFICULTIES, QUESTION_DIFFICULTY_WEIGHTS[difficulty])[0]
+            values, weights = QUESTION_POINTS[question_difficulty]
+            if rng.random() < 0.55:
+                question_type, options = 'multiple_choice', MC_OPTIONS
+            else:
+                question_type, options = 'true_false', TF_OPTIONS
+            rows.append(('questions', QUESTION_COLUMNS, {
+                'id': self.ids.new(created_at), 'quiz_id': quiz_id,
+                'question_text': f"Câu hỏi {q + 1} về {topic} (chương {module_index + 1})",
+                'question_type': question_type, 'options': list(options),
+                'correct_answer': rng.choice(options), 'explanation': None,
+                'points': rng.choices(values, weights)[0], 'order_index': q,
+                'topic_tags': [topic.lower()], 'difficulty_level': question_difficulty,
+                'created_at': created_at, 'updated_at': created_at
+            }))
+        return rows
+
+
+def delete_synthetic_catalog(conn) -> int:
+    """Remove previously synthesized courses (children and behavior rows cascade)"""
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM courses WHERE instructor_id = %s", (SYNTHETIC_INSTRUCTOR_ID,))
+        deleted = cursor.rowcount
+    conn.commit()
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic course catalog')
+    parser.add_argument('--courses', type=int, default=100, help='Number of courses')
+    parser.add_argument('--modules', type=int, default=4, help='Modules per course')
+    parser.add_argument('--lessons', type=int, default=5, help='Lessons per module')
+    parser.add_argument('--questions', type=int, default=4, help='Average questions per quiz')
+    parser.add_argument('--quiz-ratio', type=float, default=0.4, help='Share of modules that have a quiz')
+    parser.add_argument('--seed', type=int, help='Seed for a reproducible catalog')
+    parser.add_argument('--replace', action='store_true', help='Delete the previous synthetic catalog first')
+    parser.add_argument('--output-dir', help='Write <table>.jsonl files here instead of the database')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(" TẠO CATALOG KHÓA HỌC TỔNG HỢP ".center(60, "="))
+    print("=" * 60)
+    print(f"{args.courses} khóa × {args.modules} chương × {args.lessons} bài, "
+          f"~{args.questions} câu/quiz, {args.quiz_ratio:.0%} chương có quiz")
+
+    conn = None
+    try:
+        if args.output_dir:
+            sink = FileSink(args.output_dir)
+        else:
+            conn = db_connect(get_db_config(), bulk=True)
+            if args.replace:
+                deleted = delete_synthetic_catalog(conn)
+                print(f"  ✓ Đã xóa {deleted} khóa học tổng hợp cũ")
+            sink = PostgresSink(conn)
+        synthesizer = CatalogSynthesizer(sink, IdGenerator(seed=args.seed), random.Random(args.seed))
+        tables = synthesizer.generate(args.courses, args.modules, args.lessons, args.questions, args.quiz_ratio)
+        sink.close()
+        for name in CONTENT_TABLES:
+            print(f"  {name:12s}: {len(tables[name]):8d} bản ghi")
+        print("\n✓ HOÀN THÀNH!")
+    except Exception as e:
+        print(f"\n✗ Lỗi: {e}")
+        if conn:
+            conn.rollback()
+    finally:
+        if conn:
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+"""
+COPY encoders built once per table
+The column types of the target table decide up front how every column is converted,
+so encoding a record is one prepared function call instead of isinstance checks per
+value. Tables whose columns all have a binary encoder are sent in COPY binary format
+(timestamps, uuids and numbers arrive already parsed); the others (array columns)
+use the text format.
+"""
+import json
+import struct
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+BINARY_TRAILER = struct.pack('>h', -1)
+_NULL = struct.pack('>i', -1)
+_LENGTH = struct.Struct('>i').pack
+_INT2 = struct.Struct('>ih').pack
+_INT4 = struct.Struct('>ii').pack
+_INT8 = struct.Struct('>iq').pack
+_TRUE = _LENGTH(1) + b'\x01'
+_FALSE = _LENGTH(1) + b'\x00'
+_UUID_LENGTH = _LENGTH(16)
+_JSONB_VERSION = b'\x01'
+
+_PG_EPOCH = datetime(2000, 1, 1)
+_PG_EPOCH_UTC = datetime(2000, 1, 1, tzinfo=timezone.utc)
+_PG_EPOCH_DATE = date(2000, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NUMERIC_POS, _NUMERIC_NEG, _NUMERIC_NAN = 0x0000, 0x4000, 0xC000
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+if orjson is not None:
+    def dumps_json(value) -> bytes:
+        return orjson.dumps(value, default=_json_default)
+else:
+    def dumps_json(value) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+# Binary encoders: value -> length-prefixed field
+
+def _binary_text(value) -> bytes:
+    data = (value if type(value) is str else str(value)).encode('utf-8')
+    return _LENGTH(len(data)) + data
+
+
+def _binary_uuid(value) -> bytes:
+    if type(value) is uuid.UUID:
+        return _UUID_LENGTH + value.bytes
+    data = bytes.fromhex(value.replace('-', ''))
+    if len(data) != 16:
+        raise ValueError(f"invalid uuid: {value!r}")
+    return _UUID_LENGTH + data
+
+
+def _binary_int2(value) -> bytes:
+    return _INT2(2, int(value))
+
+
+def _binary_int4(value) -> bytes:
+    return _INT4(4, int(value))
+
+
+def _binary_int8(value) -> bytes:
+    return _INT8(8, int(value))
+
+
+def _binary_bool(value) -> bytes:
+    return _TRUE if value else _FALSE
+
+
+def _binary_json(value) -> bytes:
+    data = dumps_json(value)
+    return _LENGTH(len(data)) + data
+
+
+def _binary_jsonb(value) -> bytes:
+    data = dumps_json(value)
+    return _LENGTH(len(data) + 1) + _JSONB_VERSION + data
+
+
+def _datetime(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def _binary_timestamptz(value) -> bytes:
+    """Microseconds since 2000-01-01 UTC; values without an offset are taken as UTC
+    (exports are written in UTC)"""
+    dt = _datetime(value)
+    if dt.tzinfo is None:
+        return _INT8(8, (dt - _PG_EPOCH) // _MICROSECOND)
+    return _INT8(8, (dt - _PG_EPOCH_UTC) // _MICROSECOND)
+
+
+def _binary_timestamp(value) -> bytes:
+    # Like PostgreSQL's text input, an offset is ignored for timestamp without time zone
+    return _INT8(8, (_datetime(value).replace(tzinfo=None) - _PG_EPOCH) // _MICROSECOND)
+
+
+def _binary_date(value) -> bytes:
+    if isinstance(value, datetime):
+        value = value.date()
+    elif not isinstance(value, date):
+        value = date.fromisoformat(value[:10])
+    return _INT4(4, (value - _PG_EPOCH_DATE).days)
+
+
+def _binary_numeric(value) -> bytes:
+    """NUMERIC wire format: base-10000 digits with weight, sign and display scale"""
+    if isinstance(value, float):
+        value = repr(value)
+    d = value if isinstance(value, Decimal) else Decimal(value)
+    if d.is_nan():
+        return _LENGTH(8) + struct.pack('>hhHH', 0, 0, _NUMERIC_NAN, 0)
+    if d.is_infinite():
+        raise ValueError(f"infinite numeric: {value!r}")
+    sign, digits, exponent = d.as_tuple()
+    dscale = max(0, -exponent)
+    # Align the exponent to a multiple of 4, then group the decimal digits by 4
+    shift = exponent % 4
+    digits = digits + (0,) * shift
+    exponent -= shift
+    pad = -len(digits) % 4
+    digits = (0,) * pad + digits
+    groups = [digits[i] * 1000 + digits[i + 1] * 100 + digits[i + 2] * 10 + digits[i + 3]
+              for i in range(0, len(digits), 4)]
+    weight = len(groups) - 1 + exponent // 4
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight, sign = 0, 0
+    data = struct.pack(f'>hhHH{len(groups)}H', len(groups), weight,
+                       _NUMERIC_NEG if sign else _NUMERIC_POS, dscale, *groups)
+    return _LENGTH(len(data)) + data
+
+
+# information_schema data_type -> binary encoder; enum labels (USER-DEFINED) are sent as text
+BINARY_ENCODERS: Dict[str, Callable[[Any], bytes]] = {
+    'uuid': _binary_uuid,
+    'text': _binary_text, 'character varying': _binary_text, 'character': _binary_text,
+    'USER-DEFINED': _binary_text,
+    'smallint': _binary_int2, 'integer': _binary_int4, 'bigint': _binary_int8,
+    'numeric': _binary_numeric, 'boolean': _binary_bool,
+    'json': _binary_json, 'jsonb': _binary_jsonb,
+    'timestamp with time zone': _binary_timestamptz,
+    'timestamp without time zone': _binary_timestamp,
+    'date': _binary_date,
+}
+
+
+# Text encoders: value -> escaped field of a COPY text row
+
+def _array_literal(values: list) -> str:
+    """PostgreSQL array literal, e.g. {"a","b",NULL}"""
+    items = []
+    for value in values:
+        if value is None:
+            items.append('NULL')
+        elif isinstance(value, bool):
+            items.append('t' if value else 'f')
+        else:
+            items.append('"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"')
+    return '{' + ','.join(items) + '}'
+
+
+def _text_escaped(value) -> str:
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def _text_plain(value) -> str:
+    return str(value)
+
+
+def _text_bool(value) -> str:
+    return 't' if value else 'f'
+
+
+def _text_json(value) -> str:
+    return dumps_json(value).decode('utf-8').translate(_COPY_ESCAPES)
+
+
+def _text_array(value) -> str:
+    return _array_literal(value).translate(_COPY_ESCAPES)
+
+
+def _text_encoder(data_type: str) -> Callable[[Any], str]:
+    if data_type in ('json', 'jsonb'):
+        return _text_json
+    if data_type == 'ARRAY':
+        return _text_array
+    if data_type == 'boolean':
+        return _text_bool
+    if data_type in ('uuid', 'smallint', 'integer', 'bigint', 'numeric', 'date') or data_type.startswith('timestamp'):
+        return _text_plain
+    return _text_escaped
+
+
+class CopyEncoder:
+    """Encode records of one table for COPY <table> (columns) FROM STDIN
+
+    columns: target columns in COPY order; types: {column: information_schema data_type}
+    binary:  None = binary format when every column type has a binary encoder
+    """
+
+    def __init__(self, columns: List[str], types: Dict[str, str], binary: Optional[bool] = None):
+        self.columns = list(columns)
+        column_types = [types[col] for col in self.columns]
+        if binary is None:
+            binary = all(t in BINARY_ENCODERS for t in column_types)
+        self.binary = binary
+        fields = tuple(zip(self.columns, (
+            BINARY_ENCODERS[t] if binary else _text_encoder(t) for t in column_types
+        )))
+        if binary:
+            count = struct.pack('>h', len(fields))
+            null = _NULL
+
+            def encode(record: Dict[str, Any]) -> bytes:
+                get = record.get
+                return count + b''.join([null if (v := get(col)) is None else f(v) for col, f in fields])
+            self.header, self.trailer = BINARY_HEADER, BINARY_TRAILER
+        else:
+            def encode(record: Dict[str, Any]) -> bytes:
+                get = record.get
+                return ('\t'.join(['\\N' if (v := get(col)) is None else f(v) for col, f in fields])
+                        + '\n').encode('utf-8')
+            self.header, self.trailer = b'', b''
+        self.encode = encode
+
+    def copy_sql(self, table: str) -> str:
+        return (f"COPY {table} ({', '.join(self.columns)}) FROM STDIN"
+                + (" WITH (FORMAT binary)" if self.binary else ""))
+
+    def chunks(self, records: Iterable[Dict[str, Any]], rows: int = 1000) -> Iterator[Tuple[bytes, int]]:
+        """(encoded rows, row count) per chunk of up to `rows` records, without header/trailer"""
+        encode = self.encode
+        batch = []
+        for record in records:
+            batch.append(encode(record))
+            if len(batch) >= rows:
+                yield b''.join(batch), len(batch)
+                batch = []
+        if batch:
+            yield b''.join(batch), len(batch)
+
+
+class CopyStream:
+    """File-like object for cursor.copy_expert: encodes records as COPY reads them
+
+    on_rows(n) is called after every chunk of n encoded records (progress reporting).
+    """
+
+    def __init__(self, encoder: CopyEncoder, records: Iterable[Dict[str, Any]],
+                 on_rows: Optional[Callable[[int], None]] = None):
+        self.encoder = encoder
+        self.rows = 0
+        self._parts = self._generate(records, on_rows)
+        self._buffer = b''
+
+    def _generate(self, records, on_rows) -> Iterator[bytes]:
+        yield self.encoder.header
+        for data, count in self.encoder.chunks(records):
+            self.rows += count
+            if on_rows:
+                on_rows(count)
+            yield data
+        yield self.encoder.trailer
+
+    def read(self, size: int = -1) -> bytes:
+        buffer = self._buffer
+        while size < 0 or len(buffer) < size:
+            part = next(self._parts, None)
+            if part is None:
+                break
+            buffer += part
+        if size < 0:
+            self._buffer = b''
+            return buffer
+        self._buffer = buffer[size:]
+        return buffer[:size]
@@ -8,7 +8,13 @@ CREATE SCHEMA IF NOT EXISTS transform;
 SET search_path TO transform, public;
 
 -- Drop tables if they exist (in reverse order of dependencies)
+DROP TABLE IF EXISTS import_checksums CASCADE;
+DROP TABLE IF EXISTS feature_refresh_queue CASCADE;
+DROP TABLE IF EXISTS user_course_features CASCADE;
+DROP VIEW IF EXISTS resource_courses CASCADE;
 DROP TABLE IF EXISTS course_grades CASCADE;
+DROP VIEW IF EXISTS quiz_interaction_events CASCADE;
+DROP TABLE IF EXISTS quiz_question_events CASCADE;
 DROP TABLE IF EXISTS reading_behavior_logs CASCADE;
 DROP TABLE IF EXISTS quiz_interaction_logs CASCADE;
 DROP TABLE IF EXISTS question_responses CASCADE;
@@ -25,6 +31,9 @@ DROP TABLE IF EXISTS enrollments CASCADE;
 DROP TABLE IF EXISTS lessons CASCADE;
 DROP TABLE IF EXISTS modules CASCADE;
 DROP TABLE IF EXISTS courses CASCADE;
+DROP TYPE IF EXISTS interaction_element_type;
+DROP TYPE IF EXISTS interaction_context;
+DROP TYPE IF EXISTS client_device_type;
 DROP TABLE IF EXISTS user_roles CASCADE;
 DROP TABLE IF EXISTS profiles CASCADE;
 
@@ -148,6 +157,17 @@ CREATE TABLE activity_logs (
     client_info JSONB
 );
 
+-- Typed interaction_logs fields (values listed in log_metadata.py)
+CREATE TYPE interaction_element_type AS ENUM (
+    'button', 'slider', 'dropdown', 'container', 'heading', 'text',
+    'code_block', 'image', 'menu', 'radio_button'
+);
+CREATE TYPE interaction_context AS ENUM (
+    'video_control', 'content_view', 'navigation', 'annotation', 'media_view',
+    'document_view', 'document_control', 'quiz_control', 'quiz_interaction'
+);
+CREATE TYPE client_device_type AS ENUM ('desktop', 'mobile', 'tablet');
+
 -- Interaction logs table
 CREATE TABLE interaction_logs (
     id UUID PRIMARY KEY,
@@ -160,7 +180,12 @@ CREATE TABLE interaction_logs (
     is_correct BOOLEAN,
     attempt_number INTEGER,
     time_spent_ms INTEGER,
-    metadata JSONB
+    element_name VARCHAR(100),
+    element_type interaction_element_type,
+    element_context interaction_context,
+    device_type client_device_type,
+    interaction_count SMALLINT,
+    metadata JSONB  -- element-specific extras only (typed fields live in the columns above)
 );
 
 -- Lesson progress table
@@ -252,6 +277,24 @@ CREATE TABLE quiz_interaction_logs (
     metadata JSONB
 );
 
+-- Compact quiz interaction events (generator --compact-quiz-events): one row per
+-- answered question instead of one row per event. Event i happened at
+-- started_at + offsets_ms[i]; action codes: 1 view, 2 hint_request, 3 answer, 4 submit
+CREATE TABLE quiz_question_events (
+    id UUID PRIMARY KEY,
+    user_id UUID NOT NULL,
+    attempt_id UUID REFERENCES quiz_attempts(id) ON DELETE CASCADE,
+    question_id UUID REFERENCES questions(id) ON DELETE CASCADE,
+    started_at TIMESTAMPTZ NOT NULL,
+    actions SMALLINT[] NOT NULL,
+    offsets_ms INTEGER[] NOT NULL,
+    time_spent_ms INTEGER[] NOT NULL,
+    answers TEXT[] NOT NULL,
+    is_correct BOOLEAN,
+    answer_changes_count INTEGER,
+    hint_used BOOLEAN
+);
+
 -- Reading behavior logs table
 CREATE TABLE reading_behavior_logs (
     id UUID PRIMARY KEY,
@@ -280,6 +323,82 @@ CREATE TABLE course_grades (
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+-- Resource to course mapping (courses, modules, lessons, quizzes)
+CREATE VIEW resource_courses AS
+    SELECT id AS resource_id, id AS course_id FROM courses
+    UNION ALL
+    SELECT id, course_id FROM modules
+    UNION ALL
+    SELECT l.id, m.course_id FROM lessons l JOIN modules m ON l.module_id = m.id
+    UNION ALL
+    SELECT q.id, m.course_id FROM quizzes q JOIN modules m ON q.module_id = m.id;
+
+-- All quiz interaction events in the quiz_interaction_logs row shape, whichever way they were stored
+CREATE VIEW quiz_interaction_events AS
+    SELECT id, user_id, quiz_id, attempt_id, question_id, timestamp, action_type, answer_given,
+           is_correct, time_spent_ms, answer_changes_count, hint_used, metadata
+    FROM quiz_interaction_logs
+    UNION ALL
+    SELECT md5(e.id::text || ':' || x.n)::uuid,
+           e.user_id, NULL::uuid, e.attempt_id, e.question_id,
+           x.ts,
+           x.action_type,
+           e.answers[x.n],
+           CASE WHEN x.action_type = 'submit'
+                  OR (x.action_type = 'answer' AND e.actions[x.n + 1] = 4) THEN e.is_correct
+                WHEN x.action_type = 'answer' THEN false END,
+           e.time_spent_ms[x.n],
+           CASE WHEN x.action_type IN ('answer', 'submit') THEN e.answer_changes_count ELSE 0 END,
+           CASE WHEN x.action_type IN ('answer', 'submit') THEN e.hint_used
+                ELSE x.action_type = 'hint_request' END,
+           NULL::jsonb
+    FROM quiz_question_events e
+    CROSS JOIN LATERAL (
+        SELECT o.n,
+               e.started_at + e.offsets_ms[o.n] * interval '1 millisecond' AS ts,
+               (ARRAY['view', 'hint_request', 'answer', 'submit'])[o.code]::varchar(100) AS action_type
+        FROM unnest(e.actions) WITH ORDINALITY AS o(code, n)
+    ) x;
+
+-- Per-(user, course) features for learning outcome prediction
+CREATE TABLE user_course_features (
+    user_id UUID NOT NULL,
+    course_id UUID NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    quiz_attempt_count INTEGER NOT NULL DEFAULT 0,
+    avg_quiz_score NUMERIC(4, 2),
+    max_quiz_score NUMERIC(4, 2),
+    retry_count INTEGER NOT NULL DEFAULT 0,
+    hint_count INTEGER NOT NULL DEFAULT 0,
+    total_dwell_time_ms BIGINT NOT NULL DEFAULT 0,
+    avg_scroll_depth NUMERIC(5, 2),
+    lessons_completed INTEGER NOT NULL DEFAULT 0,
+    session_count INTEGER NOT NULL DEFAULT 0,
+    active_days INTEGER NOT NULL DEFAULT 0,
+    sessions_per_week NUMERIC(6, 2),
+    first_activity_at TIMESTAMPTZ,
+    last_activity_at TIMESTAMPTZ,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, course_id)
+);
+
+-- Users whose features are stale (filled by statement-level triggers)
+CREATE TABLE feature_refresh_queue (
+    user_id UUID PRIMARY KEY,
+    queued_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Content checksum of each table as of the last upsert import (import_to_postgres.py --upsert)
+CREATE TABLE import_checksums (
+    table_name VARCHAR(100) PRIMARY KEY,
+    checksum CHAR(64) NOT NULL,
+    row_count BIGINT NOT NULL,
+    -- Written since the import?  relfilenode (TRUNCATE / VACUUM FULL) and pg_stat write counters
+    relfilenode OID,
+    write_count BIGINT,
+    source_file TEXT,
+    imported_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 -- Create indexes for better query performance
 CREATE INDEX idx_profiles_user_id ON profiles(user_id);
 CREATE INDEX idx_user_roles_user_id ON user_roles(user_id);
@@ -305,11 +424,200 @@ CREATE INDEX idx_quiz_attempts_quiz_id ON quiz_attempts(quiz_id);
 CREATE INDEX idx_question_responses_attempt_id ON question_responses(attempt_id);
 CREATE INDEX idx_question_responses_question_id ON question_responses(question_id);
 CREATE INDEX idx_quiz_interaction_logs_user_id ON quiz_interaction_logs(user_id);
+CREATE INDEX idx_quiz_question_events_user_id ON quiz_question_events(user_id);
+CREATE INDEX idx_quiz_question_events_attempt_id ON quiz_question_events(attempt_id);
 CREATE INDEX idx_reading_behavior_logs_user_id ON reading_behavior_logs(user_id);
 CREATE INDEX idx_reading_behavior_logs_lesson_id ON reading_behavior_logs(lesson_id);
 CREATE INDEX idx_course_grades_user_id ON course_grades(user_id);
 CREATE INDEX idx_course_grades_course_id ON course_grades(course_id);
 CREATE INDEX idx_course_grades_assessment_type ON course_grades(assessment_type);
+CREATE INDEX idx_user_course_features_course_id ON user_course_features(course_id);
+
+-- Append-mostly log tables: BRIN on timestamp (a few pages). Only useful when rows are stored
+-- roughly in time order (real application logs); generated data is written user by user,
+-- so activity_logs keeps its btree for timestamp range scans
+CREATE INDEX idx_activity_logs_timestamp_brin ON activity_logs USING brin (timestamp) WITH (pages_per_range = 32);
+CREATE INDEX idx_interaction_logs_timestamp_brin ON interaction_logs USING brin (timestamp) WITH (pages_per_range = 32);
+CREATE INDEX idx_quiz_interaction_logs_timestamp_brin ON quiz_interaction_logs USING brin (timestamp) WITH (pages_per_range = 32);
+CREATE INDEX idx_quiz_question_events_started_at_brin ON quiz_question_events USING brin (started_at) WITH (pages_per_range = 32);
+CREATE INDEX idx_reading_behavior_logs_timestamp_brin ON reading_behavior_logs USING brin (timestamp) WITH (pages_per_range = 32);
+
+-- Feature refresh: triggers queue users whose rows were inserted, updated (upsert import) or
+-- deleted (regeneration), refresh_user_course_features() recomputes them
+CREATE OR REPLACE FUNCTION queue_feature_refresh() RETURNS trigger AS $$
+BEGIN
+    -- Transition tables of the firing event: new_rows (INSERT), old_rows (DELETE), both (UPDATE)
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO feature_refresh_queue (user_id)
+        SELECT DISTINCT user_id FROM new_rows
+        ON CONFLICT (user_id) DO NOTHING;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO feature_refresh_queue (user_id)
+        SELECT DISTINCT user_id FROM old_rows
+        ON CONFLICT (user_id) DO NOTHING;
+    ELSE
+        INSERT INTO feature_refresh_queue (user_id)
+        SELECT user_id FROM old_rows UNION SELECT user_id FROM new_rows
+        ON CONFLICT (user_id) DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SET search_path FROM CURRENT;
+
+CREATE TRIGGER trg_enrollments_feature_queue AFTER INSERT ON enrollments
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_activity_logs_feature_queue AFTER INSERT ON activity_logs
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_lesson_progress_feature_queue AFTER INSERT ON lesson_progress
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_quiz_attempts_feature_queue AFTER INSERT ON quiz_attempts
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_quiz_interaction_logs_feature_queue AFTER INSERT ON quiz_interaction_logs
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_quiz_question_events_feature_queue AFTER INSERT ON quiz_question_events
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_reading_behavior_logs_feature_queue AFTER INSERT ON reading_behavior_logs
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+-- A transition table trigger fires for one event only: separate UPDATE and DELETE triggers
+CREATE TRIGGER trg_enrollments_feature_queue_update AFTER UPDATE ON enrollments
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_enrollments_feature_queue_delete AFTER DELETE ON enrollments
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_activity_logs_feature_queue_update AFTER UPDATE ON activity_logs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_activity_logs_feature_queue_delete AFTER DELETE ON activity_logs
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_lesson_progress_feature_queue_update AFTER UPDATE ON lesson_progress
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_lesson_progress_feature_queue_delete AFTER DELETE ON lesson_progress
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_quiz_attempts_feature_queue_update AFTER UPDATE ON quiz_attempts
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_quiz_attempts_feature_queue_delete AFTER DELETE ON quiz_attempts
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_quiz_interaction_logs_feature_queue_update AFTER UPDATE ON quiz_interaction_logs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_quiz_interaction_logs_feature_queue_delete AFTER DELETE ON quiz_interaction_logs
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_quiz_question_events_feature_queue_update AFTER UPDATE ON quiz_question_events
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_quiz_question_events_feature_queue_delete AFTER DELETE ON quiz_question_events
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_reading_behavior_logs_feature_queue_update AFTER UPDATE ON reading_behavior_logs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+CREATE TRIGGER trg_reading_behavior_logs_feature_queue_delete AFTER DELETE ON reading_behavior_logs
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+
+CREATE OR REPLACE FUNCTION refresh_user_course_features(p_full BOOLEAN DEFAULT false) RETURNS INTEGER AS $$
+DECLARE
+    v_users UUID[];
+    v_rows INTEGER;
+BEGIN
+    IF p_full THEN
+        DELETE FROM feature_refresh_queue;
+        DELETE FROM user_course_features;
+    ELSE
+        WITH dequeued AS (
+            DELETE FROM feature_refresh_queue RETURNING user_id
+        )
+        SELECT array_agg(user_id) INTO v_users FROM dequeued;
+        
+        IF v_users IS NULL THEN
+            RETURN 0;
+        END IF;
+        
+        DELETE FROM user_course_features WHERE user_id = ANY(v_users);
+    END IF;
+    
+    INSERT INTO user_course_features (
+        user_id, course_id, quiz_attempt_count, avg_quiz_score, max_quiz_score, retry_count,
+        hint_count, total_dwell_time_ms, avg_scroll_depth, lessons_completed, session_count,
+        active_days, sessions_per_week, first_activity_at, last_activity_at, refreshed_at
+    )
+    WITH pairs AS (
+        SELECT DISTINCT user_id, course_id FROM enrollments
+        WHERE p_full OR user_id = ANY(v_users)
+    ),
+    quiz AS (
+        SELECT qa.user_id, rc.course_id,
+               COUNT(*) AS attempts,
+               AVG(qa.score::numeric / NULLIF(qa.max_score, 0) * 10) AS avg_score,
+               MAX(qa.score::numeric / NULLIF(qa.max_score, 0) * 10) AS max_score,
+               COUNT(*) FILTER (WHERE qa.attempt_number > 1) AS retries
+        FROM quiz_attempts qa
+        JOIN resource_courses rc ON rc.resource_id = qa.quiz_id
+        WHERE p_full OR qa.user_id = ANY(v_users)
+        GROUP BY qa.user_id, rc.course_id
+    ),
+    hints AS (
+        SELECT h.user_id, rc.course_id, SUM(h.hints) AS hints
+        FROM (
+            SELECT user_id, attempt_id, 1 AS hints
+            FROM quiz_interaction_logs
+            WHERE action_type = 'hint_request' AND (p_full OR user_id = ANY(v_users))
+            UNION ALL
+            -- compact rows: count hint_request codes without expanding the arrays
+            SELECT user_id, attempt_id, cardinality(array_positions(actions, 2::smallint))
+            FROM quiz_question_events
+            WHERE hint_used AND (p_full OR user_id = ANY(v_users))
+        ) h
+        JOIN quiz_attempts qa ON qa.id = h.attempt_id
+        JOIN resource_courses rc ON rc.resource_id = qa.quiz_id
+        GROUP BY h.user_id, rc.course_id
+    ),
+    reading AS (
+        SELECT r.user_id, rc.course_id,
+               SUM(r.dwell_time_ms) AS dwell_time_ms,
+               AVG(r.scroll_depth_percent) AS scroll_depth
+        FROM reading_behavior_logs r
+        JOIN resource_courses rc ON rc.resource_id = r.lesson_id
+        WHERE p_full OR r.user_id = ANY(v_users)
+        GROUP BY r.user_id, rc.course_id
+    ),
+    progress AS (
+        SELECT lp.user_id, rc.course_id, COUNT(DISTINCT lp.lesson_id) AS completed
+        FROM lesson_progress lp
+        JOIN resource_courses rc ON rc.resource_id = lp.lesson_id
+        WHERE lp.is_completed AND (p_full OR lp.user_id = ANY(v_users))
+        GROUP BY lp.user_id, rc.course_id
+    ),
+    activity AS (
+        SELECT a.user_id, rc.course_id,
+               COUNT(DISTINCT a.session_id) AS sessions,
+               COUNT(DISTINCT a.timestamp::date) AS active_days,
+               MIN(a.timestamp) AS first_at,
+               MAX(a.timestamp) AS last_at
+        FROM activity_logs a
+        JOIN resource_courses rc ON rc.resource_id = a.resource_id
+        WHERE p_full OR a.user_id = ANY(v_users)
+        GROUP BY a.user_id, rc.course_id
+    )
+    SELECT p.user_id, p.course_id,
+           COALESCE(q.attempts, 0),
+           ROUND(q.avg_score, 2),
+           ROUND(q.max_score, 2),
+           COALESCE(q.retries, 0),
+           COALESCE(h.hints, 0),
+           COALESCE(r.dwell_time_ms, 0),
+           ROUND(r.scroll_depth, 2),
+           COALESCE(lp.completed, 0),
+           COALESCE(a.sessions, 0),
+           COALESCE(a.active_days, 0),
+           ROUND(a.sessions / GREATEST(EXTRACT(EPOCH FROM a.last_at - a.first_at) / 604800, 1)::numeric, 2),
+           a.first_at,
+           a.last_at,
+           NOW()
+    FROM pairs p
+    LEFT JOIN quiz q ON q.user_id = p.user_id AND q.course_id = p.course_id
+    LEFT JOIN hints h ON h.user_id = p.user_id AND h.course_id = p.course_id
+    LEFT JOIN reading r ON r.user_id = p.user_id AND r.course_id = p.course_id
+    LEFT JOIN progress lp ON lp.user_id = p.user_id AND lp.course_id = p.course_id
+    LEFT JOIN activity a ON a.user_id = p.user_id AND a.course_id = p.course_id;
+    
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql SET search_path FROM CURRENT;
 
 -- Comments
 COMMENT ON TABLE profiles IS 'User profile information';
@@ -327,4 +635,11 @@ COMMENT ON TABLE user_sessions IS 'User session tracking';
 COMMENT ON TABLE course_grades IS 'Offline/summative assessment grades (assignments, midterm, final exams)';
 COMMENT ON TABLE interaction_logs IS 'User interaction events';
 COMMENT ON TABLE quiz_interaction_logs IS 'Quiz-specific interaction events';
+COMMENT ON TABLE quiz_question_events IS 'Quiz interaction events packed one row per answered question';
+COMMENT ON VIEW quiz_interaction_events IS 'quiz_interaction_logs plus quiz_question_events expanded to one row per event';
 COMMENT ON TABLE reading_behavior_logs IS 'Reading behavior analytics';
+COMMENT ON TABLE user_course_features IS 'Per-(user, course) prediction features, maintained by refresh_user_course_features()';
+COMMENT ON TABLE feature_refresh_queue IS 'Users with new activity since the last feature refresh';
+COMMENT ON TABLE import_checksums IS 'Per-table content checksums of the last upsert import, used to skip unchanged tables';
+COMMENT ON COLUMN import_checksums.row_count IS 'Rows in the imported payload';
+COMMENT ON COLUMN import_checksums.write_count IS 'pg_stat tuples inserted + updated + deleted of the table after the import';
@@ -0,0 +1,108 @@
+"""
+Shared database configuration, connections and connection pool
+Session settings (search_path, synchronous_commit, statement_timeout) are sent once
+in the startup packet, so they cost no round trip and survive ROLLBACK
+"""
+import contextlib
+import os
+import threading
+from typing import Dict, Any, Optional
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Settings for write-heavy phases: a crash may lose the last commits, never corrupts data
+BULK_SETTINGS = {'synchronous_commit': 'off'}
+
+# Extra memory for --fast-load sessions (sorts, hash joins, index builds)
+FAST_LOAD_SETTINGS = {'work_mem': '256MB', 'maintenance_work_mem': '1GB'}
+
+CONNECT_KEYS = ('host', 'port', 'database', 'user', 'password')
+
+
+def get_db_config() -> Dict[str, Any]:
+    """Database configuration from the environment (.env)"""
+    return {
+        'host': os.getenv('LOCAL_DB_HOST', 'localhost'),
+        'port': int(os.getenv('LOCAL_DB_PORT', 5432)),
+        'database': os.getenv('LOCAL_DB_NAME', 'Lovable'),
+        'user': os.getenv('LOCAL_DB_USER', 'postgres'),
+        'password': os.getenv('LOCAL_DB_PASSWORD'),
+        'schema': os.getenv('LOCAL_DB_SCHEMA', 'transform'),
+        # Milliseconds, 0 = no limit
+        'statement_timeout': int(os.getenv('LOCAL_DB_STATEMENT_TIMEOUT', 0)),
+    }
+
+
+def session_settings(db_config: Dict[str, Any], bulk: bool = False, **extra) -> Dict[str, Any]:
+    """GUC settings applied to every connection made with db_config"""
+    settings = {'search_path': f"{db_config.get('schema', 'public')},public"}
+    if db_config.get('statement_timeout'):
+        settings['statement_timeout'] = db_config['statement_timeout']
+    if bulk:
+        settings.update(BULK_SETTINGS)
+    settings.update(extra)
+    return settings
+
+
+def startup_options(settings: Dict[str, Any]) -> str:
+    """Render settings as a libpq 'options' string (-c name=value ...)"""
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace(' ', '\\ ')
+    return ' '.join(f"-c {name}={escape(value)}" for name, value in settings.items())
+
+
+def connect_kwargs(db_config: Dict[str, Any], bulk: bool = False, **extra) -> Dict[str, Any]:
+    kwargs = {k: db_config[k] for k in CONNECT_KEYS if db_config.get(k) is not None}
+    kwargs['options'] = startup_options(session_settings(db_config, bulk, **extra))
+    return kwargs
+
+
+def connect(db_config: Optional[Dict[str, Any]] = None, bulk: bool = False,
+            cursor_factory=None, **extra):
+    """Open a connection with the session settings already applied
+
+    bulk:  also apply BULK_SETTINGS (for generation/import)
+    extra: additional settings, e.g. TimeZone='UTC'
+    """
+    kwargs = connect_kwargs(db_config or get_db_config(), bulk, **extra)
+    if cursor_factory is not None:
+        kwargs['cursor_factory'] = cursor_factory
+    return psycopg2.connect(**kwargs)
+
+
+class ConnectionPool:
+    """Thread-safe pool; connection() blocks until a connection is free instead of failing"""
+
+    def __init__(self, db_config: Optional[Dict[str, Any]] = None, minconn: int = 1,
+                 maxconn: int = 4, bulk: bool = False, **extra):
+        self.maxconn = maxconn
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._pool = ThreadedConnectionPool(
+            minconn, maxconn, **connect_kwargs(db_config or get_db_config(), bulk, **extra)
+        )
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success, rolls back on error"""
+        with self._slots:
+            conn = self._pool.getconn()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._pool.putconn(conn, close=bool(conn.closed))
+
+    def close(self):
+        self._pool.closeall()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,293 @@
+"""
+Export the generated dataset from PostgreSQL to partitioned Parquet files
+Layout: <output>/<table>/month=YYYY-MM/part-00000.parquet (UTC months)
+"""
+import argparse
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, List, Any, Optional
+from db import get_db_config, connect as db_connect
+from log_metadata import JSON_FIELDS, EXTRA_FIELD, split_json_fields
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Low-cardinality text columns stored as Arrow dictionaries
+DICTIONARY_COLUMNS = {
+    'action_type', 'resource_type', 'interaction_type', 'assessment_type', 'status',
+    'role', 'content_type', 'question_type', 'difficulty_level', 'reaction_type',
+    'preferred_learning_style', 'element_name', 'element_type', 'element_context', 'device_type'
+}
+
+# First existing column is used to partition a table by month
+PARTITION_COLUMNS = ['timestamp', 'started_at', 'answered_at', 'graded_at', 'enrolled_at', 'created_at']
+
+NULL_PARTITION = 'month=__null__'
+
+# Kinds of JSON_FIELDS (log_metadata.py) -> Arrow type names
+JSON_KIND_TYPES = {'string': 'string', 'int': 'int64', 'float': 'float64', 'bool': 'bool_'}
+
+
+class ParquetExporter:
+    """Export PostgreSQL tables to Parquet, one dataset per table partitioned by month"""
+
+    def __init__(self, db_config: Dict[str, Any], output_dir: str,
+                 batch_size: int = 50000, compression: str = 'zstd'):
+        self.db_config = db_config
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+        self.compression = compression
+        self.conn = None
+        self.cursor = None
+
+    def connect(self):
+        """Establish database connection"""
+        # Month partitions are taken from UTC timestamps, whatever the server's TimeZone
+        self.conn = db_connect(self.db_config, TimeZone='UTC')
+        self.cursor = self.conn.cursor()
+        schema = self.db_config.get('schema', 'public')
+        print(f"✓ Kết nối database thành công! (Schema: {schema})")
+
+    def disconnect(self):
+        """Close database connection"""
+        if self.cursor:
+            self.cursor.close()
+        if self.conn:
+            self.conn.close()
+            print("✓ Đã đóng kết nối database")
+
+    def list_tables(self) -> List[str]:
+        """List base tables of the configured schema"""
+        self.cursor.execute("""
+            SELECT table_name FROM information_schema.tables
+            WHERE table_schema = %s AND table_type = 'BASE TABLE'
+            ORDER BY table_name
+        """, (self.db_config.get('schema', 'public'),))
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def get_columns(self, table_name: str) -> List[Dict[str, Any]]:
+        """Read column names and types from information_schema"""
+        self.cursor.execute("""
+            SELECT column_name, data_type, udt_name, numeric_precision, numeric_scale
+            FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s
+            ORDER BY ordinal_position
+        """, (self.db_config.get('schema', 'public'), table_name))
+        return [
+            {'table': table_name, 'name': row[0], 'data_type': row[1], 'udt_name': row[2],
+             'precision': row[3], 'scale': row[4]}
+            for row in self.cursor.fetchall()
+        ]
+
+    def arrow_field(self, column: Dict[str, Any]):
+        """Map a PostgreSQL column to a typed Arrow field"""
+        name = column['name']
+        udt = column['udt_name']
+        if udt.startswith('_'):
+            # PostgreSQL array (udt_name of int2[] is _int2): list of the element type
+            element = self.arrow_field({**column, 'udt_name': udt[1:]})
+            return pa.field(name, pa.list_(element.type))
+        if udt in ('json', 'jsonb') and (column.get('table'), name) in JSON_FIELDS:
+            # Known keys as typed struct fields, the rest as JSON text
+            fields = JSON_FIELDS[(column['table'], name)]
+            return pa.field(name, pa.struct(
+                [pa.field(key, getattr(pa, JSON_KIND_TYPES[kind])()) for key, kind in fields.items()]
+                + [pa.field(EXTRA_FIELD, pa.string())]
+            ))
+        if udt == 'uuid':
+            arrow_type = pa.binary(16)
+        elif udt == 'timestamptz':
+            arrow_type = pa.timestamp('us', tz='UTC')
+        elif udt == 'timestamp':
+            arrow_type = pa.timestamp('us')
+        elif udt == 'int2':
+            arrow_type = pa.int16()
+        elif udt == 'int4':
+            arrow_type = pa.int32()
+        elif udt == 'int8':
+            arrow_type = pa.int64()
+        elif udt in ('float4', 'float8'):
+            arrow_type = pa.float64()
+        elif udt == 'bool':
+            arrow_type = pa.bool_()
+        elif udt == 'numeric' and column['precision']:
+            arrow_type = pa.decimal128(column['precision'], column['scale'] or 0)
+        elif udt == 'numeric':
+            arrow_type = pa.float64()
+        elif name in DICTIONARY_COLUMNS:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            # text, varchar, jsonb without known keys (JSON text) and anything else
+            arrow_type = pa.string()
+        return pa.field(name, arrow_type)
+
+    def _value_converter(self, column: Dict[str, Any]):
+        """Build a per-column Python value converter (None passes through)"""
+        udt = column['udt_name']
+        if udt.startswith('_'):
+            convert = self._value_converter({**column, 'udt_name': udt[1:]})
+            if convert is None:
+                return None
+            return lambda v: [None if x is None else convert(x) for x in v]
+        if udt == 'uuid':
+            return lambda v: uuid.UUID(v).bytes if isinstance(v, str) else v.bytes
+        if udt in ('json', 'jsonb') and (column.get('table'), column['name']) in JSON_FIELDS:
+            fields = JSON_FIELDS[(column['table'], column['name'])]
+
+            def to_struct(value):
+                typed, extras = split_json_fields(value, fields)
+                typed[EXTRA_FIELD] = (None if extras is None
+                                      else json.dumps(extras, ensure_ascii=False, separators=(',', ':')))
+                return typed
+            return to_struct
+        if udt in ('json', 'jsonb'):
+            return lambda v: json.dumps(v, ensure_ascii=False, separators=(',', ':'))
+        if udt == 'numeric' and not column['precision']:
+            return float
+        if udt in ('text', 'varchar', 'bpchar', 'timestamptz', 'timestamp', 'int2', 'int4',
+                   'int8', 'float4', 'float8', 'bool', 'numeric'):
+            return None
+        return str
+
+    def _partition_key(self, value) -> str:
+        if value is None:
+            return NULL_PARTITION
+        return f"month={value.year:04d}-{value.month:02d}"
+
+    def _build_table(self, schema, columns: List[list]):
+        arrays = []
+        for field, values in zip(schema, columns):
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def export_table(self, table_name: str) -> int:
+        """Stream one table into month-partitioned Parquet files"""
+        columns = self.get_columns(table_name)
+        if not columns:
+            print(f"  → Bảng {table_name}: Không tồn tại")
+            return 0
+
+        names = [c['name'] for c in columns]
+        schema = pa.schema([self.arrow_field(c) for c in columns])
+        converters = [self._value_converter(c) for c in columns]
+        partition_column = next((c for c in PARTITION_COLUMNS if c in names), None)
+        partition_index = names.index(partition_column) if partition_column else None
+
+        table_dir = os.path.join(self.output_dir, table_name)
+        if os.path.isdir(table_dir):
+            # Months of an earlier export would otherwise stay next to the new ones
+            shutil.rmtree(table_dir)
+        writers = {}   # {partition: ParquetWriter}
+        buffers = {}   # {partition: [column values...]}
+        buffered = {}  # {partition: row count}
+        total = 0
+
+        def flush(partition: str):
+            if not buffered.get(partition):
+                return
+            if partition not in writers:
+                partition_dir = os.path.join(table_dir, partition)
+                os.makedirs(partition_dir, exist_ok=True)
+                writers[partition] = pq.ParquetWriter(
+                    os.path.join(partition_dir, 'part-00000.parquet'),
+                    schema, compression=self.compression
+                )
+            writers[partition].write_table(self._build_table(schema, buffers[partition]))
+            buffers[partition] = [[] for _ in names]
+            buffered[partition] = 0
+
+        column_list = ', '.join(f'"{name}"' for name in names)
+        # Server-side cursor keeps memory bounded for large log tables
+        with self.conn.cursor(name=f"export_{table_name}") as stream:
+            stream.itersize = self.batch_size
+            stream.execute(f"SELECT {column_list} FROM {table_name}")
+            try:
+                for row in stream:
+                    partition = (self._partition_key(row[partition_index])
+                                 if partition_index is not None else NULL_PARTITION)
+                    buffer = buffers.get(partition)
+                    if buffer is None:
+                        buffer = buffers[partition] = [[] for _ in names]
+                        buffered[partition] = 0
+                    for i, value in enumerate(row):
+                        converter = converters[i]
+                        if value is not None and converter is not None:
+                            value = converter(value)
+                        buffer[i].append(value)
+                    buffered[partition] += 1
+                    total += 1
+                    if buffered[partition] >= self.batch_size:
+                        flush(partition)
+
+                for partition in list(buffers):
+                    flush(partition)
+            finally:
+                for writer in writers.values():
+                    writer.close()
+
+        self.conn.commit()
+        print(f"  ✓ Bảng {table_name}: {total} bản ghi → {len(writers)} partition(s)")
+        return total
+
+    def export_all_tables(self, tables: Optional[List[str]] = None):
+        """Export all (or selected) tables"""
+        table_names = tables or self.list_tables()
+
+        print(f"\n🚀 Bắt đầu export Parquet → {self.output_dir}")
+        print(f"   Tổng số bảng: {len(table_names)}")
+        print("-" * 60)
+
+        total = 0
+        for table_name in table_names:
+            total += self.export_table(table_name)
+
+        print("-" * 60)
+        print(f"✓ Hoàn thành export {total} bản ghi!\n")
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Export PostgreSQL tables to partitioned Parquet')
+    parser.add_argument('--output', default='parquet-export', help='Output directory')
+    parser.add_argument('--tables', nargs='*', help='Tables to export (default: all tables in the schema)')
+    parser.add_argument('--batch-size', type=int, default=50000, help='Rows per Parquet row group')
+    parser.add_argument('--compression', default='zstd', help='Parquet codec (zstd, snappy, gzip, none)')
+    args = parser.parse_args()
+
+    if pa is None:
+        print("✗ Cần cài pyarrow để export Parquet: pip install pyarrow")
+        return
+
+    DB_CONFIG = get_db_config()
+
+    print("=" * 60)
+    print(" EXPORT DỮ LIỆU SANG PARQUET ".center(60, "="))
+    print("=" * 60)
+
+    exporter = ParquetExporter(DB_CONFIG, args.output, args.batch_size, args.compression)
+    try:
+        exporter.connect()
+        exporter.export_all_tables(args.tables)
+
+        print("=" * 60)
+        print("✓ HOÀN THÀNH!".center(60))
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ Có lỗi xảy ra: {e}")
+
+    finally:
+        exporter.disconnect()
+
+
+if __name__ == '__main__':
+    main()
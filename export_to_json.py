@@ -0,0 +1,194 @@
+"""
+Export PostgreSQL tables to the database-export-*.json format
+Mirror of PostgresImporter: tables are streamed with COPY ... row_to_json and written incrementally
+"""
+import argparse
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from db import get_db_config, connect as db_connect
+from table_registry import default_registry
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Same order as PostgresImporter.import_stream (parents before children)
+TABLE_ORDER = default_registry().data_tables()
+
+# COPY in CSV mode with control characters as quote/delimiter: row_to_json output
+# never contains raw control characters, so every line is one JSON record, unescaped
+COPY_OPTIONS = "FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02'"
+
+
+def open_output(path: str):
+    """Open a text output stream, compressed according to the file extension"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("Cần cài zstandard để ghi file .zst: pip install zstandard")
+        raw = open(path, 'wb')
+        compressed = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(compressed, encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+class _RecordStream(io.TextIOBase):
+    """File-like target for copy_expert: turns COPY lines into JSON array items"""
+
+    def __init__(self, out, indent: str = '      '):
+        self.out = out
+        self.indent = indent
+        self.count = 0
+        self._pending = ''
+
+    def writable(self):
+        return True
+
+    def write(self, data: str) -> int:
+        lines = (self._pending + data).split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            if line:
+                self._emit(line)
+        return len(data)
+
+    def _emit(self, record: str):
+        separator = ',\n' if self.count else '\n'
+        self.out.write(separator + self.indent + record)
+        self.count += 1
+
+    def finish(self):
+        if self._pending:
+            self._emit(self._pending)
+            self._pending = ''
+
+
+class PostgresExporter:
+    """Export PostgreSQL data into the JSON export format"""
+
+    def __init__(self, db_config: Dict[str, str]):
+        self.db_config = db_config
+        self.conn = None
+        self.cursor = None
+
+    def connect(self):
+        """Establish database connection"""
+        try:
+            # Timestamps rendered like the existing exports (+00:00)
+            self.conn = db_connect(self.db_config, TimeZone='UTC')
+            self.cursor = self.conn.cursor()
+            schema = self.db_config.get('schema', 'public')
+
+            print(f"✓ Kết nối database thành công! (Schema: {schema})")
+        except Exception as e:
+            print(f"✗ Lỗi kết nối database: {e}")
+            raise
+
+    def disconnect(self):
+        """Close database connection"""
+        if self.cursor:
+            self.cursor.close()
+        if self.conn:
+            self.conn.close()
+            print("✓ Đã đóng kết nối database")
+
+    def table_exists(self, table_name: str) -> bool:
+        self.cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (table_name,))
+        return self.cursor.fetchone()[0]
+
+    def export_table(self, table_name: str, out) -> int:
+        """Stream one table as a JSON array into out"""
+        out.write(f'    {json.dumps(table_name)}: [')
+        records = _RecordStream(out)
+        # Rows referencing their own table (replies) must follow their parent; a reply is
+        # always created after the post it answers
+        info = default_registry().get(table_name)
+        order = " ORDER BY created_at, id" if info and info.self_referencing and 'created_at' in info.columns else ""
+        self.cursor.copy_expert(
+            f"COPY (SELECT row_to_json(t) FROM {table_name} t{order}) TO STDOUT WITH ({COPY_OPTIONS})",
+            records
+        )
+        records.finish()
+        out.write('\n    ]' if records.count else ']')
+        print(f"  ✓ Bảng {table_name}: Đã export {records.count} bản ghi")
+        return records.count
+
+    def export_all_tables(self, output_path: str, tables: Optional[List[str]] = None):
+        """Export all tables into a single JSON document"""
+        table_order = [t for t in TABLE_ORDER if self.table_exists(t)]
+        if tables:
+            table_order = [t for t in table_order if t in tables]
+
+        print(f"\n🚀 Bắt đầu export dữ liệu → {output_path}")
+        print(f"   Tổng số bảng: {len(table_order)}")
+        print("-" * 60)
+
+        export_date = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+        table_counts = {}
+
+        with open_output(output_path) as out:
+            out.write('{\n')
+            out.write(f'  "export_date": {json.dumps(export_date)},\n')
+            out.write(f'  "is_full_export": {json.dumps(not tables)},\n')
+            out.write('  "tables": {\n')
+            for i, table_name in enumerate(table_order):
+                if i:
+                    out.write(',\n')
+                table_counts[table_name] = self.export_table(table_name, out)
+            out.write('\n  },\n')
+
+            metadata = {
+                'total_records': sum(table_counts.values()),
+                'tables_exported': len(table_counts),
+                'table_counts': table_counts,
+                'date_range': {'from': None, 'to': None}
+            }
+            out.write(f'  "metadata": {json.dumps(metadata, ensure_ascii=False)}\n')
+            out.write('}\n')
+
+        self.conn.commit()
+        print("-" * 60)
+        print(f"✓ Hoàn thành export {metadata['total_records']} bản ghi!\n")
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Export PostgreSQL tables to database-export JSON')
+    parser.add_argument('output', nargs='?',
+                        default=f"database-export-{datetime.now().strftime('%Y-%m-%d')}.json",
+                        help='Output file (.json, .json.gz or .json.zst)')
+    parser.add_argument('--tables', nargs='*', help='Tables to export (default: all)')
+    args = parser.parse_args()
+
+    # Đọc cấu hình từ file .env
+    DB_CONFIG = get_db_config()
+
+    print("=" * 60)
+    print(" EXPORT DỮ LIỆU TỪ POSTGRESQL ".center(60, "="))
+    print("=" * 60)
+
+    exporter = None
+    try:
+        exporter = PostgresExporter(DB_CONFIG)
+        exporter.connect()
+        exporter.export_all_tables(args.output, args.tables)
+
+        print("=" * 60)
+        print("✓ HOÀN THÀNH!".center(60))
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ Có lỗi xảy ra: {e}")
+
+    finally:
+        if exporter:
+            exporter.disconnect()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,21 +3,50 @@ Data Simulation Script for Learning Path Recommendation System
 Generate realistic student learning behavior data for 2 months, 20 students
 """
 
+import itertools
 import random
-import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-import psycopg2
-from psycopg2.extras import Json
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from typing import List, Dict, Any, Tuple
+import argparse
+from db import get_db_config, connect as db_connect, FAST_LOAD_SETTINGS
+from streaming_validation import StreamingValidator
+from sinks import RowSink, PostgresSink
+from instrumentation import Instrumentation
+from ids import IdGenerator, UUID_MODES
+from progress import ProgressReporter
+from activity_model import ActivityModel, load_profile as load_activity_profile
+from refresh_features import set_feature_triggers
+from log_metadata import DEVICE_TYPES
+from table_registry import default_registry
+from table_stats import collect as collect_table_stats, print_table_stats
+from import_to_postgres import open_export_file, iter_export_records
 
 # Constants
 START_DATE = datetime(2025, 11, 1, tzinfo=None)
 END_DATE = datetime(2026, 1, 1, tzinfo=None)
 TOTAL_DAYS = (END_DATE - START_DATE).days
+VALIDATION_SUMMARY_FILE = 'validation_summary.json'
+
+# Column lists shared by several insert sites
+ENROLLMENT_COLUMNS = ('id', 'user_id', 'course_id', 'status', 'progress_percentage', 'enrolled_at', 'completed_at')
+INTERACTION_LOG_COLUMNS = (
+    'id', 'user_id', 'lesson_id', 'session_id', 'timestamp', 'element_id', 'interaction_type',
+    'element_name', 'element_type', 'element_context', 'device_type', 'interaction_count', 'metadata'
+)
+COURSE_GRADE_COLUMNS = ('id', 'user_id', 'course_id', 'assessment_type', 'title', 'score', 'weight', 'graded_at')
+
+# Action codes of quiz_question_events.actions (see create_schema.sql)
+QUIZ_EVENT_CODES = {'view': 1, 'hint_request': 2, 'answer': 3, 'submit': 4}
+QUIZ_EVENT_COLUMNS = (
+    'id', 'user_id', 'attempt_id', 'question_id', 'started_at', 'actions', 'offsets_ms',
+    'time_spent_ms', 'answers', 'is_correct', 'answer_changes_count', 'hint_used'
+)
+
+FORUM_POST_COLUMNS = ('id', 'lesson_id', 'user_id', 'parent_post_id', 'content', 'is_pinned', 'created_at', 'updated_at')
+FORUM_REACTION_COLUMNS = ('id', 'post_id', 'user_id', 'reaction_type', 'created_at')
+
+# Generated tables, children before parents (delete / SET UNLOGGED order)
+BEHAVIOR_TABLES = list(reversed(default_registry().generated_tables()))
 
 # Student personas
 PERSONA_DILIGENT = "diligent"      # 20% - Giỏi
@@ -25,6 +54,34 @@ PERSONA_AVERAGE = "average"        # 40% - Khá/TB
 PERSONA_STRUGGLING = "struggling"  # 25% - Yếu
 PERSONA_DROPOUT = "dropout"        # 15% - Bỏ cuộc
 
+# Forum: chance to open a thread after studying a lesson, weight as a replier/reactor
+FORUM_THREAD_PROBABILITY = {
+    PERSONA_DILIGENT: 0.05, PERSONA_AVERAGE: 0.03, PERSONA_STRUGGLING: 0.06, PERSONA_DROPOUT: 0.02
+}
+FORUM_ACTIVITY_WEIGHT = {
+    PERSONA_DILIGENT: 4.0, PERSONA_AVERAGE: 2.0, PERSONA_STRUGGLING: 1.0, PERSONA_DROPOUT: 0.5
+}
+# Replies per thread and reactions per post are Pareto-distributed: most threads get
+# no answer, a few grow very long
+FORUM_REPLY_ALPHA = 1.2
+FORUM_MAX_REPLIES = 300
+FORUM_REACTION_ALPHA = 1.5
+FORUM_REACTION_TYPES = ['like', 'helpful', 'insightful', 'confused']
+FORUM_REACTION_WEIGHTS = [0.60, 0.25, 0.10, 0.05]
+FORUM_QUESTIONS = [
+    "Mình chưa hiểu phần {title}, ai giải thích giúp với?",
+    "Có tài liệu nào đọc thêm cho bài {title} không mọi người?",
+    "Bài tập trong {title} mình làm ra kết quả khác, có ai bị giống không?",
+    "Tóm tắt ý chính của {title} theo cách mình hiểu, mọi người góp ý nhé.",
+]
+FORUM_REPLIES = [
+    "Mình cũng thắc mắc chỗ này.",
+    "Bạn xem lại ví dụ ở cuối bài nhé, có giải thích khá rõ.",
+    "Cảm ơn bạn, mình hiểu rồi!",
+    "Theo mình thì cách này đúng, nhưng còn có cách ngắn hơn.",
+    "Mình gặp lỗi tương tự, sửa bằng cách đọc lại phần lý thuyết.",
+]
+
 VIETNAMESE_NAMES = [
     "Nguyễn Văn An", "Trần Thị Bình", "Lê Hoàng Cường", "Phạm Thị Dung",
     "Hoàng Văn Em", "Vũ Thị Phương", "Đặng Văn Giang", "Bùi Thị Hà",
@@ -210,10 +267,24 @@ ELEMENT_DEFINITIONS = {
 
 
 class DataGenerator:
-    def __init__(self, db_config: Dict[str, Any]):
+    def __init__(self, db_config: Dict[str, Any], sink: RowSink = None,
+                 instrumentation: Instrumentation = None, ids: IdGenerator = None):
         self.db_config = db_config
+        # Row ids come from a block generator (see ids.py)
+        self.ids = ids or IdGenerator()
         self.conn = None
         self.cursor = None
+        self.instrumentation = instrumentation
+        self.progress_interval = 5.0
+        self.fast_load = False
+        # Store quiz interaction events one row per question (quiz_question_events)
+        self.compact_quiz_events = False
+        # When sessions happen: hour/weekday curves and exam spikes (see activity_model.py)
+        self.activity_model = ActivityModel(START_DATE, TOTAL_DAYS)
+        # Generated rows go through the sink (PostgresSink by default, see connect)
+        self.sink = sink
+        if sink is not None and instrumentation:
+            instrumentation.wrap_sink(sink)
         
         # Store existing data
         self.courses = []
@@ -226,18 +297,33 @@ class DataGenerator:
         self.users = []
         self.personas = {}
         
+        # In-memory tracking so grades need no second pass over the DB
+        self.course_id_by_resource = {}  # {module/lesson/quiz id: course_id}
+        self.quiz_performance = {}  # {(user_id, course_id): [sum of score/max_score, attempts]}
+        self.last_activity_times = {}  # {(user_id, course_id): datetime}
+        self.study_end = {}  # {user_id: end of the user's active period}
+        # Threads opened during sessions, expanded by generate_forum_activity:
+        # [(post_id, lesson_id, course_id, user_id, created_at)]
+        self.forum_threads = []
+        self.validator = StreamingValidator()
+        
     def connect(self):
         """Connect to database"""
-        config = {k: v for k, v in self.db_config.items() if k != 'schema'}
-        self.conn = psycopg2.connect(**config)
+        self.conn = db_connect(self.db_config, bulk=True, **(FAST_LOAD_SETTINGS if self.fast_load else {}))
+        if self.instrumentation:
+            self.instrumentation.attach(self.conn)
         self.cursor = self.conn.cursor()
         schema = self.db_config.get('schema', 'public')
-        self.cursor.execute(f"SET search_path TO {schema}, public")
-        self.conn.commit()
+        if self.sink is None:
+            self.sink = PostgresSink(self.conn)
+            if self.instrumentation:
+                self.instrumentation.wrap_sink(self.sink)
         print(f"✓ Kết nối database thành công! (Schema: {schema})")
     
     def disconnect(self):
         """Disconnect from database"""
+        if self.sink:
+            self.sink.close()
         if self.cursor:
             self.cursor.close()
         if self.conn:
@@ -248,28 +334,59 @@ class DataGenerator:
         """Clear all behavior data, keep course content"""
         print("\n🗑️  Xóa dữ liệu hành vi cũ...")
         
-        tables_to_clear = [
-            'course_grades',
-            'reading_behavior_logs',
-            'quiz_interaction_logs',
-            'question_responses',
-            'quiz_attempts',
-            'interaction_logs',
-            'lesson_progress',
-            'activity_logs',
-            'user_sessions',
-            'enrollments',
-            'user_roles',
-            'profiles'
-        ]
-        
-        for table in tables_to_clear:
-            self.cursor.execute(f"DELETE FROM {table}")
+        # One TRUNCATE: no per-row delete work and no DELETE triggers (feature queue)
+        tables = list(BEHAVIOR_TABLES)
+        self.cursor.execute("SELECT to_regclass('user_course_features') IS NOT NULL")
+        if self.cursor.fetchone()[0]:
+            tables += ['user_course_features', 'feature_refresh_queue']
+        self.cursor.execute(f"TRUNCATE {', '.join(tables)}")
+        for table in tables:
             print(f"  ✓ Đã xóa: {table}")
         
+        # An upsert import (--skip-unchanged) must not skip the tables replaced here
+        self.cursor.execute("SELECT to_regclass('import_checksums') IS NOT NULL")
+        if self.cursor.fetchone()[0]:
+            self.cursor.execute("DELETE FROM import_checksums WHERE table_name = ANY(%s)", (BEHAVIOR_TABLES,))
+
         self.conn.commit()
         print("✓ Hoàn thành xóa dữ liệu cũ\n")
     
+    def pause_feature_triggers(self) -> bool:
+        """Disable the feature queue triggers for the bulk generation (see refresh_features)"""
+        paused = set_feature_triggers(self.cursor, False)
+        self.conn.commit()
+        if paused:
+            print(f"  ✓ Tạm tắt {paused} trigger hàng đợi features")
+        return bool(paused)
+    
+    def refresh_features(self):
+        """Re-enable the feature queue triggers and recompute all features once"""
+        print("\n🔄 Cập nhật features (user_course_features)...")
+        self.conn.rollback()  # after a failed phase
+        set_feature_triggers(self.cursor, True)
+        self.cursor.execute("SELECT refresh_user_course_features(true)")
+        rows = self.cursor.fetchone()[0]
+        self.conn.commit()
+        print(f"  ✓ Đã cập nhật {rows} dòng features")
+    
+    def set_tables_logged(self, logged: bool):
+        """Switch the generated tables between LOGGED and UNLOGGED
+        
+        A logged table may not reference an unlogged one, so tables are made
+        unlogged children first and logged again parents first.
+        """
+        if logged:
+            print("\n💾 Chuyển các bảng hành vi về LOGGED...")
+            tables, mode = list(reversed(BEHAVIOR_TABLES)), 'LOGGED'
+        else:
+            print("\n⚡ Fast load: chuyển các bảng hành vi sang UNLOGGED (không ghi WAL)...")
+            tables, mode = BEHAVIOR_TABLES, 'UNLOGGED'
+        
+        for table in tables:
+            self.cursor.execute(f"ALTER TABLE {table} SET {mode}")
+        self.conn.commit()
+        print(f"  ✓ {len(tables)} bảng → {mode}")
+    
     def load_existing_content(self):
         """Load existing course content"""
         print("📚 Đọc dữ liệu nội dung khóa học...")
@@ -294,6 +411,66 @@ class DataGenerator:
         self.cursor.execute("SELECT id, quiz_id, question_type, correct_answer, points FROM questions ORDER BY quiz_id, order_index")
         self.questions = [{'id': row[0], 'quiz_id': row[1], 'type': row[2], 'correct_answer': row[3], 'points': row[4]} for row in self.cursor.fetchall()]
         
+        self._index_content()
+    
+    def load_content_from_export(self, file_path: str):
+        """Load course content from a database export file instead of the DB (for file sinks)"""
+        print(f"📚 Đọc dữ liệu nội dung khóa học từ {file_path}...")
+        
+        content_tables = {'courses', 'modules', 'lessons', 'quizzes', 'questions'}
+        tables = {name: [] for name in content_tables}
+        with open_export_file(file_path) as f:
+            for table_name, record in iter_export_records(f):
+                if table_name in content_tables:
+                    tables[table_name].append(record)
+        
+        self.set_content(tables)
+    
+    def set_content(self, tables: Dict[str, List[Dict[str, Any]]]):
+        """Use content records ({table: [row, ...]}, export format) instead of the DB,
+        e.g. a catalog from catalog_synth.py"""
+        # Same shapes and ordering as load_existing_content
+        self.courses = [{'id': r['id'], 'title': r['title'], 'difficulty': r.get('difficulty_level')}
+                        for r in sorted(tables['courses'], key=lambda r: r.get('created_at') or '')]
+        self.modules = [{'id': r['id'], 'course_id': r['course_id'], 'title': r['title'], 'order': r['order_index']}
+                        for r in sorted(tables['modules'], key=lambda r: (r['course_id'], r['order_index']))]
+        self.lessons = [{'id': r['id'], 'module_id': r['module_id'], 'title': r['title'],
+                         'estimated_minutes': r.get('estimated_minutes'), 'order': r['order_index']}
+                        for r in sorted(tables['lessons'], key=lambda r: (r['module_id'], r['order_index']))]
+        self.quizzes = [{'id': r['id'], 'module_id': r['module_id'], 'title': r['title'],
+                         'passing_score': r.get('passing_score'), 'time_limit': r.get('time_limit_minutes')}
+                        for r in sorted(tables['quizzes'], key=lambda r: r['module_id'] or '')]
+        self.questions = [{'id': r['id'], 'quiz_id': r['quiz_id'], 'type': r['question_type'],
+                           'correct_answer': r.get('correct_answer'), 'points': r.get('points', 1)}
+                          for r in sorted(tables['questions'], key=lambda r: (r['quiz_id'], r['order_index']))]
+        
+        self._index_content()
+    
+    def _index_content(self):
+        """Build lookup structures over the loaded content"""
+        # Map content resources to their course (used for last activity tracking)
+        module_course = {m['id']: m['course_id'] for m in self.modules}
+        self.course_id_by_resource = dict(module_course)
+        for lesson in self.lessons:
+            self.course_id_by_resource[lesson['id']] = module_course.get(lesson['module_id'])
+        for quiz in self.quizzes:
+            self.course_id_by_resource[quiz['id']] = module_course.get(quiz['module_id'])
+        
+        # Children per parent (in load order), so sessions never scan the whole catalog
+        self.course_by_id = {c['id']: c for c in self.courses}
+        self.modules_by_course = {}
+        for module in self.modules:
+            self.modules_by_course.setdefault(module['course_id'], []).append(module)
+        self.lessons_by_module = {}
+        for lesson in self.lessons:
+            self.lessons_by_module.setdefault(lesson['module_id'], []).append(lesson)
+        self.quiz_by_module = {}  # first quiz of each module
+        for quiz in self.quizzes:
+            self.quiz_by_module.setdefault(quiz['module_id'], quiz)
+        self.questions_by_quiz = {}
+        for question in self.questions:
+            self.questions_by_quiz.setdefault(question['quiz_id'], []).append(question)
+        
         print(f"  ✓ {len(self.courses)} courses")
         print(f"  ✓ {len(self.modules)} modules")
         print(f"  ✓ {len(self.lessons)} lessons")
@@ -304,32 +481,36 @@ class DataGenerator:
         """Generate user profiles with personas"""
         print(f"👥 Tạo {count} sinh viên...")
         
-        # Distribute personas
+        # Distribute personas (20% / 40% / 25% / 15%)
+        num_diligent = round(count * 0.20)
+        num_struggling = round(count * 0.25)
+        num_dropout = round(count * 0.15)
+        num_average = count - num_diligent - num_struggling - num_dropout
         personas = (
-            [PERSONA_DILIGENT] * 4 +      # 20%
-            [PERSONA_AVERAGE] * 8 +       # 40%
-            [PERSONA_STRUGGLING] * 5 +    # 25%
-            [PERSONA_DROPOUT] * 3         # 15%
+            [PERSONA_DILIGENT] * num_diligent +
+            [PERSONA_AVERAGE] * num_average +
+            [PERSONA_STRUGGLING] * num_struggling +
+            [PERSONA_DROPOUT] * num_dropout
         )
         random.shuffle(personas)
         
-        for i, name in enumerate(VIETNAMESE_NAMES[:count]):
-            user_id = str(uuid.uuid4())
-            profile_id = str(uuid.uuid4())
+        for i in range(count):
+            # Names repeat with a numeric suffix beyond the first 20 students
+            name = VIETNAMESE_NAMES[i % len(VIETNAMESE_NAMES)]
+            if i >= len(VIETNAMESE_NAMES):
+                name = f"{name} {i // len(VIETNAMESE_NAMES) + 1}"
+            user_id = self.ids.new()
+            profile_id = self.ids.new()
             persona = personas[i]
             
             # Insert profile
-            self.cursor.execute("""
-                INSERT INTO profiles (id, user_id, full_name, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (profile_id, user_id, name, START_DATE, START_DATE))
+            self.sink.write('profiles', ('id', 'user_id', 'full_name', 'created_at', 'updated_at'),
+                            (profile_id, user_id, name, START_DATE, START_DATE))
             
             # Insert user role
-            role_id = str(uuid.uuid4())
-            self.cursor.execute("""
-                INSERT INTO user_roles (id, user_id, role, created_at)
-                VALUES (%s, %s, 'student', %s)
-            """, (role_id, user_id, START_DATE))
+            role_id = self.ids.new()
+            self.sink.write('user_roles', ('id', 'user_id', 'role', 'created_at'),
+                            (role_id, user_id, 'student', START_DATE))
             
             self.users.append({
                 'user_id': user_id,
@@ -339,7 +520,7 @@ class DataGenerator:
             })
             self.personas[user_id] = persona
         
-        self.conn.commit()
+        self.sink.commit()
         print(f"  ✓ Giỏi (diligent): {personas.count(PERSONA_DILIGENT)}")
         print(f"  ✓ Khá/TB (average): {personas.count(PERSONA_AVERAGE)}")
         print(f"  ✓ Yếu (struggling): {personas.count(PERSONA_STRUGGLING)}")
@@ -350,21 +531,24 @@ class DataGenerator:
         print("📝 Tạo enrollments...")
         
         # Initialize dictionaries to track enrollments
-        self.user_enrollments = {}  # {user_id: [course_id1, course_id2, ...]}
+        # {user_id: {course_id: weight}}: an insertion-ordered set of courses (plain sets
+        # iterate in hash order, which would make --seed runs differ)
+        self.user_enrollments = {}
+        self.course_choosers = {}  # {user_id: (courses, cum_weights)}, rebuilt after a new enrollment
         self.enrollment_details = {}  # {(user_id, course_id): {'enrolled_at': datetime, 'enrollment_id': str}}
         
         # Each student enrolls in 1-2 courses
         for user in self.users:
             user_id = user['user_id']
-            self.user_enrollments[user_id] = []
+            self.user_enrollments[user_id] = {}
             
             num_courses = 1 if random.random() < 0.7 else 2
             selected_courses = random.sample(self.courses, num_courses)
             
             for course in selected_courses:
-                enrollment_id = str(uuid.uuid4())
                 # Set enrolled_at at START_DATE or 1 day before to ensure all activities happen after
                 enrolled_at = START_DATE
+                enrollment_id = self.ids.new(enrolled_at)
                 
                 # Calculate progress based on persona
                 persona = user['persona']
@@ -385,38 +569,35 @@ class DataGenerator:
                     status = 'inactive'
                     completed_at = None
                 
-                self.cursor.execute("""
-                    INSERT INTO enrollments (id, user_id, course_id, status, progress_percentage, enrolled_at, completed_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (enrollment_id, user_id, course['id'], status, progress, enrolled_at, completed_at))
+                self.sink.write('enrollments', ENROLLMENT_COLUMNS,
+                                (enrollment_id, user_id, course['id'], status, progress, enrolled_at, completed_at))
                 
                 # Track this enrollment with details
-                self.user_enrollments[user_id].append(course['id'])
+                self._add_enrollment(user_id, course['id'], progress)
                 self.enrollment_details[(user_id, course['id'])] = {
                     'enrolled_at': enrolled_at,
                     'enrollment_id': enrollment_id
                 }
         
-        self.conn.commit()
+        self.sink.commit()
         print(f"  ✓ Đã tạo enrollments\n")
     
     def _ensure_enrollment(self, user_id: str, course_id: str, session_start: datetime, persona: str):
         """Ensure user has enrollment for the course, create if not exists"""
         if user_id not in self.user_enrollments:
-            self.user_enrollments[user_id] = []
+            self.user_enrollments[user_id] = {}
         
         enrollment_key = (user_id, course_id)
         
         if course_id not in self.user_enrollments[user_id]:
             # Create new enrollment with enrolled_at BEFORE session_start
-            enrollment_id = str(uuid.uuid4())
-            
             # Set enrolled_at to 1-7 days BEFORE the first session
             enrolled_at = session_start - timedelta(days=random.randint(1, 7))
             
             # Ensure enrolled_at is not before START_DATE
             if enrolled_at < START_DATE:
                 enrolled_at = START_DATE
+            enrollment_id = self.ids.new(enrolled_at)
             
             # Set initial progress based on persona
             if persona == PERSONA_DILIGENT:
@@ -432,18 +613,34 @@ class DataGenerator:
                 progress = random.randint(0, 15)
                 status = 'active'
             
-            self.cursor.execute("""
-                INSERT INTO enrollments (id, user_id, course_id, status, progress_percentage, enrolled_at, completed_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (enrollment_id, user_id, course_id, status, progress, enrolled_at, None))
+            self.sink.write('enrollments', ENROLLMENT_COLUMNS,
+                            (enrollment_id, user_id, course_id, status, progress, enrolled_at, None))
             
             # Track this enrollment with details
-            self.user_enrollments[user_id].append(course_id)
+            self._add_enrollment(user_id, course_id, progress)
             self.enrollment_details[enrollment_key] = {
                 'enrolled_at': enrolled_at,
                 'enrollment_id': enrollment_id
             }
     
+    def _add_enrollment(self, user_id: str, course_id: str, progress: int):
+        """Record an enrollment; sessions pick courses in proportion to enrollment progress"""
+        self.user_enrollments.setdefault(user_id, {})[course_id] = max(progress, 5)
+        self.course_choosers.pop(user_id, None)
+    
+    def _choose_enrolled_course(self, user_id: str):
+        """Weighted pick among the user's enrolled courses (None if none is in the catalog)"""
+        chooser = self.course_choosers.get(user_id)
+        if chooser is None:
+            enrolled = self.user_enrollments[user_id]
+            courses = [self.course_by_id[c] for c in enrolled if c in self.course_by_id]
+            cum_weights = list(itertools.accumulate(enrolled[c['id']] for c in courses))
+            chooser = self.course_choosers[user_id] = (courses, cum_weights)
+        courses, cum_weights = chooser
+        if len(courses) <= 1:
+            return courses[0] if courses else None
+        return random.choices(courses, cum_weights=cum_weights)[0]
+    
     def get_study_frequency(self, persona: str) -> int:
         """Get weekly study frequency based on persona"""
         if persona == PERSONA_DILIGENT:
@@ -458,6 +655,11 @@ class DataGenerator:
     def generate_learning_behavior(self):
         """Generate all learning behavior data"""
         print("🎓 Tạo dữ liệu hành vi học tập (2 tháng)...")
+        progress = ProgressReporter("Hành vi", total=len(self.users), unit='users',
+                                    interval=self.progress_interval, counts=self.sink.row_counts)
+        
+        # Sessions end early enough for their last step to finish before END_DATE
+        latest_end = END_DATE - self._session_overrun()
         
         for user in self.users:
             user_id = user['user_id']
@@ -470,30 +672,50 @@ class DataGenerator:
             else:
                 active_days = TOTAL_DAYS
             
-            # Generate study days
-            study_days = []
-            current_day = 0
-            weekly_frequency = self.get_study_frequency(persona)
+            self.study_end[user_id] = START_DATE + timedelta(days=active_days)
             
-            while current_day < active_days:
-                # Generate study days for this week
-                week_days = random.sample(range(7), min(weekly_frequency, 7))
-                for day in week_days:
-                    study_day = current_day + day
-                    if study_day < active_days:
-                        study_days.append(study_day)
-                current_day += 7
-            
-            study_days.sort()
+            # Session start times from the hour/weekday curves and the user's exam spikes
+            exam_dates = [date for course_id in self.user_enrollments.get(user_id, {})
+                          if (user_id, course_id) in self.enrollment_details
+                          for date in self._exam_dates(user_id, course_id)]
+            weekly_frequency = self.get_study_frequency(persona)
+            session_starts = self.activity_model.session_starts(weekly_frequency, active_days, exam_dates)
             
-            # Generate sessions and activities for each study day
-            self._generate_user_study_data(user, study_days)
-        
-        self.conn.commit()
+            # Generate sessions and activities
+            self._generate_user_study_data(user, session_starts, latest_end)
+            # All rows of this user are queued, safe to flush
+            self.sink.checkpoint()
+            progress.advance()
+        
+        self.sink.commit()
+        progress.finish()
         print("  ✓ Hoàn thành tạo dữ liệu hành vi\n")
     
-    def _generate_user_study_data(self, user: Dict, study_days: List[int]):
-        """Generate study data for a user"""
+    def _exam_dates(self, user_id: str, course_id: str) -> Tuple[datetime, datetime]:
+        """Midterm and final exam dates of an enrollment, shared by the activity spikes and
+        generate_course_grades: midterm halfway through the study span, final 1-3 days after it"""
+        details = self.enrollment_details[(user_id, course_id)]
+        if 'final_at' not in details:
+            enrolled_at = details['enrolled_at']
+            study_end = self.study_end.get(user_id, END_DATE)
+            course_duration = (study_end - enrolled_at).days
+            if course_duration < 7:
+                course_duration = 30  # Default 1 month if too short
+            details['midterm_at'] = enrolled_at + timedelta(days=int(course_duration * 0.5))
+            details['final_at'] = study_end + timedelta(days=random.randint(1, 3))
+        return details['midterm_at'], details['final_at']
+    
+    def _session_overrun(self) -> timedelta:
+        """Upper bound on how far activities run past their session's end: the last lesson
+        step starts just before it and may add a forum post and a full quiz attempt"""
+        lesson_minutes = max((lesson.get('estimated_minutes') or 10 for lesson in self.lessons), default=10)
+        questions = max((len(q) for q in self.questions_by_quiz.values()), default=0)
+        # 1.3 x lesson time (diligent), 2 min per question, a few minutes for the rest
+        return timedelta(minutes=lesson_minutes * 1.3 + questions * 2 + 10)
+    
+    def _generate_user_study_data(self, user: Dict, session_starts: List[datetime], latest_end: datetime):
+        """Generate study data for a user (session start times in chronological order,
+        sessions moved or dropped so that they end by latest_end)"""
         user_id = user['user_id']
         persona = user['persona']
         
@@ -504,48 +726,48 @@ class DataGenerator:
         if not hasattr(self, 'quiz_attempts_tracker'):
             self.quiz_attempts_tracker = {}
         
-        for day_offset in study_days:
-            study_date = START_DATE + timedelta(days=day_offset)
+        previous_end = None
+        for session_start in session_starts:
+            # A user has one session at a time: start after a short break
+            if previous_end is not None and session_start < previous_end:
+                session_start = previous_end + timedelta(minutes=random.randint(5, 30))
+            
+            # Session duration based on persona
+            if persona == PERSONA_DILIGENT:
+                duration_minutes = random.randint(30, 90)
+            elif persona == PERSONA_AVERAGE:
+                duration_minutes = random.randint(20, 60)
+            else:
+                duration_minutes = random.randint(10, 40)
             
-            # 1-2 sessions per day
-            num_sessions = 1 if random.random() < 0.7 else 2
+            session_end = session_start + timedelta(minutes=duration_minutes)
+            if session_end > latest_end:
+                # Late on the last day (exam spike, overlap shift): move the session back,
+                # or drop it and the later ones when it no longer fits after the previous one
+                session_end = latest_end
+                session_start = session_end - timedelta(minutes=duration_minutes)
+                if previous_end is not None and session_start < previous_end:
+                    break
+            session_id = self.ids.new(session_start)
             
-            for session_num in range(num_sessions):
-                # Generate session
-                session_id = str(uuid.uuid4())
-                session_start = study_date + timedelta(
-                    hours=random.randint(8, 20),
-                    minutes=random.randint(0, 59)
-                )
-                
-                # Session duration based on persona
-                if persona == PERSONA_DILIGENT:
-                    duration_minutes = random.randint(30, 90)
-                elif persona == PERSONA_AVERAGE:
-                    duration_minutes = random.randint(20, 60)
-                else:
-                    duration_minutes = random.randint(10, 40)
-                
-                session_end = session_start + timedelta(minutes=duration_minutes)
-                
-                # Insert session
-                self.cursor.execute("""
-                    INSERT INTO user_sessions (id, user_id, session_token, device_info, started_at, ended_at, is_active)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    session_id, user_id, str(uuid.uuid4()),
-                    Json({"browser": "Chrome", "os": "Windows", "device": "Desktop"}),
-                    session_start, session_end, False
-                ))
-                
-                # Generate activities in this session
-                self._generate_session_activities(
-                    user_id, session_id, session_start, session_end, persona,
-                    lessons_studied, completed_lessons
-                )
-                
-                # After main activities, maybe retry previous quizzes
-                self._maybe_retry_previous_quizzes(user_id, session_id, session_start, session_end, persona)
+            # Insert session
+            self.sink.write('user_sessions', (
+                'id', 'user_id', 'session_token', 'device_info', 'started_at', 'ended_at', 'is_active'
+            ), (
+                session_id, user_id, str(self.ids.new()),
+                {"browser": "Chrome", "os": "Windows", "device": "Desktop"},
+                session_start, session_end, False
+            ))
+            
+            # Generate activities in this session
+            self._generate_session_activities(
+                user_id, session_id, session_start, session_end, persona,
+                lessons_studied, completed_lessons
+            )
+            
+            # After main activities, maybe retry previous quizzes
+            self._maybe_retry_previous_quizzes(user_id, session_id, session_start, session_end, persona)
+            previous_end = session_end
     
     def _generate_session_activities(self, user_id: str, session_id: str, 
                                      session_start: datetime, session_end: datetime,
@@ -554,11 +776,10 @@ class DataGenerator:
         current_time = session_start
         
         # Select course: prioritize from enrollments, occasionally explore new courses
-        if user_id in self.user_enrollments and self.user_enrollments[user_id]:
+        if self.user_enrollments.get(user_id):
             # 90% of time, study enrolled courses
             if random.random() < 0.90:
-                enrolled_course_ids = self.user_enrollments[user_id]
-                course = next((c for c in self.courses if c['id'] in enrolled_course_ids), None)
+                course = self._choose_enrolled_course(user_id)
                 if not course:
                     course = random.choice(self.courses)
             else:
@@ -577,7 +798,7 @@ class DataGenerator:
         current_time += timedelta(seconds=random.randint(5, 30))
         
         # Select and study 1-3 lessons
-        course_modules = [m for m in self.modules if m['course_id'] == course['id']]
+        course_modules = self.modules_by_course.get(course['id'])
         if not course_modules:
             return
         
@@ -589,7 +810,7 @@ class DataGenerator:
             
             # Pick a lesson
             module = random.choice(course_modules)
-            module_lessons = [l for l in self.lessons if l['module_id'] == module['id']]
+            module_lessons = self.lessons_by_module.get(module['id'])
             if not module_lessons:
                 continue
             
@@ -645,9 +866,16 @@ class DataGenerator:
             
             lessons_studied.append(lesson_id)
             
+            # Maybe ask about the lesson in the forum
+            if random.random() < FORUM_THREAD_PROBABILITY[persona]:
+                current_time += timedelta(seconds=random.randint(30, 180))
+                post_id = self.ids.new(current_time)
+                self.forum_threads.append((post_id, lesson_id, course['id'], user_id, current_time))
+                self._log_activity(user_id, session_id, current_time, 'post', 'forum_post', post_id)
+            
             # Maybe take quiz after lesson
             if is_completed and random.random() < 0.5:  # Increase quiz probability
-                module_quiz = next((q for q in self.quizzes if q['module_id'] == module['id']), None)
+                module_quiz = self.quiz_by_module.get(module['id'])
                 if module_quiz:
                     # Track quiz attempts for this user/quiz combination
                     quiz_key = (user_id, module_quiz['id'])
@@ -755,18 +983,23 @@ class DataGenerator:
                       action_type: str, resource_type: str, resource_id: str,
                       duration_ms: int = None, metadata: dict = None):
         """Log activity"""
-        activity_id = str(uuid.uuid4())
-        if metadata is None:
-            metadata = {}
-        self.cursor.execute("""
-            INSERT INTO activity_logs (id, user_id, session_id, timestamp, action_type, resource_type, resource_id, duration_ms, metadata, client_info)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (activity_id, user_id, session_id, timestamp, action_type, resource_type, resource_id, duration_ms, Json(metadata), Json({})))
+        activity_id = self.ids.new(timestamp)
+        
+        course_id = self.course_id_by_resource.get(resource_id)
+        if course_id is not None:
+            key = (user_id, course_id)
+            last_time = self.last_activity_times.get(key)
+            if last_time is None or timestamp > last_time:
+                self.last_activity_times[key] = timestamp
+        self.sink.write('activity_logs', (
+            'id', 'user_id', 'session_id', 'timestamp', 'action_type', 'resource_type',
+            'resource_id', 'duration_ms', 'metadata', 'client_info'
+        ), (activity_id, user_id, session_id, timestamp, action_type, resource_type, resource_id, duration_ms, metadata, None))
     
     def _log_reading_behavior(self, user_id: str, lesson_id: str, session_id: str,
                                timestamp: datetime, duration_ms: int, persona: str):
         """Log reading behavior"""
-        log_id = str(uuid.uuid4())
+        log_id = self.ids.new(timestamp)
         
         if persona == PERSONA_DILIGENT:
             scroll_depth = random.randint(80, 100)
@@ -775,16 +1008,15 @@ class DataGenerator:
         else:
             scroll_depth = random.randint(20, 60)
         
-        self.cursor.execute("""
-            INSERT INTO reading_behavior_logs (id, user_id, lesson_id, session_id, timestamp, 
-                                                dwell_time_ms, scroll_depth_percent, action_type, metadata)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (log_id, user_id, lesson_id, session_id, timestamp, duration_ms * 1000, scroll_depth, 'reading', Json({})))
+        self.sink.write('reading_behavior_logs', (
+            'id', 'user_id', 'lesson_id', 'session_id', 'timestamp',
+            'dwell_time_ms', 'scroll_depth_percent', 'action_type', 'metadata'
+        ), (log_id, user_id, lesson_id, session_id, timestamp, duration_ms * 1000, scroll_depth, 'reading', None))
     
     def _log_interaction(self, user_id: str, lesson_id: str, session_id: str, 
                          timestamp: datetime, lesson_content_type: str = 'text'):
-        """Log interaction with meaningful metadata"""
-        log_id = str(uuid.uuid4())
+        """Log interaction with typed element columns and optional extras"""
+        log_id = self.ids.new(timestamp)
         
         # Determine element category based on lesson content type
         if lesson_content_type == 'video':
@@ -805,41 +1037,28 @@ class DataGenerator:
         # Select interaction type from available interactions
         interaction_type = random.choice(element_def['interactions'])
         
-        # Build metadata
-        metadata = {
-            'name': element_def['name'],
-            'type': element_def['type'],
-            'context': element_def['context']
-        }
+        # Hot fields go to typed columns (see log_metadata.py), JSONB keeps the element extras
+        extras = element_def['metadata_extras']() if 'metadata_extras' in element_def else None
+        interaction_count = random.randint(1, 5)
+        device_type = random.choice(DEVICE_TYPES)
         
-        # Add extra metadata specific to this element
-        if 'metadata_extras' in element_def:
-            extra_metadata = element_def['metadata_extras']()
-            metadata.update(extra_metadata)
-        
-        # Add common fields
-        metadata['interaction_count'] = random.randint(1, 5)
-        metadata['device_type'] = random.choice(['desktop', 'mobile', 'tablet'])
-        
-        self.cursor.execute("""
-            INSERT INTO interaction_logs (id, user_id, lesson_id, session_id, timestamp,
-                                          element_id, interaction_type, metadata)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (log_id, user_id, lesson_id, session_id, timestamp, 
-              element_id, interaction_type, Json(metadata)))
+        self.sink.write('interaction_logs', INTERACTION_LOG_COLUMNS, (
+            log_id, user_id, lesson_id, session_id, timestamp, element_id, interaction_type,
+            element_def['name'], element_def['type'], element_def['context'], device_type,
+            interaction_count, extras or None
+        ))
     
     def _log_lesson_progress(self, user_id: str, lesson_id: str, started_at: datetime,
                               completed_at: datetime, time_spent: int, is_completed: bool):
         """Log lesson progress"""
-        progress_id = str(uuid.uuid4())
+        progress_id = self.ids.new(started_at)
         progress_pct = 100 if is_completed else random.randint(30, 95)
         
-        self.cursor.execute("""
-            INSERT INTO lesson_progress (id, user_id, lesson_id, is_completed, progress_percentage,
-                                          time_spent_seconds, started_at, completed_at, last_position)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (progress_id, user_id, lesson_id, is_completed, progress_pct, time_spent,
-              started_at, completed_at if is_completed else None, Json({})))
+        self.sink.write('lesson_progress', (
+            'id', 'user_id', 'lesson_id', 'is_completed', 'progress_percentage',
+            'time_spent_seconds', 'started_at', 'completed_at', 'last_position'
+        ), (progress_id, user_id, lesson_id, is_completed, progress_pct, time_spent,
+            started_at, completed_at if is_completed else None, {}))
     
     def _generate_quiz_attempt(self, user_id: str, session_id: str, quiz: Dict,
                                  start_time: datetime, persona: str, attempt_number: int = 1,
@@ -848,7 +1067,7 @@ class DataGenerator:
         Generate quiz attempt with support for re-attempts
         Returns: (completed_at, score, max_score, is_passed)
         """
-        attempt_id = str(uuid.uuid4())
+        attempt_id = self.ids.new(start_time)
         quiz_id = quiz['id']
         
         # Start quiz (action_type='start')
@@ -856,7 +1075,7 @@ class DataGenerator:
         start_time += timedelta(seconds=random.randint(3, 15))
         
         # Get questions for this quiz
-        quiz_questions = [q for q in self.questions if q['quiz_id'] == quiz_id]
+        quiz_questions = self.questions_by_quiz.get(quiz_id)
         if not quiz_questions:
             return start_time, 0, 0, False
         
@@ -907,14 +1126,6 @@ class DataGenerator:
         
         completed_at = start_time + timedelta(seconds=time_spent)
         
-        # Insert quiz attempt FIRST (with initial score) to satisfy foreign key
-        self.cursor.execute("""
-            INSERT INTO quiz_attempts (id, user_id, quiz_id, attempt_number, score, max_score,
-                                        is_passed, started_at, completed_at, time_spent_seconds)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (attempt_id, user_id, quiz_id, attempt_number, score, max_score, is_passed,
-              start_time, completed_at, time_spent))
-        
         # Generate question responses with learning curve
         # This returns the ACTUAL score based on questions answered correctly
         actual_score = self._generate_question_responses_with_learning(
@@ -922,14 +1133,23 @@ class DataGenerator:
             time_per_question, score, max_score, attempt_number, persona
         )
         
-        # Update quiz attempt with ACTUAL score from question responses
+        # Insert quiz attempt with ACTUAL score from question responses
+        # (the sink flushes quiz_attempts before question_responses, so the foreign key holds)
         # Pass if actual_score >= 60% of max_score
         is_passed = actual_score >= (max_score * 0.6)
-        self.cursor.execute("""
-            UPDATE quiz_attempts 
-            SET score = %s, is_passed = %s
-            WHERE id = %s
-        """, (actual_score, is_passed, attempt_id))
+        self.sink.write('quiz_attempts', (
+            'id', 'user_id', 'quiz_id', 'attempt_number', 'score', 'max_score',
+            'is_passed', 'started_at', 'completed_at', 'time_spent_seconds'
+        ), (attempt_id, user_id, quiz_id, attempt_number, actual_score, max_score, is_passed,
+            start_time, completed_at, time_spent))
+        
+        # Track quiz performance per (user, course) for course grades
+        course_id = self.course_id_by_resource.get(quiz_id)
+        performance = self.quiz_performance.setdefault((user_id, course_id), [0.0, 0])
+        if max_score > 0:
+            performance[0] += actual_score / max_score
+        performance[1] += 1
+        self.validator.observe_quiz_attempt(actual_score, max_score)
         
         # Log complete action with metadata containing score and passed
         quiz_metadata = {
@@ -1034,15 +1254,14 @@ class DataGenerator:
                 user_answer = random.choice(wrong_answers)
                 points_earned = 0
             
-            response_id = str(uuid.uuid4())
             answered_at = start_time + timedelta(seconds=i * time_per_question)
+            response_id = self.ids.new(answered_at)
             
-            self.cursor.execute("""
-                INSERT INTO question_responses (id, attempt_id, question_id, user_answer,
-                                                 is_correct, points_earned, time_spent_seconds, answered_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (response_id, attempt_id, question_id, user_answer, is_correct,
-                  points_earned, time_per_question, answered_at))
+            self.sink.write('question_responses', (
+                'id', 'attempt_id', 'question_id', 'user_answer',
+                'is_correct', 'points_earned', 'time_spent_seconds', 'answered_at'
+            ), (response_id, attempt_id, question_id, user_answer, is_correct,
+                points_earned, time_per_question, answered_at))
             
             # Log quiz interaction flow (view -> hint? -> answer changes? -> submit)
             self._log_quiz_interaction_flow(user_id, attempt_id, question_id, answered_at, 
@@ -1064,10 +1283,12 @@ class DataGenerator:
         # Start from beginning of time allocated for this question
         question_start_time = answered_at - timedelta(seconds=time_per_question)
         current_time = question_start_time
+        # Compact mode: collect (timestamp, action, answer, time_spent_ms), write one row at the end
+        events = [] if self.compact_quiz_events else None
         
         # 1. Always start with VIEW action
         self._insert_quiz_log(user_id, attempt_id, question_id, current_time, 
-                             'view', None, None, 0, 0, False)
+                             'view', None, None, 0, 0, False, events)
         
         # Determine hint probability based on persona and correctness
         if persona == PERSONA_DILIGENT:
@@ -1091,7 +1312,7 @@ class DataGenerator:
             hint_used = True
             hint_time_spent = random.randint(2000, 8000)  # 2-8 seconds reading hint
             self._insert_quiz_log(user_id, attempt_id, question_id, current_time,
-                                 'hint_request', None, None, hint_time_spent, 0, True)
+                                 'hint_request', None, None, hint_time_spent, 0, True, events)
             current_time += timedelta(milliseconds=hint_time_spent)
         
         # 3. Answer selection (with possible changes)
@@ -1108,7 +1329,7 @@ class DataGenerator:
             time_to_first = random.randint(3000, 15000)
             self._insert_quiz_log(user_id, attempt_id, question_id, current_time,
                                  'answer', first_answer, False, time_to_first, 
-                                 answer_changes_count, hint_used)
+                                 answer_changes_count, hint_used, events)
             current_time += timedelta(milliseconds=time_to_first)
             
             # If 2 changes, add another wrong answer
@@ -1117,21 +1338,21 @@ class DataGenerator:
                 time_to_second = random.randint(5000, 20000)
                 self._insert_quiz_log(user_id, attempt_id, question_id, current_time,
                                      'answer', second_answer, False, time_to_second,
-                                     answer_changes_count, hint_used)
+                                     answer_changes_count, hint_used, events)
                 current_time += timedelta(milliseconds=time_to_second)
             
             # Final answer (could be correct or wrong depending on is_correct)
             time_to_final = random.randint(3000, 12000)
             self._insert_quiz_log(user_id, attempt_id, question_id, current_time,
                                  'answer', final_answer, is_correct, time_to_final,
-                                 answer_changes_count, hint_used)
+                                 answer_changes_count, hint_used, events)
             current_time += timedelta(milliseconds=time_to_final)
         else:
             # User picks answer directly (no change)
             time_to_answer = random.randint(5000, 30000)
             self._insert_quiz_log(user_id, attempt_id, question_id, current_time,
                                  'answer', final_answer, is_correct, time_to_answer,
-                                 0, hint_used)
+                                 0, hint_used, events)
             current_time += timedelta(milliseconds=time_to_answer)
         
         # 4. Always end with SUBMIT action
@@ -1139,27 +1360,118 @@ class DataGenerator:
         current_time += timedelta(milliseconds=submit_delay)
         self._insert_quiz_log(user_id, attempt_id, question_id, current_time,
                              'submit', final_answer, is_correct, submit_delay,
-                             answer_changes_count, hint_used)
+                             answer_changes_count, hint_used, events)
+        
+        if events is not None:
+            self._insert_quiz_question_events(user_id, attempt_id, question_id, events,
+                                              is_correct, answer_changes_count, hint_used)
     
     def _insert_quiz_log(self, user_id: str, attempt_id: str, question_id: str,
                         timestamp: datetime, action_type: str, answer_given: str,
                         is_correct: bool, time_spent_ms: int, answer_changes_count: int,
-                        hint_used: bool):
-        """Insert a single quiz interaction log entry"""
-        log_id = str(uuid.uuid4())
+                        hint_used: bool, events: list = None):
+        """Insert a single quiz interaction log entry (or queue it in `events` for compact mode)"""
+        if events is not None:
+            events.append((timestamp, action_type, answer_given, time_spent_ms))
+            return
         
-        metadata = {
-            'action': action_type,
-            'timestamp_iso': timestamp.isoformat()
+        # No metadata: action and timestamp are already columns of the row
+        self.sink.write('quiz_interaction_logs', (
+            'id', 'user_id', 'attempt_id', 'question_id', 'timestamp',
+            'action_type', 'answer_given', 'is_correct', 'time_spent_ms',
+            'answer_changes_count', 'hint_used'
+        ), (self.ids.new(timestamp), user_id, attempt_id, question_id, timestamp, action_type,
+            answer_given, is_correct, time_spent_ms, answer_changes_count, hint_used))
+    
+    def _insert_quiz_question_events(self, user_id: str, attempt_id: str, question_id: str,
+                                     events: List[tuple], is_correct: bool,
+                                     answer_changes_count: int, hint_used: bool):
+        """Insert one compact row holding all events of a question
+        
+        Per-event is_correct / hint_used / answer_changes_count are derived from the
+        question-level values by the quiz_interaction_events view.
+        """
+        started_at = events[0][0]
+        one_ms = timedelta(milliseconds=1)
+        self.sink.write('quiz_question_events', QUIZ_EVENT_COLUMNS, (
+            self.ids.new(started_at), user_id, attempt_id, question_id, started_at,
+            [QUIZ_EVENT_CODES[action] for _, action, _, _ in events],
+            [(timestamp - started_at) // one_ms for timestamp, _, _, _ in events],
+            [spent for _, _, _, spent in events],
+            [answer for _, _, answer, _ in events],
+            is_correct, answer_changes_count, hint_used
+        ))
+    
+    def generate_forum_activity(self):
+        """Expand the threads opened during sessions with replies and reactions
+        
+        Replies and reactions come from students enrolled in the thread's course,
+        weighted by persona; their counts are heavy-tailed (Pareto).
+        """
+        print("💬 Tạo dữ liệu diễn đàn (forum)...")
+        progress = ProgressReporter("Forum", total=len(self.forum_threads), unit='threads',
+                                    interval=self.progress_interval, counts=self.sink.row_counts)
+        
+        # Students of each course with cumulative persona weights, built once
+        students_by_course = {}
+        for user_id, courses in self.user_enrollments.items():
+            for course_id in courses:
+                students_by_course.setdefault(course_id, []).append(user_id)
+        choosers = {
+            course_id: (students, list(itertools.accumulate(
+                FORUM_ACTIVITY_WEIGHT[self.personas[u]] for u in students)))
+            for course_id, students in students_by_course.items()
         }
         
-        self.cursor.execute("""
-            INSERT INTO quiz_interaction_logs (id, user_id, attempt_id, question_id, timestamp,
-                                                action_type, answer_given, is_correct, time_spent_ms,
-                                                answer_changes_count, hint_used, metadata)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (log_id, user_id, attempt_id, question_id, timestamp, action_type,
-              answer_given, is_correct, time_spent_ms, answer_changes_count, hint_used, Json(metadata)))
+        lesson_titles = {lesson['id']: lesson['title'] for lesson in self.lessons}
+        for root_id, lesson_id, course_id, author_id, created_at in self.forum_threads:
+            students, cum_weights = choosers.get(course_id) or ([author_id], [1.0])
+            num_replies = min(FORUM_MAX_REPLIES, int(random.paretovariate(FORUM_REPLY_ALPHA)) - 1)
+            content = random.choice(FORUM_QUESTIONS).format(title=lesson_titles.get(lesson_id, ''))
+            is_pinned = num_replies >= 20 and random.random() < 0.3
+            self.sink.write('forum_posts', FORUM_POST_COLUMNS,
+                            (root_id, lesson_id, author_id, None, content, is_pinned, created_at, created_at))
+            posts = [(root_id, author_id, created_at)]
+            
+            # Replies arrive with exponential gaps (mean 6 hours) until the period ends
+            reply_time = created_at
+            for _ in range(num_replies):
+                reply_time += timedelta(seconds=random.expovariate(1 / 21600))
+                if reply_time >= END_DATE:
+                    break
+                # Most replies answer the question, some answer another reply
+                parent_id = root_id if random.random() < 0.8 else random.choice(posts)[0]
+                reply_id = self.ids.new(reply_time)
+                reply_author = random.choices(students, cum_weights=cum_weights)[0]
+                self.sink.write('forum_posts', FORUM_POST_COLUMNS, (
+                    reply_id, lesson_id, reply_author, parent_id, random.choice(FORUM_REPLIES),
+                    False, reply_time, reply_time
+                ))
+                posts.append((reply_id, reply_author, reply_time))
+            
+            # Reactions per post; the question collects more as the thread grows
+            for i, (post_id, post_author, post_time) in enumerate(posts):
+                num_reactions = int(random.paretovariate(FORUM_REACTION_ALPHA)) - 1
+                if i == 0:
+                    num_reactions += len(posts) // 4
+                reactors = random.sample(students, min(num_reactions, len(students)))
+                for reactor in reactors:
+                    if reactor == post_author:
+                        continue
+                    reaction_time = post_time + timedelta(seconds=random.expovariate(1 / 43200))
+                    if reaction_time >= END_DATE:
+                        continue
+                    self.sink.write('forum_reactions', FORUM_REACTION_COLUMNS, (
+                        self.ids.new(reaction_time), post_id, reactor,
+                        random.choices(FORUM_REACTION_TYPES, FORUM_REACTION_WEIGHTS)[0], reaction_time
+                    ))
+            # Posts of the thread precede its reactions, safe to flush
+            self.sink.checkpoint()
+            progress.advance()
+        
+        self.sink.commit()
+        progress.finish()
+        print(f"  ✓ Đã tạo {len(self.forum_threads)} chủ đề thảo luận\n")
     
     def generate_course_grades(self):
         """Generate course grades (assignments, midterm, final) with correlation to quiz performance"""
@@ -1204,6 +1516,7 @@ class DataGenerator:
                 # Generate assignments (2-3)
                 num_assignments = random.randint(2, 3)
                 assignment_dates = []
+                enrollment_scores = []
                 
                 for i in range(num_assignments):
                     # Distribute assignments throughout the course
@@ -1218,65 +1531,57 @@ class DataGenerator:
                     if persona == PERSONA_DROPOUT and i >= 1 and random.random() < 0.5:
                         score = 0.0  # Didn't submit
                     
-                    grade_id = str(uuid.uuid4())
-                    self.cursor.execute("""
-                        INSERT INTO course_grades (id, user_id, course_id, assessment_type, title,
-                                                   score, weight, graded_at)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (grade_id, user_id, course_id, 'assignment', f'Assignment {i+1}',
-                          score, 0.20, graded_at))
+                    grade_id = self.ids.new(graded_at)
+                    self.sink.write('course_grades', COURSE_GRADE_COLUMNS,
+                                    (grade_id, user_id, course_id, 'assignment', f'Assignment {i+1}',
+                                     score, 0.20, graded_at))
                     grade_count += 1
+                    enrollment_scores.append(score)
+                    self.validator.observe_grade('assignment', persona, score, graded_at, enrolled_at)
                 
-                # Generate midterm (at ~50% of course)
-                midterm_date = enrolled_at + timedelta(days=int(course_duration * 0.5))
+                # Midterm (~50% of the study span) and final: the dates the activity spikes used
+                midterm_date, final_date = self._exam_dates(user_id, course_id)
                 midterm_score = self._generate_grade_score(persona, 'midterm', avg_quiz_score, is_outlier)
                 
                 # Dropout might skip midterm
                 if persona == PERSONA_DROPOUT and random.random() < 0.4:
                     midterm_score = 0.0
                 
-                grade_id = str(uuid.uuid4())
-                self.cursor.execute("""
-                    INSERT INTO course_grades (id, user_id, course_id, assessment_type, title,
-                                               score, weight, graded_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (grade_id, user_id, course_id, 'midterm', 'Midterm Exam',
-                      midterm_score, 0.30, midterm_date))
+                grade_id = self.ids.new(midterm_date)
+                self.sink.write('course_grades', COURSE_GRADE_COLUMNS,
+                                (grade_id, user_id, course_id, 'midterm', 'Midterm Exam',
+                                 midterm_score, 0.30, midterm_date))
                 grade_count += 1
+                enrollment_scores.append(midterm_score)
+                self.validator.observe_grade('midterm', persona, midterm_score, midterm_date, enrolled_at)
                 
-                # Generate final exam (1-3 days after last activity)
-                final_date = last_activity_time + timedelta(days=random.randint(1, 3))
+                # Final exam (1-3 days after the study span)
                 final_score = self._generate_grade_score(persona, 'final', avg_quiz_score, is_outlier)
                 
                 # Dropout usually fails final
                 if persona == PERSONA_DROPOUT and random.random() < 0.6:
                     final_score = random.uniform(0.0, 3.0)
                 
-                grade_id = str(uuid.uuid4())
-                self.cursor.execute("""
-                    INSERT INTO course_grades (id, user_id, course_id, assessment_type, title,
-                                               score, weight, graded_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (grade_id, user_id, course_id, 'final', 'Final Exam',
-                      final_score, 0.50, final_date))
+                grade_id = self.ids.new(final_date)
+                self.sink.write('course_grades', COURSE_GRADE_COLUMNS,
+                                (grade_id, user_id, course_id, 'final', 'Final Exam',
+                                 final_score, 0.50, final_date))
                 grade_count += 1
+                enrollment_scores.append(final_score)
+                self.validator.observe_grade('final', persona, final_score, final_date, enrolled_at)
+                
+                self.validator.observe_enrollment(
+                    avg_quiz_score, sum(enrollment_scores) / len(enrollment_scores), is_outlier
+                )
         
-        self.conn.commit()
+        self.sink.commit()
         print(f"  ✓ Đã tạo {grade_count} đầu điểm (grades)")
     
     def _get_user_course_quiz_performance(self, user_id: str, course_id: str) -> float:
         """Calculate average quiz score for a user in a course (0.0-10.0 scale)"""
-        # Get all quiz attempts for this user in this course
-        self.cursor.execute("""
-            SELECT qa.score, qa.max_score
-            FROM quiz_attempts qa
-            JOIN quizzes q ON qa.quiz_id = q.id
-            JOIN modules m ON q.module_id = m.id
-            WHERE qa.user_id = %s AND m.course_id = %s
-        """, (user_id, course_id))
-        
-        results = self.cursor.fetchall()
-        if not results:
+        # Quiz attempts are tracked in memory while they are generated
+        total_percentage, attempts = self.quiz_performance.get((user_id, course_id), (0.0, 0))
+        if not attempts:
             # No quiz data, return default based on persona
             persona = self.personas[user_id]
             if persona == PERSONA_DILIGENT:
@@ -1289,34 +1594,13 @@ class DataGenerator:
                 return 3.0
         
         # Calculate average percentage, then convert to 0-10 scale
-        total_percentage = 0
-        for score, max_score in results:
-            if max_score > 0:
-                total_percentage += (score / max_score)
-        
-        avg_percentage = total_percentage / len(results)
+        avg_percentage = total_percentage / attempts
         return round(avg_percentage * 10, 2)  # Convert to 0-10 scale
     
     def _get_last_activity_time(self, user_id: str, course_id: str) -> datetime:
         """Get the last activity timestamp for a user in a course"""
-        # Check activity_logs
-        self.cursor.execute("""
-            SELECT MAX(timestamp) FROM activity_logs
-            WHERE user_id = %s AND (
-                resource_id IN (SELECT id FROM modules WHERE course_id = %s)
-                OR resource_id IN (SELECT id FROM lessons WHERE module_id IN (SELECT id FROM modules WHERE course_id = %s))
-                OR resource_id IN (SELECT id FROM quizzes WHERE module_id IN (SELECT id FROM modules WHERE course_id = %s))
-            )
-        """, (user_id, course_id, course_id, course_id))
-        
-        result = self.cursor.fetchone()
-        last_time = result[0] if result and result[0] else None
-        
-        # Remove timezone info if present to match START_DATE (timezone-naive)
-        if last_time and hasattr(last_time, 'tzinfo') and last_time.tzinfo:
-            last_time = last_time.replace(tzinfo=None)
-        
-        return last_time
+        # Tracked in _log_activity for module/lesson/quiz resources of the course
+        return self.last_activity_times.get((user_id, course_id))
     
     def _generate_grade_score(self, persona: str, assessment_type: str, quiz_avg: float, is_outlier: bool) -> float:
         """Generate a grade score correlated with persona and quiz performance"""
@@ -1358,55 +1642,103 @@ class DataGenerator:
         # Round to 1 decimal
         return round(score, 1)
     
-    def print_statistics(self):
-        """Print data statistics"""
+    def print_statistics(self, exact: bool = False):
+        """Print data statistics (catalog estimates after ANALYZE, or exact parallel counts)"""
         print("\n" + "=" * 60)
         print("📊 THỐNG KÊ DỮ LIỆU ĐÃ TẠO")
         print("=" * 60)
         
-        tables = [
-            'profiles', 'user_roles', 'enrollments', 'user_sessions',
-            'activity_logs', 'lesson_progress', 'quiz_attempts', 'question_responses',
-            'quiz_interaction_logs', 'reading_behavior_logs', 'interaction_logs', 'course_grades'
-        ]
-        
-        for table in tables:
-            self.cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            count = self.cursor.fetchone()[0]
-            print(f"  {table:30s}: {count:6d} bản ghi")
+        stats = collect_table_stats(self.cursor, default_registry().generated_tables(), exact=exact,
+                                    analyze=not exact, db_config=self.db_config)
+        print_table_stats(stats, exact)
         
         print("=" * 60)
 
 
 def main():
     """Main function"""
-    DB_CONFIG = {
-        'host': os.getenv('LOCAL_DB_HOST', 'localhost'),
-        'port': int(os.getenv('LOCAL_DB_PORT', 5432)),
-        'database': os.getenv('LOCAL_DB_NAME', 'Lovable'),
-        'user': os.getenv('LOCAL_DB_USER', 'postgres'),
-        'password': os.getenv('LOCAL_DB_PASSWORD'),
-        'schema': os.getenv('LOCAL_DB_SCHEMA', 'transform')
-    }
+    parser = argparse.ArgumentParser(description='Generate simulated learning behavior data')
+    parser.add_argument('--students', type=int, default=20, help='Number of students to generate')
+    parser.add_argument('--fast-load', action='store_true',
+                        help='Write generated tables as UNLOGGED with more work_mem (data is lost on a server crash)')
+    parser.add_argument('--relog', action='store_true',
+                        help='With --fast-load: switch the tables back to LOGGED at the end')
+    parser.add_argument('--compact-quiz-events', action='store_true',
+                        help='Store quiz interactions one row per question in quiz_question_events '
+                             '(read them back through the quiz_interaction_events view)')
+    parser.add_argument('--uuid-mode', choices=UUID_MODES, default='v4',
+                        help='v4 = random ids, v7 = ids prefixed with the event timestamp (better index locality)')
+    parser.add_argument('--seed', type=int, help='Seed for a reproducible run (data and ids)')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='Seconds between progress lines')
+    parser.add_argument('--metrics', help='Write per-table/per-phase metrics (.prom = Prometheus text, otherwise JSON)')
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'], help='Profile the behavior phase')
+    parser.add_argument('--exact-counts', action='store_true',
+                        help='Final statistics with exact COUNT(*) (parallel) instead of catalog estimates')
+    parser.add_argument('--activity-profile',
+                        help='JSON file overriding the hour/weekday activity curves and exam spikes (see activity_model.py)')
+    parser.add_argument('--profile-output', help='Profile file (default: behavior.prof / behavior.html)')
+    args = parser.parse_args()
+    
+    DB_CONFIG = get_db_config()
     
     print("=" * 60)
     print(" TẠO DỮ LIỆU GIẢ LẬP HÀNH VI HỌC TẬP ".center(60, "="))
     print("=" * 60)
     print(f"Thời gian: {START_DATE.date()} đến {END_DATE.date()}")
-    print(f"Số sinh viên: 20")
+    print(f"Số sinh viên: {args.students}")
     print("=" * 60)
     
-    generator = DataGenerator(DB_CONFIG)
+    if args.seed is not None:
+        random.seed(args.seed)
+    instrumentation = Instrumentation()
+    generator = DataGenerator(DB_CONFIG, instrumentation=instrumentation,
+                              ids=IdGenerator(args.uuid_mode, args.seed))
+    generator.progress_interval = args.progress_interval
+    generator.fast_load = args.fast_load
+    generator.compact_quiz_events = args.compact_quiz_events
+    if args.activity_profile:
+        generator.activity_model = ActivityModel.from_profile(START_DATE, TOTAL_DAYS,
+                                                              load_activity_profile(args.activity_profile))
+    peak_hours = sorted(range(24), key=generator.activity_model.hourly_share().__getitem__, reverse=True)[:3]
+    print(f"Giờ cao điểm: {', '.join(f'{h}h' for h in sorted(peak_hours))} | "
+          f"Cao điểm thi: {generator.activity_model.exam_ramp_days} ngày trước giữa kỳ/cuối kỳ của từng enrollment")
+    profile_output = args.profile_output or ('behavior.html' if args.profile == 'pyinstrument' else 'behavior.prof')
     
     try:
         generator.connect()
-        generator.clear_behavior_data()
-        generator.load_existing_content()
-        generator.generate_users(20)
-        generator.generate_enrollments()
-        generator.generate_learning_behavior()
-        generator.generate_course_grades()
-        generator.print_statistics()
+        with instrumentation.phase('setup'):
+            generator.clear_behavior_data()
+            if args.fast_load:
+                # Tables are empty now, so the rewrite is cheap
+                generator.set_tables_logged(False)
+            features_paused = generator.pause_feature_triggers()
+            generator.load_existing_content()
+        try:
+            with instrumentation.phase('users'):
+                generator.generate_users(args.students)
+            with instrumentation.phase('enrollments'):
+                generator.generate_enrollments()
+            with instrumentation.phase('behavior'), instrumentation.profile(args.profile, profile_output):
+                generator.generate_learning_behavior()
+            with instrumentation.phase('forum'):
+                generator.generate_forum_activity()
+            with instrumentation.phase('grades'):
+                generator.generate_course_grades()
+        finally:
+            if features_paused:
+                with instrumentation.phase('features'):
+                    generator.refresh_features()
+        if args.fast_load and args.relog:
+            with instrumentation.phase('relog'):
+                generator.set_tables_logged(True)
+        generator.print_statistics(exact=args.exact_counts)
+        instrumentation.print_summary()
+        if args.metrics:
+            instrumentation.write(args.metrics)
+            print(f"  ✓ Đã ghi metrics: {args.metrics}")
+        generator.validator.print_summary()
+        generator.validator.write_summary(VALIDATION_SUMMARY_FILE)
+        print(f"  ✓ Đã ghi validation summary: {VALIDATION_SUMMARY_FILE}")
         
         print("\n✓ HOÀN THÀNH!\n")
         
@@ -1,12 +1,204 @@
+import argparse
+import gzip
+import hashlib
+import io
 import json
-import psycopg2
-from psycopg2.extras import Json
-from typing import Dict, List, Any
+import lzma
+import pickle
+import queue
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Iterator, Tuple
 import os
-from dotenv import load_dotenv
+from db import get_db_config, connect as db_connect
+from progress import ProgressReporter
+from ids import v7_from_id
+from log_metadata import SLIM_TABLES, slim_record
+from table_registry import TableRegistry, default_registry
+from copy_encoder import CopyEncoder, CopyStream
+from refresh_features import set_feature_triggers
+from sanitize import Sanitizer, load_rules
+from table_stats import collect as collect_table_stats, print_table_stats
 
-# Load environment variables
-load_dotenv()
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Leaf log tables (no foreign key points at them): their ids can be re-keyed safely
+LOG_TABLES = default_registry().log_tables()
+
+# Staged COPY data of one table stays in memory up to this size, then goes to disk
+UPSERT_SPOOL_BYTES = 64 * 1024 * 1024
+# Bytes handed to the server per COPY read
+COPY_READ_SIZE = 256 * 1024
+
+# Magic bytes of supported compressed formats
+COMPRESSION_MAGIC = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+    (b'\xfd7zXZ\x00', 'xz'),
+]
+
+
+class ThreadedReader(io.RawIOBase):
+    """Read a (decompressing) stream in a background thread, overlapping with parsing"""
+    
+    def __init__(self, stream, chunk_size: int = 1 << 20, max_chunks: int = 8):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._buffer = b''
+        self._eof = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+    
+    def _pump(self):
+        try:
+            while not self._stop.is_set():
+                chunk = self.stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                self._queue.put(chunk)
+            self._queue.put(None)
+        except Exception as e:
+            self._queue.put(e)
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, b) -> int:
+        while not self._buffer and not self._eof:
+            chunk = self._queue.get()
+            if chunk is None:
+                self._eof = True
+            elif isinstance(chunk, Exception):
+                raise chunk
+            else:
+                self._buffer = chunk
+        if not self._buffer:
+            return 0
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+    
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            # Unblock the producer if it is waiting on a full queue
+            while self._thread.is_alive():
+                try:
+                    self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self.stream.close()
+        super().close()
+
+
+def open_export_file(file_path: str, threaded: bool = True):
+    """Open an export file as a binary stream, decompressing .gz/.zst/.xz transparently"""
+    return decompress_stream(open(file_path, 'rb'), threaded)
+
+
+def decompress_stream(raw, threaded: bool = True):
+    """Wrap an open binary file, decompressing it if it starts with a known magic"""
+    magic = raw.read(6)
+    raw.seek(0)
+    
+    compression = next((name for prefix, name in COMPRESSION_MAGIC if magic.startswith(prefix)), None)
+    if compression is None:
+        return raw
+    
+    if compression == 'gzip':
+        stream = gzip.GzipFile(fileobj=raw)
+    elif compression == 'xz':
+        stream = lzma.LZMAFile(raw)
+    else:
+        if zstandard is None:
+            raw.close()
+            raise RuntimeError("Cần cài zstandard để đọc file .zst: pip install zstandard")
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    
+    if threaded:
+        return io.BufferedReader(ThreadedReader(stream), buffer_size=1 << 20)
+    return stream
+
+
+def iter_export_records(stream) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (table_name, record) pairs from an export, streaming when ijson is installed"""
+    if ijson is None:
+        data = json.load(io.TextIOWrapper(stream, encoding='utf-8'))
+        for table_name, records in data.get('tables', {}).items():
+            for record in records:
+                yield table_name, record
+        return
+    
+    table_name = None
+    item_prefix = None
+    builder = None
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == item_prefix and event == 'end_map':
+                yield table_name, builder.value
+                builder = None
+        elif prefix == 'tables' and event == 'map_key':
+            table_name = value
+            item_prefix = f'tables.{value}.item'
+        elif prefix == item_prefix and event == 'start_map':
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+
+
+def group_by_table(records: Iterator[Tuple[str, Dict[str, Any]]]) -> Iterator[Tuple[str, Iterator[Dict[str, Any]]]]:
+    """Group consecutive (table_name, record) pairs into (table_name, records) streams"""
+    pending = next(records, None)
+    while pending is not None:
+        table_name = pending[0]
+        
+        def table_records():
+            nonlocal pending
+            while pending is not None and pending[0] == table_name:
+                yield pending[1]
+                pending = next(records, None)
+        
+        group = table_records()
+        yield table_name, group
+        # Drain whatever the consumer did not read
+        for _ in group:
+            pass
+
+
+def _chain_first(first, rest: Iterator):
+    yield first
+    yield from rest
+
+
+class _SpooledTable:
+    """Records of a table that arrived before its turn, kept on disk"""
+    
+    def __init__(self, records: Iterable[Dict[str, Any]]):
+        self.file = tempfile.TemporaryFile()
+        for record in records:
+            pickle.dump(record, self.file, pickle.HIGHEST_PROTOCOL)
+    
+    def __iter__(self):
+        self.file.seek(0)
+        try:
+            while True:
+                yield pickle.load(self.file)
+        except EOFError:
+            pass
+        finally:
+            self.file.close()
 
 class PostgresImporter:
     """Import JSON data into PostgreSQL database"""
@@ -15,29 +207,41 @@ class PostgresImporter:
         self.db_config = db_config
         self.conn = None
         self.cursor = None
+        self.progress = None
+        self.progress_interval = 5.0
+        self.rows_imported = {}  # {table: rows sent}
+        self.v7_log_ids = False
+        # Merge into existing rows instead of INSERT ... ON CONFLICT DO NOTHING (upsert_data)
+        self.upsert = False
+        self.skip_unchanged = False
+        self.source_file = None
+        # Rewrites URLs, tokens, ... before loading (sanitize.Sanitizer), None = load as exported
+        self.sanitizer = None
+        # Tables of the target schema (columns, types, FK order), read once per connection
+        self.registry = None
         
     def connect(self):
         """Establish database connection"""
         try:
-            self.conn = psycopg2.connect(
-                host=self.db_config.get('host'),
-                port=self.db_config.get('port'),
-                database=self.db_config.get('database'),
-                user=self.db_config.get('user'),
-                password=self.db_config.get('password')
-            )
+            # search_path and bulk settings are applied by db.connect
+            self.conn = db_connect(self.db_config, bulk=True)
             self.cursor = self.conn.cursor()
-            
-            # Set search_path to use specified schema
             schema = self.db_config.get('schema', 'public')
-            self.cursor.execute(f"SET search_path TO {schema}, public")
-            self.conn.commit()
+            self.load_registry()
             
             print(f"✓ Kết nối database thành công! (Schema: {schema})")
         except Exception as e:
             print(f"✗ Lỗi kết nối database: {e}")
             raise
     
+    def load_registry(self):
+        """(Re)read the table definitions of the schema unqualified names resolve to
+        (create_schema.sql sets its own search_path)"""
+        self.cursor.execute("SELECT current_schema()")
+        schema = self.cursor.fetchone()[0] or self.db_config.get('schema', 'public')
+        self.registry = TableRegistry.from_database(self.cursor, schema)
+        self.conn.commit()
+    
     def disconnect(self):
         """Close database connection"""
         if self.cursor:
@@ -47,10 +251,10 @@ class PostgresImporter:
             print("✓ Đã đóng kết nối database")
     
     def load_json_file(self, file_path: str) -> Dict:
-        """Load JSON file"""
+        """Load JSON file (plain or .gz/.zst/.xz compressed)"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open_export_file(file_path) as f:
+                data = json.load(io.TextIOWrapper(f, encoding='utf-8'))
             print(f"✓ Đã đọc file JSON: {file_path}")
             return data
         except Exception as e:
@@ -72,117 +276,324 @@ class PostgresImporter:
             
             self.cursor.execute(schema_sql)
             self.conn.commit()
+            self.load_registry()
             print("✓ Đã tạo các bảng thành công!")
         except Exception as e:
             print(f"✗ Lỗi tạo schema: {e}")
             self.conn.rollback()
             raise
     
-    def insert_data(self, table_name: str, records: List[Dict[str, Any]]):
-        """Insert data into a table"""
-        if not records:
+    def insert_data(self, table_name: str, records: Iterable[Dict[str, Any]]):
+        """Insert data into a table (records may be any iterable, streamed through COPY)
+        
+        An empty table is loaded with COPY directly; otherwise rows are staged and inserted
+        with ON CONFLICT (id) DO NOTHING, so existing rows are kept.
+        """
+        if self.upsert:
+            return self.upsert_data(table_name, records)
+        info = self.registry[table_name]
+        records = self._transform(info, records)
+        first = next(records, None)
+        if first is None:
             print(f"  → Bảng {table_name}: Không có dữ liệu")
             return
         
         try:
-            columns = list(records[0].keys())
-            placeholders = ', '.join(['%s'] * len(columns))
+            columns = self._record_columns(info, first)
             columns_str = ', '.join(columns)
+            encoder = CopyEncoder(columns, info.columns)
             
-            query = f"""
-                INSERT INTO {table_name} ({columns_str})
-                VALUES ({placeholders})
-                ON CONFLICT (id) DO NOTHING
-            """
-            
-            inserted_count = 0
-            for record in records:
-                values = []
-                for col in columns:
-                    value = record.get(col)
-                    if isinstance(value, (dict, list)):
-                        value = Json(value)
-                    values.append(value)
-                
-                self.cursor.execute(query, values)
-                inserted_count += 1
+            self.cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table_name})")
+            if self.cursor.fetchone()[0]:
+                self.cursor.execute(f"CREATE TEMP TABLE import_stage (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP")
+                target = 'import_stage'
+            else:
+                target = table_name
+            stream = CopyStream(encoder, _chain_first(first, records), lambda n: self._count_rows(table_name, n))
+            self.cursor.copy_expert(encoder.copy_sql(target), stream, size=COPY_READ_SIZE)
+            if target != table_name:
+                self.cursor.execute(f"""
+                    INSERT INTO {table_name} ({columns_str})
+                    SELECT {columns_str} FROM import_stage
+                    ON CONFLICT (id) DO NOTHING
+                """)
             
             self.conn.commit()
-            print(f"  ✓ Bảng {table_name}: Đã insert {inserted_count}/{len(records)} bản ghi")
+            print(f"  ✓ Bảng {table_name}: Đã insert {stream.rows} bản ghi")
             
         except Exception as e:
             print(f"  ✗ Lỗi insert vào bảng {table_name}: {e}")
             self.conn.rollback()
             raise
     
+    def upsert_data(self, table_name: str, records: Iterable[Dict[str, Any]]):
+        """Merge records into a table: COPY into a staging table, then insert new rows and
+        update only the rows whose content differs (unchanged rows cost no write)
+        
+        The COPY payload doubles as the table's content checksum, hashed while it is spooled;
+        with skip_unchanged a table whose checksum matches the last import and that has not
+        been written since (_write_token) is not sent to the server at all.
+        """
+        info = self.registry[table_name]
+        records = self._transform(info, records)
+        first = next(records, None)
+        if first is None:
+            print(f"  → Bảng {table_name}: Không có dữ liệu")
+            return
+        
+        columns = self._record_columns(info, first)
+        encoder = CopyEncoder(columns, info.columns)
+        digest = hashlib.sha256(('\t'.join(columns) + ('\tbinary' if encoder.binary else '')).encode('utf-8'))
+        spool = tempfile.SpooledTemporaryFile(max_size=UPSERT_SPOOL_BYTES)
+        spool.write(encoder.header)
+        row_count = 0
+        for data, count in encoder.chunks(_chain_first(first, records)):
+            digest.update(data)
+            spool.write(data)
+            row_count += count
+            self._count_rows(table_name, count)
+        spool.write(encoder.trailer)
+        checksum = digest.hexdigest()
+        
+        try:
+            relfilenode, write_count = self._write_token(table_name)
+            if self.skip_unchanged:
+                self.cursor.execute("SELECT checksum, relfilenode, write_count FROM import_checksums WHERE table_name = %s",
+                                    (table_name,))
+                last = self.cursor.fetchone()
+                if last and tuple(last) == (checksum, relfilenode, write_count):
+                    self.conn.rollback()
+                    print(f"  ⏭️  Bảng {table_name}: Không đổi so với lần import trước, bỏ qua {row_count} bản ghi")
+                    return
+            
+            columns_str = ', '.join(columns)
+            self.cursor.execute(f"CREATE TEMP TABLE import_stage (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP")
+            spool.seek(0)
+            self.cursor.copy_expert(encoder.copy_sql('import_stage'), spool, size=COPY_READ_SIZE)
+            
+            updates = [col for col in columns if col != 'id']
+            if updates:
+                on_conflict = (
+                    f"DO UPDATE SET {', '.join(f'{col} = EXCLUDED.{col}' for col in updates)} "
+                    f"WHERE ({', '.join(f'{table_name}.{col}' for col in updates)}) "
+                    f"IS DISTINCT FROM ({', '.join(f'EXCLUDED.{col}' for col in updates)})"
+                )
+            else:
+                on_conflict = "DO NOTHING"
+            # DISTINCT ON: a row may not be updated twice by one statement
+            self.cursor.execute(f"""
+                WITH merged AS (
+                    INSERT INTO {table_name} ({columns_str})
+                    SELECT DISTINCT ON (id) {columns_str} FROM import_stage ORDER BY id
+                    ON CONFLICT (id) {on_conflict}
+                    RETURNING xmax = 0 AS inserted
+                )
+                SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM merged
+            """)
+            inserted, updated = self.cursor.fetchone()
+            
+            # The counters of this transaction reach pg_stat after commit: add them up front
+            self.cursor.execute("""
+                INSERT INTO import_checksums (table_name, checksum, row_count, relfilenode, write_count,
+                                              source_file, imported_at)
+                VALUES (%s, %s, %s, %s, %s, %s, NOW())
+                ON CONFLICT (table_name) DO UPDATE
+                SET checksum = EXCLUDED.checksum, row_count = EXCLUDED.row_count,
+                    relfilenode = EXCLUDED.relfilenode, write_count = EXCLUDED.write_count,
+                    source_file = EXCLUDED.source_file, imported_at = EXCLUDED.imported_at
+            """, (table_name, checksum, row_count, relfilenode, write_count + inserted + updated,
+                  self.source_file))
+            self.conn.commit()
+            unchanged = row_count - inserted - updated
+            print(f"  ✓ Bảng {table_name}: {inserted} mới, {updated} cập nhật, {unchanged} không đổi")
+            
+        except Exception as e:
+            print(f"  ✗ Lỗi upsert vào bảng {table_name}: {e}")
+            self.conn.rollback()
+            raise
+        finally:
+            spool.close()
+    
+    def _write_token(self, table_name: str) -> Tuple[int, int]:
+        """(relfilenode, tuples inserted + updated + deleted) of a table, from the catalog and
+        the cumulative statistics: any write since the last import changes one of them, without
+        scanning the table (counters of other sessions show up once they commit, within ~1s)"""
+        self.cursor.execute("""
+            SELECT pg_relation_filenode(c.oid),
+                   pg_stat_get_tuples_inserted(c.oid) + pg_stat_get_tuples_updated(c.oid)
+                   + pg_stat_get_tuples_deleted(c.oid)
+            FROM pg_class c WHERE c.oid = %s::regclass
+        """, (table_name,))
+        return self.cursor.fetchone()
+    
+    def _transform(self, info, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Per-record rewrite stages, applied while the table streams in"""
+        records = iter(records)
+        if info.name in SLIM_TABLES:
+            records = (slim_record(info.name, record, info.columns) for record in records)
+        if self.sanitizer and info.name in self.sanitizer.tables:
+            records = self.sanitizer.apply(info.name, records)
+        return records
+    
+    def _record_columns(self, info, first: Dict[str, Any]) -> List[str]:
+        """Columns to load, in table order: the keys of the first record the table knows"""
+        unknown = [key for key in first if key not in info.columns]
+        if unknown:
+            print(f"  ⚠️  Bảng {info.name}: Bỏ qua cột không có trong schema: {', '.join(unknown)}")
+        return [col for col in info.columns if col in first]
+    
+    def _rekey_v7(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Replace log ids with UUIDv7 derived from the event timestamp"""
+        for record in records:
+            if record.get('timestamp') and record.get('id'):
+                record['id'] = v7_from_id(datetime.fromisoformat(record['timestamp']), record['id'])
+            yield record
+    
+    def _count_rows(self, table_name: str, count: int):
+        self.rows_imported[table_name] = self.rows_imported.get(table_name, 0) + count
+        if self.progress:
+            self.progress.advance(count)
+    
     def import_all_tables(self, json_data: Dict):
         """Import all tables from JSON data"""
-        table_order = [
-            'profiles', 'user_roles', 'courses', 'modules', 'lessons',
-            'enrollments', 'forum_posts', 'forum_reactions', 'user_sessions',
-            'activity_logs', 'interaction_logs', 'lesson_progress', 'quizzes',
-            'questions', 'quiz_attempts', 'question_responses',
-            'quiz_interaction_logs', 'reading_behavior_logs'
-        ]
+        records = (
+            (table_name, record)
+            for table_name, table_records in json_data.get('tables', {}).items()
+            for record in table_records
+        )
+        self.import_stream(records)
+    
+    def import_file(self, file_path: str, threaded: bool = True):
+        """Stream an export file (plain or compressed) into the database"""
+        self.source_file = os.path.basename(file_path)
+        raw = open(file_path, 'rb')
+        # ETA from the compressed bytes consumed; raw.tell() is safe across the reader thread
+        self.progress = ProgressReporter("Import", total=os.path.getsize(file_path), unit='bytes',
+                                         interval=self.progress_interval,
+                                         counts=lambda: self.rows_imported, position=raw.tell,
+                                         latest=True)
+        try:
+            with decompress_stream(raw, threaded=threaded) as f:
+                print(f"✓ Đang đọc file: {file_path}" + (" (streaming)" if ijson else ""))
+                self.import_stream(iter_export_records(f))
+                # Still inside the block: for uncompressed files f is raw itself
+                self.progress.finish()
+        finally:
+            raw.close()
+            self.progress = None
+    
+    def import_stream(self, records: Iterator[Tuple[str, Dict[str, Any]]]):
+        """Import (table_name, record) pairs, respecting foreign key order
         
-        tables_data = json_data.get('tables', {})
+        Tables that arrive before their turn are spooled to disk and loaded once
+        every table before them in the import order has been loaded.
+        """
+        if self.registry is None:
+            self.load_registry()  # connection set up by the caller
+        table_order = self.registry.data_tables()
         
         print("\n🚀 Bắt đầu import dữ liệu...")
         print(f"   Tổng số bảng: {len(table_order)}")
         print("-" * 60)
         
-        for table_name in table_order:
-            records = tables_data.get(table_name, [])
-            self.insert_data(table_name, records)
+        spooled = {}
+        next_index = 0
+        
+        for table_name, table_records in group_by_table(iter(records)):
+            if table_name not in table_order:
+                print(f"  → Bỏ qua bảng không xác định: {table_name}")
+                continue
+            if self.v7_log_ids and table_name in LOG_TABLES:
+                table_records = self._rekey_v7(table_records)
+            if table_order.index(table_name) != next_index:
+                spooled[table_name] = _SpooledTable(table_records)
+                continue
+            
+            self.insert_data(table_name, table_records)
+            next_index += 1
+            while next_index < len(table_order) and table_order[next_index] in spooled:
+                self.insert_data(table_order[next_index], spooled.pop(table_order[next_index]))
+                next_index += 1
+        
+        # Remaining tables (missing from the export or out of order)
+        for table_name in table_order[next_index:]:
+            self.insert_data(table_name, spooled.pop(table_name, []))
         
         print("-" * 60)
         print("✓ Hoàn thành import tất cả dữ liệu!\n")
     
-    def get_table_counts(self):
-        """Get row counts for all tables"""
-        table_names = [
-            'profiles', 'user_roles', 'courses', 'modules', 'lessons',
-            'enrollments', 'forum_posts', 'forum_reactions', 'user_sessions',
-            'activity_logs', 'interaction_logs', 'lesson_progress', 'quizzes',
-            'questions', 'quiz_attempts', 'question_responses',
-            'quiz_interaction_logs', 'reading_behavior_logs'
-        ]
-        
+    def pause_feature_triggers(self) -> bool:
+        """Disable the feature queue triggers for a bulk load (see refresh_features)"""
+        paused = set_feature_triggers(self.cursor, False)
+        self.conn.commit()
+        return bool(paused)
+    
+    def refresh_features(self):
+        """Re-enable the feature queue triggers and recompute all features once"""
+        self.conn.rollback()  # after a failed import
+        set_feature_triggers(self.cursor, True)
+        self.cursor.execute("SELECT refresh_user_course_features(true)")
+        rows = self.cursor.fetchone()[0]
+        self.conn.commit()
+        print(f"✓ Đã cập nhật {rows} dòng features (user_course_features)")
+    
+    def get_table_counts(self, exact: bool = False):
+        """Print row counts and sizes of all tables (catalog estimates after ANALYZE,
+        or exact COUNT(*) in parallel)"""
         print("\n📊 Thống kê số lượng bản ghi:")
         print("-" * 60)
         
-        for table_name in table_names:
-            try:
-                self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                count = self.cursor.fetchone()[0]
-                print(f"   {table_name:30s}: {count:5d} bản ghi")
-            except Exception as e:
-                print(f"   {table_name:30s}: Lỗi - {e}")
+        try:
+            stats = collect_table_stats(self.cursor, self.registry.data_tables(), exact=exact,
+                                        analyze=not exact, db_config=self.db_config)
+            print_table_stats(stats, exact, indent='   ')
+        except Exception as e:
+            print(f"   Lỗi thống kê: {e}")
+            self.conn.rollback()
         
         print("-" * 60)
 
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description='Import a database export (JSON, optionally .gz/.zst/.xz) into PostgreSQL')
+    parser.add_argument('json_file', nargs='?', default='database-export-2026-01-02.json',
+                        help='Export file to import')
+    parser.add_argument('--schema-file', default='create_schema.sql', help='Schema SQL file')
+    parser.add_argument('--skip-schema', action='store_true', help='Do not (re)create the schema before importing')
+    parser.add_argument('--no-threaded-decompression', action='store_true',
+                        help='Decompress in the main thread')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='Seconds between progress lines')
+    parser.add_argument('--v7-log-ids', action='store_true',
+                        help=f"Re-key {', '.join(LOG_TABLES)} with UUIDv7 ids derived from their timestamp")
+    parser.add_argument('--upsert', action='store_true',
+                        help='Merge into the existing data (COPY to staging, update changed rows); implies --skip-schema')
+    parser.add_argument('--skip-unchanged', action='store_true',
+                        help='With --upsert: skip tables whose content matches the last upsert import and that '
+                             'were not written since (pg_stat counters, no table scan); the file is still read '
+                             'and each table hashed, but unchanged tables are not sent to the server')
+    parser.add_argument('--exact-counts', action='store_true',
+                        help='Final statistics with exact COUNT(*) (parallel) instead of catalog estimates')
+    parser.add_argument('--sanitize', action='store_true',
+                        help='Replace URLs with route templates and hash session tokens / IPs (sanitize.DEFAULT_RULES)')
+    parser.add_argument('--sanitize-rules', help='JSON file with per table/column sanitize rules; implies --sanitize')
+    args = parser.parse_args()
+    if args.skip_unchanged:
+        args.upsert = True
+    if args.upsert:
+        args.skip_schema = True
     
     # Đọc cấu hình từ file .env
-    DB_CONFIG = {
-        'host': os.getenv('LOCAL_DB_HOST', 'localhost'),
-        'port': int(os.getenv('LOCAL_DB_PORT', 5432)),
-        'database': os.getenv('LOCAL_DB_NAME', 'Lovable'),
-        'user': os.getenv('LOCAL_DB_USER', 'postgres'),
-        'password': os.getenv('LOCAL_DB_PASSWORD'),
-        'schema': os.getenv('LOCAL_DB_SCHEMA', 'transform')
-    }
-    
-    JSON_FILE = 'database-export-2026-01-02.json'
-    SCHEMA_FILE = 'create_schema.sql'
+    DB_CONFIG = get_db_config()
+    
+    JSON_FILE = args.json_file
+    SCHEMA_FILE = args.schema_file
     
     if not os.path.exists(JSON_FILE):
         print(f"✗ Không tìm thấy file: {JSON_FILE}")
         return
     
-    if not os.path.exists(SCHEMA_FILE):
+    if not args.skip_schema and not os.path.exists(SCHEMA_FILE):
         print(f"✗ Không tìm thấy file: {SCHEMA_FILE}")
         return
     
@@ -194,21 +605,31 @@ def main():
     try:
         # 1. Khởi tạo và kết nối
         importer = PostgresImporter(DB_CONFIG)
+        importer.progress_interval = args.progress_interval
+        importer.v7_log_ids = args.v7_log_ids
+        importer.upsert = args.upsert
+        importer.skip_unchanged = args.skip_unchanged
+        if args.sanitize or args.sanitize_rules:
+            importer.sanitizer = Sanitizer(load_rules(args.sanitize_rules) if args.sanitize_rules else None)
         importer.connect()
         
         # 2. Tạo schema (các bảng)
-        print("\n📋 Tạo schema database...")
-        importer.create_schema(SCHEMA_FILE)
+        if not args.skip_schema:
+            print("\n📋 Tạo schema database...")
+            importer.create_schema(SCHEMA_FILE)
         
-        # 3. Đọc dữ liệu JSON
+        # 3-4. Đọc (stream) và import dữ liệu JSON
+        # Into a fresh schema: no feature queue triggers per COPY, one full refresh at the end
+        features_paused = not args.skip_schema and importer.pause_feature_triggers()
         print("\n📂 Đọc dữ liệu từ file JSON...")
-        json_data = importer.load_json_file(JSON_FILE)
-        
-        # 4. Import dữ liệu
-        importer.import_all_tables(json_data)
+        try:
+            importer.import_file(JSON_FILE, threaded=not args.no_threaded_decompression)
+        finally:
+            if features_paused:
+                importer.refresh_features()
         
         # 5. Thống kê
-        importer.get_table_counts()
+        importer.get_table_counts(exact=args.exact_counts)
         
         print("\n" + "=" * 60)
         print("✓ HOÀN THÀNH!".center(60))
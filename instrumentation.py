@@ -0,0 +1,278 @@
+"""
+Lightweight instrumentation for the data tools
+Counts calls, rows and latency per table for cursor.execute and sink flushes,
+times each phase (split into Python time and database time) and writes the
+result as JSON or in the Prometheus text exposition format
+"""
+import contextlib
+import cProfile
+import json
+import pstats
+import re
+import time
+from typing import Dict, List, Any, Optional
+import psycopg2.extensions
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_TABLE_PATTERN = re.compile(
+    r'\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|FROM|TRUNCATE(?:\s+TABLE)?|COPY)\s+"?([A-Za-z_][\w.]*)',
+    re.IGNORECASE
+)
+
+
+def statement_target(query) -> tuple:
+    """(operation, table) of a SQL statement, e.g. ('INSERT', 'activity_logs')"""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    elif not isinstance(query, str):
+        # psycopg2.sql.Composable and friends
+        query = str(query)
+    query = query.lstrip()
+    operation = query.split(None, 1)[0].upper() if query else ''
+    match = _TABLE_PATTERN.search(query)
+    table = match.group(1).split('.')[-1] if match else '-'
+    return operation, table
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram with fixed buckets"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def cumulative(self) -> List[tuple]:
+        """[(upper bound, cumulative count), ...] ending with ('+Inf', count)"""
+        result, running = [], 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum_seconds': round(self.total, 6),
+            'buckets': {str(bound): count for bound, count in self.cumulative()}
+        }
+
+
+class _Metric:
+    """Calls, rows and latency for one (source, operation, table)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.latency = LatencyHistogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'calls': self.calls, 'rows': self.rows, 'seconds': round(self.latency.total, 6),
+                'latency': self.latency.to_dict()}
+
+
+class Instrumentation:
+    """Collects metrics for one run; attach it to connections and sinks"""
+
+    def __init__(self):
+        self.metrics = {}  # {(source, operation, table): _Metric}
+        self.phases = {}   # {phase: {...}}
+        self.db_seconds = 0.0
+        self.started = time.perf_counter()
+
+    # -- recording ----------------------------------------------------------
+
+    def record(self, source: str, operation: str, table: str, rows: int, seconds: float):
+        key = (source, operation, table)
+        metric = self.metrics.get(key)
+        if metric is None:
+            metric = self.metrics[key] = _Metric()
+        metric.calls += 1
+        metric.rows += max(rows, 0)
+        metric.latency.observe(seconds)
+        if source == 'db':
+            self.db_seconds += seconds
+
+    def cursor_factory(self):
+        """psycopg2 cursor class that reports every execute to this instance"""
+        instrumentation = self
+
+        class InstrumentedCursor(psycopg2.extensions.cursor):
+            def execute(self, query, vars=None):
+                started = time.perf_counter()
+                try:
+                    return super().execute(query, vars)
+                finally:
+                    operation, table = statement_target(query)
+                    instrumentation.record('db', operation, table, self.rowcount,
+                                           time.perf_counter() - started)
+
+            def copy_expert(self, sql, file, size=8192):
+                started = time.perf_counter()
+                try:
+                    return super().copy_expert(sql, file, size)
+                finally:
+                    operation, table = statement_target(sql)
+                    instrumentation.record('db', operation, table, self.rowcount,
+                                           time.perf_counter() - started)
+
+        return InstrumentedCursor
+
+    def attach(self, conn):
+        """Instrument all cursors created on conn from now on"""
+        conn.cursor_factory = self.cursor_factory()
+        return conn
+
+    def wrap_sink(self, sink):
+        """Instrument the per-table flushes of a RowSink"""
+        write_rows = sink._write_rows
+
+        def timed_write_rows(table, columns, rows):
+            started = time.perf_counter()
+            try:
+                return write_rows(table, columns, rows)
+            finally:
+                self.record('sink', 'FLUSH', table, len(rows), time.perf_counter() - started)
+
+        sink._write_rows = timed_write_rows
+        return sink
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Time a phase; database time inside it is reported separately"""
+        rows_before = self._sink_rows()
+        db_before = self.db_seconds
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - started
+            db = self.db_seconds - db_before
+            rows = {t: c - rows_before.get(t, 0) for t, c in self._sink_rows().items()
+                    if c - rows_before.get(t, 0)}
+            self.phases[name] = {
+                'seconds': round(wall, 6),
+                'db_seconds': round(db, 6),
+                'python_seconds': round(max(wall - db, 0.0), 6),
+                'rows': rows,
+                'rows_per_sec': {t: round(c / wall, 1) for t, c in rows.items()} if wall > 0 else {}
+            }
+
+    def _sink_rows(self) -> Dict[str, int]:
+        rows = {}
+        for (source, _, table), metric in self.metrics.items():
+            if source == 'sink':
+                rows[table] = rows.get(table, 0) + metric.rows
+        return rows
+
+    # -- profiling ----------------------------------------------------------
+
+    @contextlib.contextmanager
+    def profile(self, engine: Optional[str], output: str):
+        """Profile the enclosed block with cProfile (.prof) or pyinstrument (.html)"""
+        if not engine:
+            yield
+            return
+        if engine == 'pyinstrument':
+            if pyinstrument is None:
+                print("⚠️  Cần cài pyinstrument: pip install pyinstrument (dùng cProfile thay thế)")
+                engine = 'cprofile'
+            else:
+                profiler = pyinstrument.Profiler()
+                profiler.start()
+                try:
+                    yield
+                finally:
+                    profiler.stop()
+                    with open(output, 'w', encoding='utf-8') as f:
+                        f.write(profiler.output_html())
+                    print(f"  ✓ Đã ghi profile: {output}")
+                return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output)
+            print(f"  ✓ Đã ghi profile: {output}")
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+
+    # -- output -------------------------------------------------------------
+
+    def summary(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self.started
+        tables = {}
+        for (source, operation, table), metric in sorted(self.metrics.items()):
+            tables.setdefault(source, {}).setdefault(table, {})[operation] = metric.to_dict()
+        return {
+            'total_seconds': round(wall, 6),
+            'db_seconds': round(self.db_seconds, 6),
+            'python_seconds': round(max(wall - self.db_seconds, 0.0), 6),
+            'phases': self.phases,
+            'db': tables.get('db', {}),
+            'sink': tables.get('sink', {})
+        }
+
+    def prometheus_text(self, prefix: str = 'datagen') -> str:
+        """Metrics in the Prometheus text exposition format (for node_exporter textfile)"""
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        header('calls_total', 'counter', 'Statements executed / sink flushes')
+        for (source, operation, table), metric in sorted(self.metrics.items()):
+            lines.append(f'{prefix}_calls_total{{source="{source}",operation="{operation}",table="{table}"}} {metric.calls}')
+        header('rows_total', 'counter', 'Rows affected / written')
+        for (source, operation, table), metric in sorted(self.metrics.items()):
+            lines.append(f'{prefix}_rows_total{{source="{source}",operation="{operation}",table="{table}"}} {metric.rows}')
+        header('latency_seconds', 'histogram', 'Statement / flush latency')
+        for (source, operation, table), metric in sorted(self.metrics.items()):
+            labels = f'source="{source}",operation="{operation}",table="{table}"'
+            for bound, count in metric.latency.cumulative():
+                lines.append(f'{prefix}_latency_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{prefix}_latency_seconds_sum{{{labels}}} {metric.latency.total:.6f}')
+            lines.append(f'{prefix}_latency_seconds_count{{{labels}}} {metric.latency.count}')
+        header('phase_seconds', 'gauge', 'Wall time per phase, split into python and db time')
+        for name, phase in self.phases.items():
+            lines.append(f'{prefix}_phase_seconds{{phase="{name}",part="total"}} {phase["seconds"]}')
+            lines.append(f'{prefix}_phase_seconds{{phase="{name}",part="db"}} {phase["db_seconds"]}')
+            lines.append(f'{prefix}_phase_seconds{{phase="{name}",part="python"}} {phase["python_seconds"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """Write metrics; .prom files get the Prometheus format, anything else JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith('.prom'):
+                f.write(self.prometheus_text())
+            else:
+                json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+
+    def print_summary(self):
+        print("\n⏱️  THỜI GIAN THEO PHASE")
+        print("-" * 60)
+        for name, phase in self.phases.items():
+            rows = sum(phase['rows'].values())
+            rate = rows / phase['seconds'] if phase['seconds'] > 0 else 0
+            print(f"  {name:14s}: {phase['seconds']:8.2f}s (python {phase['python_seconds']:.2f}s, "
+                  f"db {phase['db_seconds']:.2f}s) | {rows:8d} dòng | {rate:10,.0f} dòng/s")
+        print("-" * 60)
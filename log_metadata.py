@@ -0,0 +1,150 @@
+"""
+Typed columns for log metadata
+Uniformly structured metadata keys of interaction_logs are stored in typed columns,
+keys that only repeat other columns are dropped and empty objects become NULL, so
+JSONB is left for the truly optional extras. Used by the generator and the importer;
+migrations/0003_typed_log_metadata_backfill.py applies the same rules to existing rows.
+"""
+from typing import Dict, Any, Optional, Iterable
+
+# Values of the enum types in create_schema.sql
+ELEMENT_TYPES = (
+    'button', 'slider', 'dropdown', 'container', 'heading', 'text',
+    'code_block', 'image', 'menu', 'radio_button'
+)
+ELEMENT_CONTEXTS = (
+    'video_control', 'content_view', 'navigation', 'annotation', 'media_view',
+    'document_view', 'document_control', 'quiz_control', 'quiz_interaction'
+)
+DEVICE_TYPES = ('desktop', 'mobile', 'tablet')
+
+# interaction_logs: metadata key -> (column, allowed values; None = any string, int = smallint)
+INTERACTION_FIELDS = {
+    'name': ('element_name', None),
+    'type': ('element_type', ELEMENT_TYPES),
+    'context': ('element_context', ELEMENT_CONTEXTS),
+    'device_type': ('device_type', DEVICE_TYPES),
+    'interaction_count': ('interaction_count', int),
+}
+
+# Keys that only repeat other columns of the same row
+REDUNDANT_KEYS = {
+    'quiz_interaction_logs': ('action', 'timestamp_iso'),
+}
+
+# JSONB columns stored as NULL instead of {}
+EMPTY_AS_NULL = {
+    'activity_logs': ('metadata', 'client_info'),
+    'interaction_logs': ('metadata',),
+    'quiz_interaction_logs': ('metadata',),
+    'reading_behavior_logs': ('metadata',),
+}
+
+SLIM_TABLES = set(EMPTY_AS_NULL)
+
+# Known keys of the JSONB columns (generator and application exports) with their value kind:
+# 'string', 'int', 'float' or 'bool'. Columnar exports store them as typed struct fields and
+# keep only the other keys (or values of another kind) as JSON text in EXTRA_FIELD.
+JSON_FIELDS = {
+    ('activity_logs', 'metadata'): {
+        'score': 'float', 'max_score': 'float', 'passed': 'bool', 'attempt_number': 'int',
+        'attemptId': 'string', 'maxScore': 'float',
+    },
+    ('activity_logs', 'client_info'): {'url': 'string', 'referrer': 'string'},
+    ('interaction_logs', 'metadata'): {
+        'position': 'string', 'timestamp': 'string', 'seek_to': 'string', 'volume_level': 'int',
+        'fullscreen': 'bool', 'speed': 'string', 'scroll_depth': 'int', 'section': 'string',
+        'text_length': 'int', 'language': 'string', 'zoom_level': 'int', 'note_position': 'int',
+        'page_number': 'int', 'file_size': 'string', 'pages_to_print': 'int', 'direction': 'string',
+        'menu_section': 'string', 'bookmarked': 'bool', 'quiz_type': 'string',
+        'question_number': 'int', 'option': 'string', 'tagName': 'string', 'clickedAt': 'string',
+    },
+    ('quiz_interaction_logs', 'metadata'): {'hintRequestedAt': 'string'},
+    ('reading_behavior_logs', 'metadata'): {
+        'startedAt': 'string', 'endedAt': 'string', 'contentType': 'string', 'finalScrollDepth': 'int',
+    },
+    ('user_sessions', 'device_info'): {
+        'os': 'string', 'browser': 'string', 'device': 'string', 'language': 'string',
+        'timezone': 'string', 'userAgent': 'string', 'screenSize': 'string',
+    },
+}
+EXTRA_FIELD = '_extra'
+
+
+def _json_kind_value(value, kind):
+    """value converted to the kind, or None if it does not fit"""
+    if kind == 'string':
+        return value if isinstance(value, str) else None
+    if type(value) is bool:
+        return value if kind == 'bool' else None
+    if kind == 'int':
+        if type(value) is int or (type(value) is float and value.is_integer()):
+            return int(value)
+        return None
+    if kind == 'float':
+        return float(value) if type(value) in (int, float) else None
+    return None
+
+
+def split_json_fields(value, fields: Dict[str, str]) -> tuple:
+    """({key: typed value or None} for every known key, {other keys} or None);
+    a value that is not a JSON object is returned whole as the extras"""
+    typed = dict.fromkeys(fields)
+    if not isinstance(value, dict):
+        return typed, value
+    extras = {}
+    for key, item in value.items():
+        kind = fields.get(key)
+        converted = None if kind is None or item is None else _json_kind_value(item, kind)
+        if converted is None and item is not None:
+            extras[key] = item
+        else:
+            typed[key] = converted
+    return typed, extras or None
+
+
+def _typed_value(value, allowed):
+    """value if it fits the column, otherwise None (and it stays in metadata)"""
+    if allowed is None:
+        return value if isinstance(value, str) and len(value) <= 100 else None
+    if allowed is int:
+        return value if type(value) is int and -32768 <= value <= 32767 else None
+    return value if value in allowed else None
+
+
+def split_interaction_metadata(metadata: Optional[Dict[str, Any]]) -> tuple:
+    """({column: value} for every typed column, remaining metadata or None)"""
+    typed = {column: None for column, _ in INTERACTION_FIELDS.values()}
+    if not metadata:
+        return typed, None
+    extras = dict(metadata)
+    for key, (column, allowed) in INTERACTION_FIELDS.items():
+        if key in extras:
+            value = _typed_value(extras[key], allowed)
+            if value is not None:
+                typed[column] = value
+                del extras[key]
+    return typed, extras or None
+
+
+def slim_record(table: str, record: Dict[str, Any], columns: Iterable[str] = None) -> Dict[str, Any]:
+    """Apply the slim rules to one exported row (in place)
+
+    columns: columns of the target table; typed columns are only filled if present,
+             so older databases keep the fields in metadata.
+    """
+    metadata = record.get('metadata')
+    if table == 'interaction_logs' and (columns is None or 'element_type' in columns):
+        typed, metadata = split_interaction_metadata(metadata)
+        for column, value in typed.items():
+            if record.get(column) is None:
+                record[column] = value
+    redundant = REDUNDANT_KEYS.get(table)
+    if redundant and metadata:
+        metadata = {k: v for k, v in metadata.items() if k not in redundant}
+    if 'metadata' in record or metadata:
+        record['metadata'] = metadata
+    for column in EMPTY_AS_NULL.get(table, ()):
+        if column in record and record[column] == {}:
+            record[column] = None
+    return record
@@ -0,0 +1,273 @@
+"""
+Versioned schema migrations
+Applies the files in migrations/ in version order and records each one in
+schema_migrations, so a database is only ever migrated forward and never reloaded.
+
+  NNNN_name.sql   run in one transaction together with its schema_migrations row;
+                  a first line '-- migrate: no-transaction' runs the statements one by
+                  one in autocommit mode instead (needed for CREATE INDEX CONCURRENTLY)
+  NNNN_name.py    defines up(m) with m the Migrator; m.execute runs in the migration's
+                  transaction, m.backfill commits batch by batch
+"""
+import argparse
+import hashlib
+import importlib.util
+import os
+import time
+from typing import List, Dict, Any, Optional
+import psycopg2
+from db import get_db_config, connect as db_connect
+from progress import ProgressReporter
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+NO_TRANSACTION_MARKER = '-- migrate: no-transaction'
+
+# Give up on a lock after this long instead of queueing every other query behind the DDL
+DEFAULT_LOCK_TIMEOUT = '5s'
+LOCK_RETRIES = 5
+
+CREATE_TRACKING_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(20) PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    execution_ms INTEGER,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+)
+"""
+
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> List[Dict[str, Any]]:
+    """Migration files sorted by version: [{'version', 'name', 'path', 'kind', 'checksum'}]"""
+    migrations = []
+    seen = {}
+    for filename in sorted(os.listdir(directory)):
+        base, ext = os.path.splitext(filename)
+        version, _, name = base.partition('_')
+        if ext not in ('.sql', '.py') or not version.isdigit():
+            continue
+        if version in seen:
+            raise ValueError(f"Duplicate migration version {version}: {seen[version]}, {filename}")
+        seen[version] = filename
+        path = os.path.join(directory, filename)
+        with open(path, 'rb') as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        migrations.append({'version': version, 'name': name, 'path': path,
+                           'kind': ext[1:], 'checksum': checksum})
+    return migrations
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a no-transaction file on ';' at the end of a line (no DO blocks / functions there)"""
+    statements, current = [], []
+    for line in sql.splitlines():
+        current.append(line)
+        if line.rstrip().endswith(';'):
+            statement = '\n'.join(current).strip()
+            current = []
+            if any(l.strip() and not l.strip().startswith('--') for l in statement.splitlines()):
+                statements.append(statement)
+    if '\n'.join(current).strip():
+        statements.append('\n'.join(current).strip())
+    return statements
+
+
+class Migrator:
+    """Apply pending migrations and provide online-safe helpers to .py migrations
+
+    batch_size: rows per backfill batch (one short transaction each)
+    sleep:      seconds to pause between batches, leaves I/O and WAL headroom for live traffic
+    """
+
+    def __init__(self, db_config: Optional[Dict[str, Any]] = None, directory: str = MIGRATIONS_DIR,
+                 batch_size: int = 10000, sleep: float = 0.0, lock_timeout: str = DEFAULT_LOCK_TIMEOUT):
+        self.db_config = db_config or get_db_config()
+        self.directory = directory
+        self.batch_size = batch_size
+        self.sleep = sleep
+        self.lock_timeout = lock_timeout
+        self.conn = None
+        self.cursor = None
+
+    def connect(self):
+        self.conn = db_connect(self.db_config, lock_timeout=self.lock_timeout)
+        self.cursor = self.conn.cursor()
+        self.cursor.execute(CREATE_TRACKING_TABLE_SQL)
+        self.conn.commit()
+
+    def disconnect(self):
+        if self.cursor:
+            self.cursor.close()
+        if self.conn:
+            self.conn.close()
+
+    def applied(self) -> Dict[str, str]:
+        """{version: checksum} of the applied migrations"""
+        self.cursor.execute("SELECT version, checksum FROM schema_migrations")
+        return dict(self.cursor.fetchall())
+
+    def pending(self, target: Optional[str] = None) -> List[Dict[str, Any]]:
+        applied = self.applied()
+        return [m for m in discover_migrations(self.directory)
+                if m['version'] not in applied and (target is None or m['version'] <= target)]
+
+    def status(self):
+        applied = self.applied()
+        print("📋 Trạng thái migration:")
+        for m in discover_migrations(self.directory):
+            checksum = applied.get(m['version'])
+            if checksum is None:
+                state = '⏸️  chưa áp dụng'
+            elif checksum != m['checksum']:
+                state = '⚠️  đã áp dụng, file đã bị sửa sau đó'
+            else:
+                state = '✓ đã áp dụng'
+            print(f"  {m['version']} {m['name']:35s} {state}")
+
+    def _record(self, migration: Dict[str, Any], elapsed_ms: Optional[int]):
+        self.cursor.execute(
+            "INSERT INTO schema_migrations (version, name, checksum, execution_ms) VALUES (%s, %s, %s, %s)",
+            (migration['version'], migration['name'], migration['checksum'], elapsed_ms)
+        )
+
+    def baseline(self, target: Optional[str] = None) -> int:
+        """Mark migrations as applied without running them (database created from create_schema.sql)"""
+        migrations = self.pending(target)
+        for m in migrations:
+            self._record(m, None)
+        self.conn.commit()
+        return len(migrations)
+
+    def run(self, target: Optional[str] = None) -> int:
+        """Apply the pending migrations up to target (inclusive); stops at the first failure"""
+        migrations = self.pending(target)
+        if not migrations:
+            print("✓ Database đã ở phiên bản mới nhất")
+            return 0
+        for m in migrations:
+            print(f"\n▶ {m['version']} {m['name']} ({m['kind']})")
+            elapsed_ms = self._apply(m)
+            print(f"  ✓ Xong sau {elapsed_ms / 1000:.2f}s")
+        return len(migrations)
+
+    def _apply(self, migration: Dict[str, Any]) -> int:
+        started = time.perf_counter()
+        if migration['kind'] == 'sql':
+            with open(migration['path'], encoding='utf-8') as f:
+                sql = f.read()
+            if not sql.lstrip().startswith(NO_TRANSACTION_MARKER):
+                self.cursor.execute(sql)
+            else:
+                self.conn.commit()
+                self.conn.autocommit = True
+                try:
+                    for statement in split_statements(sql):
+                        self.execute(statement)
+                finally:
+                    self.conn.autocommit = False
+        else:
+            spec = importlib.util.spec_from_file_location(f"migration_{migration['version']}", migration['path'])
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            module.up(self)
+        elapsed_ms = int((time.perf_counter() - started) * 1000)
+        self._record(migration, elapsed_ms)
+        # Transactional migrations commit together with their schema_migrations row
+        self.conn.commit()
+        return elapsed_ms
+
+    def execute(self, sql: str, params=None):
+        """Run one statement, retrying when it gives up waiting for a lock (autocommit only)"""
+        for attempt in range(LOCK_RETRIES):
+            try:
+                self.cursor.execute(sql, params)
+                return
+            except psycopg2.errors.LockNotAvailable:
+                if not self.conn.autocommit or attempt == LOCK_RETRIES - 1:
+                    raise
+                print(f"  ⏳ Chờ lock (lần {attempt + 1}), thử lại...")
+                time.sleep(2 ** attempt)
+
+    def backfill(self, table: str, update_sql: str, key: str = 'id', label: str = None) -> int:
+        """Run update_sql over table in key ranges of batch_size rows, committing each batch
+
+        update_sql must contain {batch}, which is replaced by the key range condition of
+        the current batch, e.g. "UPDATE t SET x = NULL WHERE {batch} AND x = ''".
+        Batches only hold row locks for one short transaction, and an interrupted
+        backfill can be rerun as long as update_sql skips rows that are already done.
+        Literal % signs in update_sql must be written as %%.
+        """
+        self.conn.commit()
+        condition = f"(%(lower)s IS NULL OR {key} > %(lower)s) AND {key} <= %(upper)s"
+        sql = update_sql.replace('{batch}', condition)
+        self.cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", (table,))
+        estimate = self.cursor.fetchone()[0]
+        progress = ProgressReporter(label or table, total=estimate if estimate > 0 else None, unit='dòng')
+        lower, updated = None, 0
+        while True:
+            self.cursor.execute(
+                # max() is not defined for uuid
+                f"SELECT (array_agg({key} ORDER BY {key} DESC))[1], count(*) FROM (SELECT {key} FROM {table} "
+                f"WHERE %(lower)s IS NULL OR {key} > %(lower)s ORDER BY {key} LIMIT %(limit)s) batch",
+                {'lower': lower, 'limit': self.batch_size}
+            )
+            upper, scanned = self.cursor.fetchone()
+            if upper is None:
+                break
+            for attempt in range(LOCK_RETRIES):
+                try:
+                    self.cursor.execute(sql, {'lower': lower, 'upper': upper})
+                    updated += self.cursor.rowcount
+                    self.conn.commit()
+                    break
+                except psycopg2.errors.LockNotAvailable:
+                    self.conn.rollback()
+                    if attempt == LOCK_RETRIES - 1:
+                        raise
+                    time.sleep(2 ** attempt)
+            lower = upper
+            progress.advance(scanned)
+            if self.sleep:
+                time.sleep(self.sleep)
+        progress.finish()
+        print(f"  ✓ {label or table}: đã cập nhật {updated:,} dòng")
+        return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply versioned schema migrations (migrations/)')
+    parser.add_argument('--target', help='Only apply migrations up to this version (e.g. 0004)')
+    parser.add_argument('--status', action='store_true', help='List migrations and whether they are applied')
+    parser.add_argument('--baseline', action='store_true',
+                        help='Mark migrations as applied without running them (fresh create_schema.sql database)')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Rows per backfill batch')
+    parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between backfill batches')
+    parser.add_argument('--lock-timeout', default=DEFAULT_LOCK_TIMEOUT,
+                        help='lock_timeout for migration statements (retried in autocommit mode)')
+    args = parser.parse_args()
+
+    print("🔧 Migration schema database...")
+    migrator = Migrator(batch_size=args.batch_size, sleep=args.sleep, lock_timeout=args.lock_timeout)
+    try:
+        migrator.connect()
+        if args.status:
+            migrator.status()
+        elif args.baseline:
+            count = migrator.baseline(args.target)
+            print(f"✓ Đã đánh dấu {count} migration là đã áp dụng")
+        else:
+            count = migrator.run(args.target)
+            if count:
+                print(f"\n✓ Đã áp dụng {count} migration")
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        if migrator.conn and not migrator.conn.closed:
+            migrator.conn.rollback()
+        print("  → Migration lỗi không được ghi vào schema_migrations; sửa lỗi rồi chạy lại. "
+              "Nếu lỗi xảy ra giữa CREATE INDEX CONCURRENTLY, xóa index INVALID còn sót lại trước.")
+    finally:
+        migrator.disconnect()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+-- Offline/summative assessment grades (assignments, midterm, final exams)
+CREATE TABLE IF NOT EXISTS course_grades (
+    id UUID PRIMARY KEY,
+    user_id UUID NOT NULL,
+    course_id UUID NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    assessment_type VARCHAR(50) NOT NULL CHECK (assessment_type IN ('assignment', 'midterm', 'final')),
+    title VARCHAR(255) NOT NULL,
+    score NUMERIC(4, 2) NOT NULL CHECK (score >= 0 AND score <= 10),
+    weight NUMERIC(3, 2) NOT NULL CHECK (weight >= 0 AND weight <= 1),
+    graded_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_course_grades_user_id ON course_grades(user_id);
+CREATE INDEX IF NOT EXISTS idx_course_grades_course_id ON course_grades(course_id);
+CREATE INDEX IF NOT EXISTS idx_course_grades_assessment_type ON course_grades(assessment_type);
+
+COMMENT ON TABLE course_grades IS 'Offline/summative assessment grades (assignments, midterm, final exams)';
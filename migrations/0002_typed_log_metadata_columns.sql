@@ -0,0 +1,28 @@
+-- Typed interaction_logs columns (same rules as log_metadata.py); the rows are moved
+-- over in batches by 0003
+DO $$
+BEGIN
+    IF to_regtype('interaction_element_type') IS NULL THEN
+        CREATE TYPE interaction_element_type AS ENUM (
+            'button', 'slider', 'dropdown', 'container', 'heading', 'text',
+            'code_block', 'image', 'menu', 'radio_button'
+        );
+    END IF;
+    IF to_regtype('interaction_context') IS NULL THEN
+        CREATE TYPE interaction_context AS ENUM (
+            'video_control', 'content_view', 'navigation', 'annotation', 'media_view',
+            'document_view', 'document_control', 'quiz_control', 'quiz_interaction'
+        );
+    END IF;
+    IF to_regtype('client_device_type') IS NULL THEN
+        CREATE TYPE client_device_type AS ENUM ('desktop', 'mobile', 'tablet');
+    END IF;
+END
+$$;
+
+ALTER TABLE interaction_logs
+    ADD COLUMN IF NOT EXISTS element_name VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS element_type interaction_element_type,
+    ADD COLUMN IF NOT EXISTS element_context interaction_context,
+    ADD COLUMN IF NOT EXISTS device_type client_device_type,
+    ADD COLUMN IF NOT EXISTS interaction_count SMALLINT;
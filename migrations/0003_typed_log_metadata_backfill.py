@@ -0,0 +1,64 @@
+"""
+Move the typed fields of interaction_logs.metadata into the columns added by 0002,
+drop metadata keys that only repeat other columns and store empty objects as NULL.
+Runs in batches (see Migrator.backfill); every statement skips rows already done,
+so an interrupted run can simply be restarted. VACUUM the log tables afterwards.
+"""
+
+TYPED_SQL = """
+WITH typed AS (
+    SELECT id,
+           CASE WHEN jsonb_typeof(metadata->'name') = 'string' AND length(metadata->>'name') <= 100
+                THEN metadata->>'name' END AS element_name,
+           CASE WHEN metadata->>'type' = ANY(enum_range(NULL::interaction_element_type)::text[])
+                THEN (metadata->>'type')::interaction_element_type END AS element_type,
+           CASE WHEN metadata->>'context' = ANY(enum_range(NULL::interaction_context)::text[])
+                THEN (metadata->>'context')::interaction_context END AS element_context,
+           CASE WHEN metadata->>'device_type' = ANY(enum_range(NULL::client_device_type)::text[])
+                THEN (metadata->>'device_type')::client_device_type END AS device_type,
+           CASE WHEN jsonb_typeof(metadata->'interaction_count') = 'number'
+                     AND metadata->>'interaction_count' ~ '^-?[0-9]{1,4}$'
+                THEN (metadata->>'interaction_count')::smallint END AS interaction_count
+    FROM interaction_logs
+    WHERE {batch} AND metadata ?| ARRAY['name', 'type', 'context', 'device_type', 'interaction_count']
+)
+UPDATE interaction_logs l
+SET element_name = COALESCE(l.element_name, t.element_name),
+    element_type = COALESCE(l.element_type, t.element_type),
+    element_context = COALESCE(l.element_context, t.element_context),
+    device_type = COALESCE(l.device_type, t.device_type),
+    interaction_count = COALESCE(l.interaction_count, t.interaction_count),
+    metadata = NULLIF(l.metadata - array_remove(ARRAY[
+        CASE WHEN t.element_name IS NOT NULL THEN 'name' END,
+        CASE WHEN t.element_type IS NOT NULL THEN 'type' END,
+        CASE WHEN t.element_context IS NOT NULL THEN 'context' END,
+        CASE WHEN t.device_type IS NOT NULL THEN 'device_type' END,
+        CASE WHEN t.interaction_count IS NOT NULL THEN 'interaction_count' END
+    ], NULL), '{}'::jsonb)
+FROM typed t
+WHERE l.id = t.id
+"""
+
+# action / timestamp_iso only repeat action_type / timestamp
+QUIZ_REDUNDANT_SQL = """
+UPDATE quiz_interaction_logs
+SET metadata = NULLIF(metadata - ARRAY['action', 'timestamp_iso'], '{}'::jsonb)
+WHERE {batch} AND metadata ?| ARRAY['action', 'timestamp_iso']
+"""
+
+# Empty objects cost a JSONB header per row; store NULL instead
+EMPTY_ACTIVITY_SQL = """
+UPDATE activity_logs
+SET metadata = NULLIF(metadata, '{}'::jsonb), client_info = NULLIF(client_info, '{}'::jsonb)
+WHERE {batch} AND (metadata = '{}'::jsonb OR client_info = '{}'::jsonb)
+"""
+EMPTY_METADATA_SQL = "UPDATE {table} SET metadata = NULL WHERE {batch} AND metadata = '{{}}'::jsonb"
+
+
+def up(m):
+    m.backfill('interaction_logs', TYPED_SQL, label='interaction_logs (cột typed)')
+    m.backfill('quiz_interaction_logs', QUIZ_REDUNDANT_SQL, label='quiz_interaction_logs (metadata thừa)')
+    m.backfill('activity_logs', EMPTY_ACTIVITY_SQL, label='activity_logs ({} → NULL)')
+    for table in ('interaction_logs', 'quiz_interaction_logs', 'reading_behavior_logs'):
+        m.backfill(table, EMPTY_METADATA_SQL.format(table=table, batch='{batch}'), label=f"{table} ({{}} → NULL)")
+    print("  → Chạy VACUUM (hoặc VACUUM FULL) các bảng log để thu hồi dung lượng")
@@ -0,0 +1,50 @@
+-- Compact quiz interaction events (generator --compact-quiz-events): one row per
+-- answered question instead of one row per event. Event i happened at
+-- started_at + offsets_ms[i]; action codes: 1 view, 2 hint_request, 3 answer, 4 submit
+CREATE TABLE IF NOT EXISTS quiz_question_events (
+    id UUID PRIMARY KEY,
+    user_id UUID NOT NULL,
+    attempt_id UUID REFERENCES quiz_attempts(id) ON DELETE CASCADE,
+    question_id UUID REFERENCES questions(id) ON DELETE CASCADE,
+    started_at TIMESTAMPTZ NOT NULL,
+    actions SMALLINT[] NOT NULL,
+    offsets_ms INTEGER[] NOT NULL,
+    time_spent_ms INTEGER[] NOT NULL,
+    answers TEXT[] NOT NULL,
+    is_correct BOOLEAN,
+    answer_changes_count INTEGER,
+    hint_used BOOLEAN
+);
+
+CREATE INDEX IF NOT EXISTS idx_quiz_question_events_user_id ON quiz_question_events(user_id);
+CREATE INDEX IF NOT EXISTS idx_quiz_question_events_attempt_id ON quiz_question_events(attempt_id);
+CREATE INDEX IF NOT EXISTS idx_quiz_question_events_started_at_brin ON quiz_question_events USING brin (started_at) WITH (pages_per_range = 32);
+
+-- All quiz interaction events in the quiz_interaction_logs row shape, whichever way they were stored
+CREATE OR REPLACE VIEW quiz_interaction_events AS
+    SELECT id, user_id, quiz_id, attempt_id, question_id, timestamp, action_type, answer_given,
+           is_correct, time_spent_ms, answer_changes_count, hint_used, metadata
+    FROM quiz_interaction_logs
+    UNION ALL
+    SELECT md5(e.id::text || ':' || x.n)::uuid,
+           e.user_id, NULL::uuid, e.attempt_id, e.question_id,
+           x.ts,
+           x.action_type,
+           e.answers[x.n],
+           CASE WHEN x.action_type = 'submit'
+                  OR (x.action_type = 'answer' AND e.actions[x.n + 1] = 4) THEN e.is_correct
+                WHEN x.action_type = 'answer' THEN false END,
+           e.time_spent_ms[x.n],
+           CASE WHEN x.action_type IN ('answer', 'submit') THEN e.answer_changes_count ELSE 0 END,
+           CASE WHEN x.action_type IN ('answer', 'submit') THEN e.hint_used
+                ELSE x.action_type = 'hint_request' END,
+           NULL::jsonb
+    FROM quiz_question_events e
+    CROSS JOIN LATERAL (
+        SELECT o.n,
+               e.started_at + e.offsets_ms[o.n] * interval '1 millisecond' AS ts,
+               (ARRAY['view', 'hint_request', 'answer', 'submit'])[o.code]::varchar(100) AS action_type
+        FROM unnest(e.actions) WITH ORDINALITY AS o(code, n)
+    ) x;
+
+COMMENT ON TABLE quiz_question_events IS 'Quiz interaction events packed one row per answered question';
@@ -0,0 +1,184 @@
+-- Resource to course mapping (courses, modules, lessons, quizzes)
+CREATE OR REPLACE VIEW resource_courses AS
+    SELECT id AS resource_id, id AS course_id FROM courses
+    UNION ALL
+    SELECT id, course_id FROM modules
+    UNION ALL
+    SELECT l.id, m.course_id FROM lessons l JOIN modules m ON l.module_id = m.id
+    UNION ALL
+    SELECT q.id, m.course_id FROM quizzes q JOIN modules m ON q.module_id = m.id;
+
+-- Per-(user, course) features for learning outcome prediction
+CREATE TABLE IF NOT EXISTS user_course_features (
+    user_id UUID NOT NULL,
+    course_id UUID NOT NULL REFERENCES courses(id) ON DELETE CASCADE,
+    quiz_attempt_count INTEGER NOT NULL DEFAULT 0,
+    avg_quiz_score NUMERIC(4, 2),
+    max_quiz_score NUMERIC(4, 2),
+    retry_count INTEGER NOT NULL DEFAULT 0,
+    hint_count INTEGER NOT NULL DEFAULT 0,
+    total_dwell_time_ms BIGINT NOT NULL DEFAULT 0,
+    avg_scroll_depth NUMERIC(5, 2),
+    lessons_completed INTEGER NOT NULL DEFAULT 0,
+    session_count INTEGER NOT NULL DEFAULT 0,
+    active_days INTEGER NOT NULL DEFAULT 0,
+    sessions_per_week NUMERIC(6, 2),
+    first_activity_at TIMESTAMPTZ,
+    last_activity_at TIMESTAMPTZ,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, course_id)
+);
+
+-- Users whose features are stale (filled by statement-level triggers)
+CREATE TABLE IF NOT EXISTS feature_refresh_queue (
+    user_id UUID PRIMARY KEY,
+    queued_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_course_features_course_id ON user_course_features(course_id);
+
+-- Feature refresh: triggers queue touched users, refresh_user_course_features() recomputes them
+CREATE OR REPLACE FUNCTION queue_feature_refresh() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO feature_refresh_queue (user_id)
+    SELECT DISTINCT user_id FROM new_rows
+    ON CONFLICT (user_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SET search_path FROM CURRENT;
+
+DROP TRIGGER IF EXISTS trg_enrollments_feature_queue ON enrollments;
+CREATE TRIGGER trg_enrollments_feature_queue AFTER INSERT ON enrollments
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_activity_logs_feature_queue ON activity_logs;
+CREATE TRIGGER trg_activity_logs_feature_queue AFTER INSERT ON activity_logs
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_lesson_progress_feature_queue ON lesson_progress;
+CREATE TRIGGER trg_lesson_progress_feature_queue AFTER INSERT ON lesson_progress
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_quiz_attempts_feature_queue ON quiz_attempts;
+CREATE TRIGGER trg_quiz_attempts_feature_queue AFTER INSERT ON quiz_attempts
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_quiz_interaction_logs_feature_queue ON quiz_interaction_logs;
+CREATE TRIGGER trg_quiz_interaction_logs_feature_queue AFTER INSERT ON quiz_interaction_logs
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_quiz_question_events_feature_queue ON quiz_question_events;
+CREATE TRIGGER trg_quiz_question_events_feature_queue AFTER INSERT ON quiz_question_events
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_reading_behavior_logs_feature_queue ON reading_behavior_logs;
+CREATE TRIGGER trg_reading_behavior_logs_feature_queue AFTER INSERT ON reading_behavior_logs
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+
+CREATE OR REPLACE FUNCTION refresh_user_course_features(p_full BOOLEAN DEFAULT false) RETURNS INTEGER AS $$
+DECLARE
+    v_users UUID[];
+    v_rows INTEGER;
+BEGIN
+    IF p_full THEN
+        DELETE FROM feature_refresh_queue;
+        DELETE FROM user_course_features;
+    ELSE
+        WITH dequeued AS (
+            DELETE FROM feature_refresh_queue RETURNING user_id
+        )
+        SELECT array_agg(user_id) INTO v_users FROM dequeued;
+        
+        IF v_users IS NULL THEN
+            RETURN 0;
+        END IF;
+        
+        DELETE FROM user_course_features WHERE user_id = ANY(v_users);
+    END IF;
+    
+    INSERT INTO user_course_features (
+        user_id, course_id, quiz_attempt_count, avg_quiz_score, max_quiz_score, retry_count,
+        hint_count, total_dwell_time_ms, avg_scroll_depth, lessons_completed, session_count,
+        active_days, sessions_per_week, first_activity_at, last_activity_at, refreshed_at
+    )
+    WITH pairs AS (
+        SELECT DISTINCT user_id, course_id FROM enrollments
+        WHERE p_full OR user_id = ANY(v_users)
+    ),
+    quiz AS (
+        SELECT qa.user_id, rc.course_id,
+               COUNT(*) AS attempts,
+               AVG(qa.score::numeric / NULLIF(qa.max_score, 0) * 10) AS avg_score,
+               MAX(qa.score::numeric / NULLIF(qa.max_score, 0) * 10) AS max_score,
+               COUNT(*) FILTER (WHERE qa.attempt_number > 1) AS retries
+        FROM quiz_attempts qa
+        JOIN resource_courses rc ON rc.resource_id = qa.quiz_id
+        WHERE p_full OR qa.user_id = ANY(v_users)
+        GROUP BY qa.user_id, rc.course_id
+    ),
+    hints AS (
+        SELECT h.user_id, rc.course_id, SUM(h.hints) AS hints
+        FROM (
+            SELECT user_id, attempt_id, 1 AS hints
+            FROM quiz_interaction_logs
+            WHERE action_type = 'hint_request' AND (p_full OR user_id = ANY(v_users))
+            UNION ALL
+            -- compact rows: count hint_request codes without expanding the arrays
+            SELECT user_id, attempt_id, cardinality(array_positions(actions, 2::smallint))
+            FROM quiz_question_events
+            WHERE hint_used AND (p_full OR user_id = ANY(v_users))
+        ) h
+        JOIN quiz_attempts qa ON qa.id = h.attempt_id
+        JOIN resource_courses rc ON rc.resource_id = qa.quiz_id
+        GROUP BY h.user_id, rc.course_id
+    ),
+    reading AS (
+        SELECT r.user_id, rc.course_id,
+               SUM(r.dwell_time_ms) AS dwell_time_ms,
+               AVG(r.scroll_depth_percent) AS scroll_depth
+        FROM reading_behavior_logs r
+        JOIN resource_courses rc ON rc.resource_id = r.lesson_id
+        WHERE p_full OR r.user_id = ANY(v_users)
+        GROUP BY r.user_id, rc.course_id
+    ),
+    progress AS (
+        SELECT lp.user_id, rc.course_id, COUNT(DISTINCT lp.lesson_id) AS completed
+        FROM lesson_progress lp
+        JOIN resource_courses rc ON rc.resource_id = lp.lesson_id
+        WHERE lp.is_completed AND (p_full OR lp.user_id = ANY(v_users))
+        GROUP BY lp.user_id, rc.course_id
+    ),
+    activity AS (
+        SELECT a.user_id, rc.course_id,
+               COUNT(DISTINCT a.session_id) AS sessions,
+               COUNT(DISTINCT a.timestamp::date) AS active_days,
+               MIN(a.timestamp) AS first_at,
+               MAX(a.timestamp) AS last_at
+        FROM activity_logs a
+        JOIN resource_courses rc ON rc.resource_id = a.resource_id
+        WHERE p_full OR a.user_id = ANY(v_users)
+        GROUP BY a.user_id, rc.course_id
+    )
+    SELECT p.user_id, p.course_id,
+           COALESCE(q.attempts, 0),
+           ROUND(q.avg_score, 2),
+           ROUND(q.max_score, 2),
+           COALESCE(q.retries, 0),
+           COALESCE(h.hints, 0),
+           COALESCE(r.dwell_time_ms, 0),
+           ROUND(r.scroll_depth, 2),
+           COALESCE(lp.completed, 0),
+           COALESCE(a.sessions, 0),
+           COALESCE(a.active_days, 0),
+           ROUND(a.sessions / GREATEST(EXTRACT(EPOCH FROM a.last_at - a.first_at) / 604800, 1)::numeric, 2),
+           a.first_at,
+           a.last_at,
+           NOW()
+    FROM pairs p
+    LEFT JOIN quiz q ON q.user_id = p.user_id AND q.course_id = p.course_id
+    LEFT JOIN hints h ON h.user_id = p.user_id AND h.course_id = p.course_id
+    LEFT JOIN reading r ON r.user_id = p.user_id AND r.course_id = p.course_id
+    LEFT JOIN progress lp ON lp.user_id = p.user_id AND lp.course_id = p.course_id
+    LEFT JOIN activity a ON a.user_id = p.user_id AND a.course_id = p.course_id;
+    
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql SET search_path FROM CURRENT;
+
+COMMENT ON TABLE user_course_features IS 'Per-(user, course) prediction features, maintained by refresh_user_course_features()';
+COMMENT ON TABLE feature_refresh_queue IS 'Users with new activity since the last feature refresh';
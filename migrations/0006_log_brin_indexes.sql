@@ -0,0 +1,7 @@
+-- migrate: no-transaction
+-- BRIN timestamp indexes for the append-mostly log tables (next to the activity_logs btree).
+-- CONCURRENTLY builds them without blocking inserts into the log tables
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_activity_logs_timestamp_brin ON activity_logs USING brin (timestamp) WITH (pages_per_range = 32);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_interaction_logs_timestamp_brin ON interaction_logs USING brin (timestamp) WITH (pages_per_range = 32);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_quiz_interaction_logs_timestamp_brin ON quiz_interaction_logs USING brin (timestamp) WITH (pages_per_range = 32);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reading_behavior_logs_timestamp_brin ON reading_behavior_logs USING brin (timestamp) WITH (pages_per_range = 32);
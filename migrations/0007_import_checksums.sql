@@ -0,0 +1,10 @@
+-- Content checksum of each table as of the last upsert import (import_to_postgres.py --upsert)
+CREATE TABLE IF NOT EXISTS import_checksums (
+    table_name VARCHAR(100) PRIMARY KEY,
+    checksum CHAR(64) NOT NULL,
+    row_count BIGINT NOT NULL,
+    source_file TEXT,
+    imported_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE import_checksums IS 'Per-table content checksums of the last upsert import, used to skip unchanged tables';
@@ -0,0 +1,5 @@
+-- migrate: no-transaction
+-- Restore the activity_logs timestamp btree dropped by an earlier version of 0006.
+-- BRIN alone cannot narrow range scans on generated data (rows are stored user by user,
+-- every block range covers nearly the whole period), so both indexes are kept
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_activity_logs_timestamp ON activity_logs(timestamp);
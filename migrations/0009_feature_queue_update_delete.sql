@@ -0,0 +1,64 @@
+-- Queue feature refreshes on UPDATE and DELETE as well: the upsert import updates rows through
+-- ON CONFLICT DO UPDATE and regeneration deletes them, neither is in an INSERT transition table
+CREATE OR REPLACE FUNCTION queue_feature_refresh() RETURNS trigger AS $$
+BEGIN
+    -- Transition tables of the firing event: new_rows (INSERT), old_rows (DELETE), both (UPDATE)
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO feature_refresh_queue (user_id)
+        SELECT DISTINCT user_id FROM new_rows
+        ON CONFLICT (user_id) DO NOTHING;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO feature_refresh_queue (user_id)
+        SELECT DISTINCT user_id FROM old_rows
+        ON CONFLICT (user_id) DO NOTHING;
+    ELSE
+        INSERT INTO feature_refresh_queue (user_id)
+        SELECT user_id FROM old_rows UNION SELECT user_id FROM new_rows
+        ON CONFLICT (user_id) DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SET search_path FROM CURRENT;
+
+DROP TRIGGER IF EXISTS trg_enrollments_feature_queue_update ON enrollments;
+CREATE TRIGGER trg_enrollments_feature_queue_update AFTER UPDATE ON enrollments
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_enrollments_feature_queue_delete ON enrollments;
+CREATE TRIGGER trg_enrollments_feature_queue_delete AFTER DELETE ON enrollments
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_activity_logs_feature_queue_update ON activity_logs;
+CREATE TRIGGER trg_activity_logs_feature_queue_update AFTER UPDATE ON activity_logs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_activity_logs_feature_queue_delete ON activity_logs;
+CREATE TRIGGER trg_activity_logs_feature_queue_delete AFTER DELETE ON activity_logs
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_lesson_progress_feature_queue_update ON lesson_progress;
+CREATE TRIGGER trg_lesson_progress_feature_queue_update AFTER UPDATE ON lesson_progress
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_lesson_progress_feature_queue_delete ON lesson_progress;
+CREATE TRIGGER trg_lesson_progress_feature_queue_delete AFTER DELETE ON lesson_progress
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_quiz_attempts_feature_queue_update ON quiz_attempts;
+CREATE TRIGGER trg_quiz_attempts_feature_queue_update AFTER UPDATE ON quiz_attempts
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_quiz_attempts_feature_queue_delete ON quiz_attempts;
+CREATE TRIGGER trg_quiz_attempts_feature_queue_delete AFTER DELETE ON quiz_attempts
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_quiz_interaction_logs_feature_queue_update ON quiz_interaction_logs;
+CREATE TRIGGER trg_quiz_interaction_logs_feature_queue_update AFTER UPDATE ON quiz_interaction_logs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_quiz_interaction_logs_feature_queue_delete ON quiz_interaction_logs;
+CREATE TRIGGER trg_quiz_interaction_logs_feature_queue_delete AFTER DELETE ON quiz_interaction_logs
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_quiz_question_events_feature_queue_update ON quiz_question_events;
+CREATE TRIGGER trg_quiz_question_events_feature_queue_update AFTER UPDATE ON quiz_question_events
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_quiz_question_events_feature_queue_delete ON quiz_question_events;
+CREATE TRIGGER trg_quiz_question_events_feature_queue_delete AFTER DELETE ON quiz_question_events
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_reading_behavior_logs_feature_queue_update ON reading_behavior_logs;
+CREATE TRIGGER trg_reading_behavior_logs_feature_queue_update AFTER UPDATE ON reading_behavior_logs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
+DROP TRIGGER IF EXISTS trg_reading_behavior_logs_feature_queue_delete ON reading_behavior_logs;
+CREATE TRIGGER trg_reading_behavior_logs_feature_queue_delete AFTER DELETE ON reading_behavior_logs
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION queue_feature_refresh();
@@ -0,0 +1,8 @@
+-- Cheap "written since the last import" check for import_to_postgres.py --skip-unchanged:
+-- the table's relfilenode (changed by TRUNCATE / VACUUM FULL) and its cumulative
+-- inserted + updated + deleted tuple counters as of the import, instead of a COUNT(*)
+ALTER TABLE import_checksums ADD COLUMN IF NOT EXISTS relfilenode OID;
+ALTER TABLE import_checksums ADD COLUMN IF NOT EXISTS write_count BIGINT;
+
+COMMENT ON COLUMN import_checksums.row_count IS 'Rows in the imported payload';
+COMMENT ON COLUMN import_checksums.write_count IS 'pg_stat tuples inserted + updated + deleted of the table after the import';
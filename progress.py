@@ -0,0 +1,93 @@
+"""
+Throttled progress reporting for long-running generation and import
+Callers only bump a counter; a line is printed at most once per interval
+"""
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+
+def _format_eta(seconds: float) -> str:
+    return str(timedelta(seconds=int(seconds)))
+
+
+class ProgressReporter:
+    """Report work done, rows per table, throughput and ETA every `interval` seconds
+
+    counts:   callable returning {table: rows emitted so far}, only called when a line is printed
+    position: callable returning the amount of work done (e.g. bytes read); defaults to the
+              internal counter bumped by advance()
+    latest:   list the most recently started tables instead of the largest ones
+    """
+
+    def __init__(self, label: str, total: Optional[int] = None, unit: str = '',
+                 interval: float = 5.0, counts: Callable[[], Dict[str, int]] = None,
+                 position: Callable[[], int] = None, top_tables: int = 3, latest: bool = False):
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.interval = interval
+        self.counts = counts
+        self.position = position
+        self.top_tables = top_tables
+        self.latest = latest
+        self.done = 0
+        self.started = time.monotonic()
+        self._next_report = self.started + interval
+        self._last_time = self.started
+        self._last_rows = 0
+
+    def advance(self, n: int = 1):
+        """Count n units of work; prints only when the interval has elapsed"""
+        self.done += n
+        now = time.monotonic()
+        if now >= self._next_report:
+            self.report(now)
+
+    def _amount(self, value: float) -> str:
+        if self.unit == 'bytes':
+            return f"{value / (1024 * 1024):,.1f}"
+        return f"{value:,.0f}"
+
+    def report(self, now: float = None, final: bool = False):
+        now = now or time.monotonic()
+        self._next_report = now + self.interval
+        elapsed = now - self.started
+        done = self.position() if self.position else self.done
+        unit = 'MB' if self.unit == 'bytes' else self.unit
+
+        if self.total:
+            parts = [f"{self._amount(done)}/{self._amount(self.total)} {unit} ({done / self.total * 100:5.1f}%)"]
+        else:
+            parts = [f"{self._amount(done)} {unit}"]
+
+        if self.counts:
+            counts = self.counts()
+            rows = sum(counts.values())
+            if final:
+                rate = rows / elapsed if elapsed > 0 else 0
+            else:
+                span = now - self._last_time
+                rate = (rows - self._last_rows) / span if span > 0 else 0
+            self._last_time, self._last_rows = now, rows
+            parts.append(f"{rows:,} dòng ({rate:,.0f} dòng/s)")
+
+        if final:
+            parts.append(f"xong sau {_format_eta(elapsed)}")
+        elif self.total and done > 0:
+            remaining = (self.total - done) * elapsed / done
+            parts.append(f"ETA {_format_eta(remaining)}")
+
+        if self.counts and counts:
+            if self.latest:
+                shown = list(counts.items())[-self.top_tables:]
+            else:
+                shown = sorted(counts.items(), key=lambda item: -item[1])[:self.top_tables]
+            parts.append(", ".join(f"{table} {count:,}" for table, count in shown))
+
+        print(f"  ⏳ {self.label}: " + " | ".join(parts), flush=True)
+
+    def finish(self):
+        """Print a final line (skipped for runs shorter than one interval)"""
+        if time.monotonic() - self.started >= self.interval:
+            self.report(final=True)
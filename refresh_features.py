@@ -0,0 +1,67 @@
+"""
+Refresh user_course_features (per-(user, course) prediction features)
+Incremental by default: only users queued by the insert/update/delete triggers are recomputed
+"""
+import argparse
+import time
+from typing import List, Tuple
+from db import connect
+
+
+def feature_triggers(cursor) -> List[Tuple[str, str]]:
+    """(table, trigger) pairs feeding feature_refresh_queue in the current schema"""
+    cursor.execute("""
+        SELECT c.relname, t.tgname
+        FROM pg_trigger t
+        JOIN pg_class c ON c.oid = t.tgrelid
+        WHERE t.tgfoid = to_regproc('queue_feature_refresh')
+          AND c.relnamespace = current_schema()::regnamespace
+        ORDER BY 1, 2
+    """)
+    return cursor.fetchall()
+
+
+def set_feature_triggers(cursor, enabled: bool) -> int:
+    """Enable or disable the queue triggers, e.g. around a bulk load that ends with a full
+    refresh: every COPY / execute_values page otherwise builds a transition table"""
+    action = 'ENABLE' if enabled else 'DISABLE'
+    triggers = feature_triggers(cursor)
+    for table, trigger in triggers:
+        cursor.execute(f"ALTER TABLE {table} {action} TRIGGER {trigger}")
+    return len(triggers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh user_course_features')
+    parser.add_argument('--full', action='store_true',
+                        help='Recompute features for all users instead of queued users only')
+    args = parser.parse_args()
+
+    print("🔄 Cập nhật features (user_course_features)...")
+
+    conn = connect()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT COUNT(*) FROM feature_refresh_queue")
+        queued = cursor.fetchone()[0]
+        mode = "full" if args.full else f"incremental, {queued} users trong hàng đợi"
+        print(f"   Chế độ: {mode}")
+
+        started = time.perf_counter()
+        cursor.execute("SELECT refresh_user_course_features(%s)", (args.full,))
+        rows = cursor.fetchone()[0]
+        conn.commit()
+        elapsed = time.perf_counter() - started
+
+        print(f"✓ Đã cập nhật {rows} dòng features trong {elapsed:.2f}s")
+
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    main()
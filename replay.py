@@ -0,0 +1,409 @@
+"""
+Replay generated events in time order (load generator for an event pipeline)
+The generator writes all events of one user before moving to the next one. A real-time
+ingestion path sees them interleaved by time instead, so the replay runs in three steps:
+
+1. spool: DataGenerator writes into a SpoolSink; every checkpoint (one user in the behavior
+   phase, one thread in the forum phase) becomes a run of rows sorted by event time,
+   pickled in small chunks into a spool file
+2. merge: heapq k-way merge over the runs, holding one chunk per run, so memory depends on
+   the number of runs and not on the number of events (runs are merged in passes when
+   there are more than --fan-in)
+3. emit: at the original pace sped up by --speed (or as fast as possible) into a target:
+   the database, JSONL on stdout, a TCP socket (JSONL) or an HTTP endpoint (NDJSON batches)
+
+The event time of a row is its first timestamp column (activity_logs.timestamp,
+user_sessions.started_at, ...), but never before a parent row of the same run; rows
+with equal times are emitted parents first.
+"""
+import argparse
+import heapq
+import itertools
+import os
+import pickle
+import random
+import socket
+import struct
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+from copy_encoder import dumps_json
+from db import get_db_config, connect as db_connect
+from ids import IdGenerator, UUID_MODES
+from sinks import RowSink, PostgresSink, FLUSH_ORDER
+from table_registry import default_registry
+
+CONTENT_EXPORT_FILE = 'database-export-2026-01-02.json'
+CHUNK_EVENTS = 32   # events per pickled chunk = events held in memory per run while merging
+FAN_IN = 512        # runs merged at once
+_INDEX_OFFSET = struct.Struct('>Q')
+
+# (event time, table position, sequence, table, columns, values); the sequence keeps
+# the sort stable and stops comparisons before the values
+Event = Tuple[datetime, int, int, str, Tuple[str, ...], tuple]
+
+
+class SpoolWriter:
+    """Spool file: runs of sorted events as pickled chunks, followed by the run index"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.runs = []  # [(offset of first chunk, chunk count)]
+        self.events = 0
+
+    def write_run(self, events: Iterable[Event]):
+        """Append one run; events must be sorted (a list or a stream, written chunk by chunk)"""
+        offset = self.file.tell()
+        chunks = 0
+        events = iter(events)
+        while True:
+            chunk = list(itertools.islice(events, CHUNK_EVENTS))
+            if not chunk:
+                break
+            pickle.dump(chunk, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+            chunks += 1
+            self.events += len(chunk)
+        if chunks:
+            self.runs.append((offset, chunks))
+
+    def close(self):
+        index_offset = self.file.tell()
+        pickle.dump({'runs': self.runs, 'events': self.events}, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.file.write(_INDEX_OFFSET.pack(index_offset))
+        self.file.close()
+
+
+class SpoolReader:
+    """Read back a spool file; events() merges all runs by event time"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.file.seek(-_INDEX_OFFSET.size, os.SEEK_END)
+        self.file.seek(_INDEX_OFFSET.unpack(self.file.read(_INDEX_OFFSET.size))[0])
+        index = pickle.load(self.file)
+        self.runs = index['runs']
+        self.events_count = index['events']
+
+    def run_events(self, run: int) -> Iterator[Event]:
+        """Events of one run, one chunk in memory at a time (runs share the file handle)"""
+        offset, chunks = self.runs[run]
+        for _ in range(chunks):
+            self.file.seek(offset)
+            chunk = pickle.load(self.file)
+            offset = self.file.tell()
+            yield from chunk
+
+    def merged(self, runs: range) -> Iterator[Event]:
+        return heapq.merge(*(self.run_events(run) for run in runs))
+
+    def events(self, fan_in: int = FAN_IN) -> Iterator[Event]:
+        """All events in time order; with more than fan_in runs, groups of runs are first
+        merged into longer runs of a temporary spool (repeated until fan_in runs are left)"""
+        if len(self.runs) <= fan_in:
+            yield from self.merged(range(len(self.runs)))
+            return
+        fd, path = tempfile.mkstemp(prefix='replay-merge-', suffix='.spool')
+        os.close(fd)
+        try:
+            writer = SpoolWriter(path)
+            for start in range(0, len(self.runs), fan_in):
+                writer.write_run(self.merged(range(start, min(start + fan_in, len(self.runs)))))
+            writer.close()
+            reader = SpoolReader(path)
+            try:
+                yield from reader.events(fan_in)
+            finally:
+                reader.close()
+        finally:
+            os.remove(path)
+
+    def close(self):
+        self.file.close()
+
+
+class SpoolSink(RowSink):
+    """RowSink for DataGenerator that writes every checkpoint as one sorted run"""
+
+    def __init__(self, writer: SpoolWriter):
+        # batch_size 1: every checkpoint flushes, so a run holds one user (or forum thread)
+        super().__init__(batch_size=1)
+        self.writer = writer
+        registry = default_registry()
+        self.time_columns = {
+            name: [c for c, t in registry[name].columns.items() if t.startswith('timestamp') or t == 'date']
+            for name in registry.generated_tables()
+        }
+        self.table_position = {table: i for i, table in enumerate(FLUSH_ORDER)}
+        self.sequence = 0
+        self.last_time = datetime.min
+        self._run = []
+
+    def _write_rows(self, table: str, columns: Tuple[str, ...], rows: List[tuple]):
+        positions = [columns.index(c) for c in self.time_columns.get(table, ()) if c in columns]
+        order = self.table_position.get(table, len(self.table_position))
+        for row in rows:
+            event_time = next((row[i] for i in positions if row[i] is not None), None)
+            self._run.append((event_time, order, self.sequence, table, columns, row))
+            self.sequence += 1
+
+    def flush(self):
+        super().flush()
+        if not self._run:
+            return
+        # Rows without a time get the latest time of their run
+        times = [e[0] for e in self._run if e[0] is not None]
+        if times:
+            self.last_time = max(times)
+        run = [e if e[0] is not None else (self.last_time,) + e[1:] for e in self._run]
+        run = self._after_parents(run)
+        run.sort()
+        self.writer.write_run(run)
+        self._run = []
+
+    @staticmethod
+    def _after_parents(run: List[Event]) -> List[Event]:
+        """Emit no row before a parent row of the same run: some child rows carry an earlier
+        time than their parent (quiz interactions before the attempt's started_at), which a
+        database target would reject. Only the emit time moves; the row keeps its values."""
+        run.sort(key=lambda e: (e[1], e[2]))  # parent tables first
+        emit_time = {}
+        result = []
+        for event in run:
+            event_time, _, _, _, columns, values = event
+            for column, value in zip(columns, values):
+                if column.endswith('_id'):
+                    parent_time = emit_time.get(value)
+                    if parent_time is not None and parent_time > event_time:
+                        event_time = parent_time
+            if 'id' in columns:
+                emit_time[values[columns.index('id')]] = event_time
+            result.append(event if event_time is event[0] else (event_time,) + event[1:])
+        return result
+
+
+class DatabaseTarget:
+    """Insert replayed rows (PostgresSink, committed every batch_size rows and before every wait)"""
+
+    def __init__(self, conn, batch_size: int = 500):
+        self.sink = PostgresSink(conn, batch_size=batch_size)
+
+    def emit(self, table: str, columns: Tuple[str, ...], values: tuple):
+        self.sink.write(table, columns, values)
+        if self.sink.buffered >= self.sink.batch_size:
+            self.sink.commit()
+
+    def flush(self):
+        self.sink.commit()
+
+    def close(self):
+        self.sink.commit()
+        self.sink.close()
+
+
+class StreamTarget:
+    """One JSON line per event: {"table": ..., "data": {...}} to stdout or a TCP socket"""
+
+    def __init__(self, stream=None, sock: Optional[socket.socket] = None, batch_size: int = 500):
+        self.stream = stream
+        self.sock = sock
+        self.batch_size = batch_size
+        self.lines = []
+
+    @classmethod
+    def connect(cls, host: str, port: int, batch_size: int = 500) -> 'StreamTarget':
+        return cls(sock=socket.create_connection((host, port)), batch_size=batch_size)
+
+    def emit(self, table: str, columns: Tuple[str, ...], values: tuple):
+        self.lines.append(dumps_json({'table': table, 'data': dict(zip(columns, values))}) + b'\n')
+        if len(self.lines) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            data = b''.join(self.lines)
+            if self.sock is not None:
+                self.sock.sendall(data)
+            else:
+                self.stream.buffer.write(data)
+            self.lines = []
+        if self.stream is not None:
+            self.stream.flush()
+
+    def close(self):
+        self.flush()
+        if self.sock is not None:
+            self.sock.close()
+
+
+class HttpTarget(StreamTarget):
+    """POST the JSON lines in batches (application/x-ndjson)"""
+
+    def __init__(self, url: str, batch_size: int = 500, timeout: float = 30.0):
+        super().__init__(batch_size=batch_size)
+        self.url = url
+        self.timeout = timeout
+
+    def flush(self):
+        if not self.lines:
+            return
+        request = urllib.request.Request(self.url, data=b''.join(self.lines), method='POST',
+                                         headers={'Content-Type': 'application/x-ndjson'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+        self.lines = []
+
+
+def open_target(spec: str, conn=None, batch_size: int = 500, stdout=None):
+    """db | stdout | tcp://host:port | http(s)://host:port/path"""
+    if spec == 'db':
+        return DatabaseTarget(conn, batch_size)
+    if spec == 'stdout':
+        return StreamTarget(stdout or sys.stdout, batch_size=batch_size)
+    url = urlsplit(spec)
+    if url.scheme == 'tcp':
+        return StreamTarget.connect(url.hostname, url.port, batch_size)
+    if url.scheme in ('http', 'https'):
+        return HttpTarget(spec, batch_size)
+    raise ValueError(f"unknown target: {spec} (db, stdout, tcp://host:port, http://host:port/path)")
+
+
+def replay(events: Iterator[Event], target, speed: Optional[float] = None,
+           progress=None) -> Dict[str, Any]:
+    """Emit events to the target; speed = event time per wall-clock time (None = no waiting)
+
+    Event i is due at start + (time_i - time_0) / speed. Buffered rows are flushed before
+    every wait, so the target receives them on time and not a batch later.
+    """
+    emitted = 0
+    lag = 0.0
+    first_time = None
+    started = time.monotonic()
+    for event_time, _, _, table, columns, values in events:
+        if speed:
+            if first_time is None:
+                first_time = event_time
+            due = started + (event_time - first_time).total_seconds() / speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                target.flush()
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+            else:
+                lag = max(lag, -delay)
+        target.emit(table, columns, values)
+        emitted += 1
+        if progress:
+            progress.advance()
+    target.flush()
+    seconds = time.monotonic() - started
+    return {'events': emitted, 'seconds': seconds, 'max_lag': lag}
+
+
+def spool_generated(generator, path: str, students: int):
+    """Run all generator phases into a spool file"""
+    writer = SpoolWriter(path)
+    generator.sink = SpoolSink(writer)
+    generator.generate_users(students)
+    generator.generate_enrollments()
+    generator.generate_learning_behavior()
+    generator.generate_forum_activity()
+    generator.generate_course_grades()
+    generator.sink.close()
+    writer.close()
+    return writer.events
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay generated learning events in time order')
+    parser.add_argument('--students', type=int, default=20, help='Number of students to generate')
+    parser.add_argument('--target', default='stdout',
+                        help='db | stdout | tcp://host:port | http://host:port/path (default: stdout)')
+    speed = parser.add_mutually_exclusive_group()
+    speed.add_argument('--speed', type=float, default=3600.0,
+                       help='Event time per wall-clock time (3600 = one hour of events per second)')
+    speed.add_argument('--fast', action='store_true', help='Emit as fast as possible')
+    parser.add_argument('--batch-size', type=int, default=500, help='Rows per insert / write / POST')
+    parser.add_argument('--spool', help='Keep the spool file at this path (default: temporary file)')
+    parser.add_argument('--from-spool', help='Replay an existing spool file instead of generating')
+    parser.add_argument('--content', default=CONTENT_EXPORT_FILE,
+                        help='Export file with the course content (target db: content is read from the database)')
+    parser.add_argument('--clear', action='store_true', help='Target db: delete generated data first')
+    parser.add_argument('--fan-in', type=int, default=FAN_IN, help='Runs merged at once')
+    parser.add_argument('--uuid-mode', choices=UUID_MODES, default='v4')
+    parser.add_argument('--seed', type=int, help='Seed for a reproducible run (data and ids)')
+    args = parser.parse_args()
+
+    from generate_learning_data import DataGenerator
+    from progress import ProgressReporter
+
+    # Status and progress lines go to stderr: stdout may be the event stream
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    conn = None
+    db_config = get_db_config()
+    if args.target == 'db':
+        conn = db_connect(db_config, bulk=True)
+
+    spool_path = args.from_spool or args.spool
+    temporary = spool_path is None
+    if temporary:
+        fd, spool_path = tempfile.mkstemp(prefix='replay-', suffix='.spool')
+        os.close(fd)
+
+    target = None
+    try:
+        if not args.from_spool:
+            if args.seed is not None:
+                random.seed(args.seed)
+            generator = DataGenerator(db_config, ids=IdGenerator(args.uuid_mode, args.seed))
+            if conn is not None:
+                generator.conn, generator.cursor = conn, conn.cursor()
+                if args.clear:
+                    generator.clear_behavior_data()
+                generator.load_existing_content()
+            else:
+                generator.load_content_from_export(args.content)
+            events = spool_generated(generator, spool_path, args.students)
+            print(f"✓ Đã spool {events:,} sự kiện: {spool_path}")
+
+        reader = SpoolReader(spool_path)
+        speed = None if args.fast else args.speed
+        print(f"▶ Replay {reader.events_count:,} sự kiện ({len(reader.runs):,} run) → {args.target}"
+              f" ({'nhanh nhất có thể' if speed is None else f'tốc độ x{speed:g}'})")
+        target = open_target(args.target, conn, args.batch_size, stdout)
+        progress = ProgressReporter("Replay", total=reader.events_count, unit='events')
+        try:
+            result = replay(reader.events(args.fan_in), target, speed, progress)
+        finally:
+            reader.close()
+        progress.finish()
+        print(f"✓ Đã phát {result['events']:,} sự kiện trong {result['seconds']:.1f}s"
+              f" ({result['events'] / max(result['seconds'], 1e-9):,.0f} sự kiện/s"
+              + (f", trễ tối đa {result['max_lag']:.2f}s" if speed else "") + ")")
+    except KeyboardInterrupt:
+        print("\n⏹ Đã dừng replay")
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        if conn:
+            conn.rollback()
+    finally:
+        if target is not None:
+            try:
+                target.close()
+            except Exception as e:
+                print(f"✗ Lỗi khi đóng target: {e}")
+        if conn:
+            conn.close()
+        if temporary and os.path.exists(spool_path):
+            os.remove(spool_path)
+        sys.stdout = stdout
+
+
+if __name__ == '__main__':
+    main()
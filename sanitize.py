@@ -0,0 +1,113 @@
+"""
+Sanitizing rules for imported rows
+Exports carry full page URLs and referrers (with __lovable_token JWTs in the query string),
+session tokens and IP addresses. The importer rewrites them per table and column while
+streaming, before the rows reach the database:
+
+  route   URL -> route template: no host, query or fragment, ids replaced by ':id'
+          (https://x.lovableproject.com/lessons/<uuid>?__lovable_token=... -> /lessons/:id)
+  hash    keyed SHA-256 (SANITIZE_HASH_KEY in .env); equal values stay equal, so they can
+          still be grouped or joined
+  strip   drop the value (JSON key removed, column set to NULL)
+"""
+import hashlib
+import hmac
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Any, Iterable, Iterator, Optional, Union
+from urllib.parse import urlsplit
+
+ROUTE = 'route'
+HASH = 'hash'
+STRIP = 'strip'
+ACTIONS = (ROUTE, HASH, STRIP)
+
+# {table: {column: action}} for plain columns, {table: {column: {json_key: action}}} for JSONB
+DEFAULT_RULES = {
+    'activity_logs': {'client_info': {'url': ROUTE, 'referrer': ROUTE}},
+    'user_sessions': {'session_token': HASH, 'ip_address': HASH},
+}
+
+# Path segments that are ids: UUIDs, numbers, long hex strings
+_ID_SEGMENT = re.compile(
+    r'^(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|\d+|[0-9a-fA-F]{16,})$'
+)
+HASH_LENGTH = 32  # hex characters
+
+
+@lru_cache(maxsize=65536)
+def route_template(url: str) -> str:
+    """Path of a URL with id segments replaced by ':id' (URLs repeat, so results are cached)"""
+    if not url:
+        return url  # no referrer
+    path = urlsplit(url).path or '/'
+    return '/'.join(':id' if _ID_SEGMENT.match(segment) else segment for segment in path.split('/'))
+
+
+def load_rules(path: str) -> Dict[str, Dict[str, Union[str, Dict[str, str]]]]:
+    """Rules from a JSON file in the DEFAULT_RULES format"""
+    with open(path, encoding='utf-8') as f:
+        rules = json.load(f)
+    for table, columns in rules.items():
+        for column, rule in columns.items():
+            actions = rule.values() if isinstance(rule, dict) else [rule]
+            unknown = [a for a in actions if a not in ACTIONS]
+            if unknown:
+                raise ValueError(f"{table}.{column}: unknown action {', '.join(map(str, unknown))} "
+                                 f"(allowed: {', '.join(ACTIONS)})")
+    return rules
+
+
+class Sanitizer:
+    """Apply sanitizing rules to records of the configured tables (in place)"""
+
+    def __init__(self, rules: Optional[Dict[str, Dict[str, Union[str, Dict[str, str]]]]] = None,
+                 hash_key: Optional[str] = None):
+        self.rules = DEFAULT_RULES if rules is None else rules
+        key = hash_key if hash_key is not None else os.getenv('SANITIZE_HASH_KEY', '')
+        self._key = key.encode('utf-8')
+        self.tables = set(self.rules)
+        self._converters = {ROUTE: self._route, HASH: self._hash}
+
+    def _route(self, value):
+        return route_template(value) if isinstance(value, str) else value
+
+    def _hash(self, value):
+        data = value if isinstance(value, str) else json.dumps(value, sort_keys=True)
+        return hmac.new(self._key, data.encode('utf-8'), hashlib.sha256).hexdigest()[:HASH_LENGTH]
+
+    def _column_function(self, rule):
+        """value -> sanitized value for one column"""
+        if not isinstance(rule, dict):
+            if rule == STRIP:
+                return lambda value: None
+            return self._converters[rule]
+        strip = [key for key, action in rule.items() if action == STRIP]
+        convert = [(key, self._converters[action]) for key, action in rule.items() if action != STRIP]
+
+        def sanitize_object(value):
+            if not isinstance(value, dict):
+                return value
+            for key in strip:
+                value.pop(key, None)
+            for key, function in convert:
+                if value.get(key) is not None:
+                    value[key] = function(value[key])
+            return value
+        return sanitize_object
+
+    def apply(self, table: str, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Sanitize a stream of records of one table"""
+        rules = self.rules.get(table)
+        if not rules:
+            yield from records
+            return
+        columns = [(column, self._column_function(rule)) for column, rule in rules.items()]
+        for record in records:
+            for column, function in columns:
+                value = record.get(column)
+                if value is not None:
+                    record[column] = function(value)
+            yield record
@@ -0,0 +1,144 @@
+"""
+Row sinks for DataGenerator
+Generated rows are buffered per table and written in bulk (PostgreSQL or JSONL files)
+"""
+import json
+import os
+import uuid
+from typing import Dict, List, Tuple
+from psycopg2.extensions import register_adapter
+from psycopg2.extras import Json, UUID_adapter, execute_values
+from table_registry import default_registry
+
+# Ids from IdGenerator(binary=True) are uuid.UUID objects; only the adapter is
+# registered so uuid columns read back by other tools still come out as strings
+register_adapter(uuid.UUID, UUID_adapter)
+
+UUID = uuid.UUID
+
+# Parents before children, so a flush never violates a foreign key
+FLUSH_ORDER = default_registry().data_tables()
+
+
+class RowSink:
+    """Buffer rows per table; subclasses implement _write_rows"""
+
+    def __init__(self, batch_size: int = 5000):
+        self.batch_size = batch_size
+        self.buffers = {}       # {(table, columns): [row, ...]}
+        self.buffered = 0
+        self.rows_written = {}  # {table: count}
+
+    def write(self, table: str, columns: Tuple[str, ...], values: tuple):
+        """Queue one row; columns must be the same tuple for every row of a call site"""
+        key = (table, columns)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = self.buffers[key] = []
+        buffer.append(values)
+        self.buffered += 1
+
+    def row_counts(self) -> Dict[str, int]:
+        """Rows emitted per table so far (written + still buffered)"""
+        counts = dict(self.rows_written)
+        for (table, _), rows in self.buffers.items():
+            counts[table] = counts.get(table, 0) + len(rows)
+        return counts
+
+    def checkpoint(self):
+        """Flush if enough rows are buffered; call only where all parent rows are queued"""
+        if self.buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered rows, parent tables first"""
+        if not self.buffered:
+            return
+        order = {table: i for i, table in enumerate(FLUSH_ORDER)}
+        for key in sorted(self.buffers, key=lambda k: order.get(k[0], len(order))):
+            rows = self.buffers[key]
+            if not rows:
+                continue
+            table, columns = key
+            self._write_rows(table, columns, rows)
+            self.rows_written[table] = self.rows_written.get(table, 0) + len(rows)
+        self.buffers = {}
+        self.buffered = 0
+
+    def commit(self):
+        self.flush()
+
+    def close(self):
+        self.flush()
+
+    def _write_rows(self, table: str, columns: Tuple[str, ...], rows: List[tuple]):
+        raise NotImplementedError
+
+
+class PostgresSink(RowSink):
+    """Write rows with multi-row INSERT (execute_values)
+
+    dict values are sent as JSONB, list values as PostgreSQL arrays
+    (wrap a list in Json to store it as a JSONB array).
+    """
+
+    def __init__(self, conn, batch_size: int = 5000, page_size: int = 1000):
+        super().__init__(batch_size)
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.page_size = page_size
+
+    def _write_rows(self, table: str, columns: Tuple[str, ...], rows: List[tuple]):
+        adapted = [
+            tuple(Json(v) if isinstance(v, dict) else v for v in row)
+            for row in rows
+        ]
+        execute_values(
+            self.cursor,
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s",
+            adapted,
+            page_size=self.page_size
+        )
+
+    def commit(self):
+        self.flush()
+        self.conn.commit()
+
+    def close(self):
+        self.cursor.close()
+
+
+def _json_default(value):
+    if type(value) is UUID:
+        return str(value)
+    if isinstance(value, Json):
+        return value.adapted
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class FileSink(RowSink):
+    """Write rows as JSON lines, one file per table (<output_dir>/<table>.jsonl)"""
+
+    def __init__(self, output_dir: str, batch_size: int = 5000):
+        super().__init__(batch_size)
+        self.output_dir = output_dir
+        self.files = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _write_rows(self, table: str, columns: Tuple[str, ...], rows: List[tuple]):
+        f = self.files.get(table)
+        if f is None:
+            f = self.files[table] = open(os.path.join(self.output_dir, f"{table}.jsonl"), 'w', encoding='utf-8')
+        dumps = json.dumps
+        f.writelines(
+            dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) + '\n'
+            for row in rows
+        )
+
+    def close(self):
+        self.flush()
+        for f in self.files.values():
+            f.close()
+        self.files = {}
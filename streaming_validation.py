@@ -0,0 +1,171 @@
+"""
+Streaming validation - online statistics collected while generating data
+Replaces the post-hoc checks in validate_grades.py / validate_advanced.py for a fresh run
+"""
+import json
+import math
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+# Same threshold as validate_advanced.py (|avg_grade - avg_quiz| > 2.0)
+OUTLIER_GAP_THRESHOLD = 2.0
+
+
+class RunningStats:
+    """Welford online mean/variance with min/max"""
+
+    __slots__ = ('count', 'mean', '_m2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Sample variance (same as Postgres VARIANCE/STDDEV)"""
+        if self.count < 2:
+            return None
+        return self._m2 / (self.count - 1)
+
+    @property
+    def stddev(self) -> Optional[float]:
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean': round(self.mean, 4) if self.count else None,
+            'stddev': round(self.stddev, 4) if self.stddev is not None else None,
+            'min': self.min,
+            'max': self.max
+        }
+
+
+class StreamingCorrelation:
+    """Online Pearson correlation using running co-moments"""
+
+    __slots__ = ('count', 'mean_x', 'mean_y', '_m2_x', '_m2_y', '_c_xy')
+
+    def __init__(self):
+        self.count = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self._m2_x = 0.0
+        self._m2_y = 0.0
+        self._c_xy = 0.0
+
+    def add(self, x: float, y: float):
+        self.count += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.count
+        dy = y - self.mean_y
+        self.mean_y += dy / self.count
+        self._m2_x += dx * (x - self.mean_x)
+        self._m2_y += dy * (y - self.mean_y)
+        self._c_xy += dx * (y - self.mean_y)
+
+    @property
+    def pearson(self) -> Optional[float]:
+        if self.count < 2 or self._m2_x == 0 or self._m2_y == 0:
+            return None
+        return self._c_xy / math.sqrt(self._m2_x * self._m2_y)
+
+
+class StreamingValidator:
+    """Collect validation statistics as rows are emitted by DataGenerator"""
+
+    def __init__(self):
+        self.score_stats = {}      # {assessment_type: RunningStats}, 'quiz' = quiz attempts (0-10 scale)
+        self.persona_stats = {}    # {persona: RunningStats} over course grades
+        self.quiz_grade_corr = StreamingCorrelation()
+        self.enrollments = 0
+        self.injected_outliers = 0
+        self.gap_outliers = 0
+        self.timeline_errors = 0
+
+    def _stats(self, bucket: Dict[str, RunningStats], key: str) -> RunningStats:
+        stats = bucket.get(key)
+        if stats is None:
+            stats = bucket[key] = RunningStats()
+        return stats
+
+    def observe_quiz_attempt(self, score: int, max_score: int):
+        """Record a quiz attempt score"""
+        if max_score > 0:
+            self._stats(self.score_stats, 'quiz').add(score / max_score * 10)
+
+    def observe_grade(self, assessment_type: str, persona: str, score: float,
+                      graded_at: datetime, enrolled_at: datetime):
+        """Record a course grade row"""
+        self._stats(self.score_stats, assessment_type).add(score)
+        self._stats(self.persona_stats, persona).add(score)
+        if graded_at < enrolled_at:
+            self.timeline_errors += 1
+
+    def observe_enrollment(self, quiz_avg: float, grade_avg: float, is_outlier: bool):
+        """Record the quiz average vs grade average of one (user, course)"""
+        self.enrollments += 1
+        self.quiz_grade_corr.add(quiz_avg, grade_avg)
+        if is_outlier:
+            self.injected_outliers += 1
+        if abs(grade_avg - quiz_avg) > OUTLIER_GAP_THRESHOLD:
+            self.gap_outliers += 1
+
+    def summary(self) -> Dict[str, Any]:
+        pearson = self.quiz_grade_corr.pearson
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'score_distribution': {k: v.to_dict() for k, v in sorted(self.score_stats.items())},
+            'persona_grades': {k: v.to_dict() for k, v in sorted(self.persona_stats.items())},
+            'quiz_grade_correlation': {
+                'pairs': self.quiz_grade_corr.count,
+                'pearson': round(pearson, 4) if pearson is not None else None
+            },
+            'outliers': {
+                'enrollments': self.enrollments,
+                'injected': self.injected_outliers,
+                'gap_over_threshold': self.gap_outliers,
+                'gap_threshold': OUTLIER_GAP_THRESHOLD
+            },
+            'timeline_errors': self.timeline_errors
+        }
+
+    def write_summary(self, path: str) -> Dict[str, Any]:
+        """Write the validation summary as JSON"""
+        summary = self.summary()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
+
+    def print_summary(self):
+        """Print validation summary"""
+        summary = self.summary()
+        print("\n🔍 Validation (streaming):")
+        for assessment_type, stats in summary['score_distribution'].items():
+            if not stats['count']:
+                continue
+            std = f"{stats['stddev']:.2f}" if stats['stddev'] is not None else "-"
+            print(f"   {assessment_type:15s}: {stats['count']:6d} | Avg: {stats['mean']:.2f} | "
+                  f"Std: {std} | Min: {stats['min']:.1f} | Max: {stats['max']:.1f}")
+        corr = summary['quiz_grade_correlation']
+        pearson = f"{corr['pearson']:.3f}" if corr['pearson'] is not None else "-"
+        print(f"   Tương quan quiz vs grade (Pearson): {pearson} ({corr['pairs']} cặp user-course)")
+        outliers = summary['outliers']
+        print(f"   Outliers: {outliers['injected']} cố ý | "
+              f"{outliers['gap_over_threshold']} lệch > {outliers['gap_threshold']} điểm "
+              f"/ {outliers['enrollments']} enrollments")
+        print(f"   Lỗi timeline (graded_at < enrolled_at): {summary['timeline_errors']}")
@@ -0,0 +1,189 @@
+"""
+Single registry of the database tables
+Column types, FK parents, load order and bulk-load strategy of every table, parsed from
+create_schema.sql (no database needed) or introspected from a live database, so the
+generator, sinks, importer, exporter and benchmark share one table list.
+"""
+import os
+import re
+from typing import Dict, List, Optional, Iterable
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'create_schema.sql')
+
+# Course content: comes from the export, the generator only reads it
+CONTENT_TABLES = ('courses', 'modules', 'lessons', 'quizzes', 'questions')
+# Maintained inside the database (triggers, refresh functions, tooling), never exported or imported
+DERIVED_TABLES = ('user_course_features', 'feature_refresh_queue', 'import_checksums', 'schema_migrations')
+
+# Bulk-load strategies
+LOAD_REFERENCE = 'reference'  # small content tables, loaded first
+LOAD_BATCH = 'batch'          # referenced by other tables: must be loaded before its children
+LOAD_APPEND = 'append'        # nothing references it: can be loaded in any order / in parallel
+
+# information_schema.columns.data_type of the SQL types used in create_schema.sql
+_SQL_TYPES = {
+    'UUID': 'uuid', 'TEXT': 'text', 'VARCHAR': 'character varying', 'CHAR': 'character',
+    'INTEGER': 'integer', 'SMALLINT': 'smallint', 'BIGINT': 'bigint', 'NUMERIC': 'numeric',
+    'BOOLEAN': 'boolean', 'JSONB': 'jsonb', 'DATE': 'date',
+    'TIMESTAMPTZ': 'timestamp with time zone', 'TIMESTAMP': 'timestamp without time zone',
+}
+_CREATE_TABLE = re.compile(r'^CREATE TABLE (?:IF NOT EXISTS )?(\w+) \((.*?)^\);', re.M | re.S)
+_COLUMN = re.compile(r'^\s+(\w+) (\w+)(\[\])?')
+_REFERENCES = re.compile(r'REFERENCES (\w+)\(')
+
+
+class TableInfo:
+    """One table: ordered {column: data_type}, FK parent tables and derived column sets"""
+
+    def __init__(self, name: str, columns: Dict[str, str], parents: Iterable[str]):
+        self.name = name
+        self.columns = columns
+        self.parents = tuple(p for p in dict.fromkeys(parents) if p != name)
+        # e.g. forum_posts.parent_post_id: rows must be loaded parents first within the table
+        self.self_referencing = name in parents
+        self.children = ()  # filled in by TableRegistry
+        self.json_columns = frozenset(c for c, t in columns.items() if t in ('jsonb', 'json'))
+        self.array_columns = frozenset(c for c, t in columns.items() if t == 'ARRAY')
+
+    @property
+    def load_strategy(self) -> str:
+        if self.name in CONTENT_TABLES:
+            return LOAD_REFERENCE
+        return LOAD_BATCH if self.children else LOAD_APPEND
+
+    @property
+    def is_log(self) -> bool:
+        """Append-only event table: nothing references it and rows carry a timestamp"""
+        return not self.children and 'timestamp' in self.columns
+
+    def __repr__(self):
+        return f"TableInfo({self.name}, {len(self.columns)} columns, parents={list(self.parents)})"
+
+
+class TableRegistry:
+    """Tables in FK order (parents first, otherwise in definition order)"""
+
+    def __init__(self, tables: Iterable[TableInfo]):
+        tables = list(tables)
+        children = {t.name: [] for t in tables}
+        for t in tables:
+            for parent in t.parents:
+                if parent in children:
+                    children[parent].append(t.name)
+        for t in tables:
+            t.children = tuple(children[t.name])
+        self.tables = {t.name: t for t in self._topological(tables)}
+
+    @staticmethod
+    def _topological(tables: List[TableInfo]) -> List[TableInfo]:
+        """Parents first; otherwise keeps the given order (a valid order is left unchanged)"""
+        known = {t.name for t in tables}
+        done, ordered = set(), []
+        remaining = list(tables)
+        while remaining:
+            ready = next((t for t in remaining if all(p in done or p not in known for p in t.parents)), None)
+            if ready is None:
+                raise ValueError(f"Foreign key cycle between {', '.join(t.name for t in remaining)}")
+            done.add(ready.name)
+            ordered.append(ready)
+            remaining.remove(ready)
+        return ordered
+
+    @classmethod
+    def from_schema_file(cls, path: str = SCHEMA_FILE) -> 'TableRegistry':
+        with open(path, encoding='utf-8') as f:
+            sql = f.read()
+        tables = []
+        for name, body in _CREATE_TABLE.findall(sql):
+            columns, parents = {}, []
+            for line in body.splitlines():
+                match = _COLUMN.match(line)
+                if not match or match.group(1).upper() == match.group(1):
+                    continue  # blank line or table constraint (PRIMARY KEY (...), CHECK, ...)
+                column, sql_type, array = match.groups()
+                columns[column] = 'ARRAY' if array else _SQL_TYPES.get(sql_type.upper(), 'USER-DEFINED')
+                parents.extend(_REFERENCES.findall(line))
+            tables.append(TableInfo(name, columns, parents))
+        return cls(tables)
+
+    @classmethod
+    def from_database(cls, cursor, schema: str) -> 'TableRegistry':
+        """Introspect the base tables of a schema (columns in ordinal order, FK parents)"""
+        cursor.execute("""
+            SELECT c.table_name, c.column_name, c.data_type
+            FROM information_schema.columns c
+            JOIN information_schema.tables t
+              ON t.table_schema = c.table_schema AND t.table_name = c.table_name
+            WHERE c.table_schema = %s AND t.table_type = 'BASE TABLE'
+            ORDER BY c.table_name, c.ordinal_position
+        """, (schema,))
+        columns = {}
+        for table, column, data_type in cursor.fetchall():
+            columns.setdefault(table, {})[column] = data_type
+        cursor.execute("""
+            SELECT child.relname, parent.relname
+            FROM pg_constraint con
+            JOIN pg_class child ON child.oid = con.conrelid
+            JOIN pg_class parent ON parent.oid = con.confrelid
+            JOIN pg_namespace n ON n.oid = child.relnamespace
+            WHERE con.contype = 'f' AND n.nspname = %s
+            ORDER BY child.relname, con.conname
+        """, (schema,))
+        parents = {}
+        for child, parent in cursor.fetchall():
+            parents.setdefault(child, []).append(parent)
+        # Keep create_schema.sql's table order for ties, so both sources agree
+        reference = list(default_registry().tables)
+        names = sorted(columns, key=lambda n: (reference.index(n) if n in reference else len(reference), n))
+        return cls(TableInfo(n, columns[n], parents.get(n, ())) for n in names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.tables
+
+    def __getitem__(self, name: str) -> TableInfo:
+        return self.tables[name]
+
+    def get(self, name: str) -> Optional[TableInfo]:
+        return self.tables.get(name)
+
+    def order(self, names: Iterable[str] = None) -> List[str]:
+        """Table names parents first (all tables, or the given subset)"""
+        if names is None:
+            return list(self.tables)
+        wanted = set(names)
+        return [n for n in self.tables if n in wanted]
+
+    def data_tables(self) -> List[str]:
+        """Tables holding exported/imported data, parents first"""
+        return [n for n in self.tables if n not in DERIVED_TABLES]
+
+    def generated_tables(self) -> List[str]:
+        """Tables written by the generator, parents first"""
+        return [n for n in self.data_tables() if n not in CONTENT_TABLES]
+
+    def log_tables(self) -> List[str]:
+        return [n for n, t in self.tables.items() if t.is_log]
+
+    def levels(self, names: Iterable[str] = None) -> List[List[str]]:
+        """Tables grouped so that each group only depends on earlier groups
+        (the tables of one group can be loaded or scanned in parallel)"""
+        names = self.order(names)
+        wanted = set(names)
+        level = {}
+        for n in names:
+            level[n] = max((level[p] + 1 for p in self.tables[n].parents if p in wanted), default=0)
+        groups = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for n in names:
+            groups[level[n]].append(n)
+        return groups
+
+
+_default = None
+
+
+def default_registry() -> TableRegistry:
+    """Registry parsed from create_schema.sql (cached)"""
+    global _default
+    if _default is None:
+        _default = TableRegistry.from_schema_file()
+    return _default
@@ -0,0 +1,178 @@
+"""
+Table statistics without full scans
+Row counts from the catalog (pg_class / pg_stat_user_tables, optionally after ANALYZE)
+or exact COUNT(*) run in parallel over a connection pool, plus on-disk size per table
+and per index for capacity planning
+"""
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+from db import get_db_config, connect as db_connect, ConnectionPool
+from table_registry import default_registry
+
+
+def existing_tables(cursor, tables: List[str]) -> List[str]:
+    """The given tables that exist in the search_path (older databases may lack some)"""
+    cursor.execute("SELECT t FROM unnest(%s::text[]) WITH ORDINALITY u(t, i) "
+                   "WHERE to_regclass(t) IS NOT NULL ORDER BY i", (list(tables),))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def estimate_counts(cursor, tables: List[str], analyze: bool = False) -> Dict[str, int]:
+    """Row counts from the catalog, no table scan
+
+    Like the planner: the row density of the last ANALYZE/VACUUM (reltuples/relpages)
+    times the current number of pages, so rows appended since are still counted.
+    Tables never analyzed fall back to the live tuple counter of the statistics system.
+    analyze: ANALYZE the tables first (samples at most 30000 rows per table)
+    """
+    if analyze:
+        for table in tables:
+            cursor.execute(f"ANALYZE {table}")
+    cursor.execute("""
+        SELECT c.relname,
+               CASE WHEN c.relpages > 0 AND c.reltuples >= 0
+                    THEN c.reltuples / c.relpages
+                         * (pg_relation_size(c.oid) / current_setting('block_size')::int)
+                    ELSE COALESCE(s.n_live_tup, 0)
+               END::bigint
+        FROM pg_class c
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE c.oid = ANY(%s::regclass[])
+    """, (list(tables),))
+    counts = dict(cursor.fetchall())
+    return {table: counts[table] for table in tables}
+
+
+def _count(pool: ConnectionPool, table: str) -> int:
+    with pool.connection() as conn, conn.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+def exact_counts(tables: List[str], db_config: Optional[Dict[str, Any]] = None, workers: int = 4) -> Dict[str, int]:
+    """COUNT(*) of every table, workers tables at a time (one connection each)
+
+    Tables should be passed largest first so the long scans start right away.
+    """
+    if not tables:
+        return {}
+    workers = max(1, min(workers, len(tables)))
+    with ConnectionPool(db_config, minconn=1, maxconn=workers) as pool, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {table: executor.submit(_count, pool, table) for table in tables}
+        return {table: future.result() for table, future in futures.items()}
+
+
+def table_sizes(cursor, tables: List[str]) -> Dict[str, Dict[str, int]]:
+    """{table: {'table', 'indexes', 'total'}} in bytes; 'table' includes TOAST and free space map"""
+    cursor.execute("""
+        SELECT c.relname, pg_table_size(c.oid), pg_indexes_size(c.oid), pg_total_relation_size(c.oid)
+        FROM pg_class c
+        WHERE c.oid = ANY(%s::regclass[])
+    """, (list(tables),))
+    sizes = {name: {'table': table, 'indexes': indexes, 'total': total}
+             for name, table, indexes, total in cursor.fetchall()}
+    return {table: sizes[table] for table in tables}
+
+
+def index_sizes(cursor, tables: List[str]) -> List[Dict[str, Any]]:
+    """Indexes of the tables, largest first, with the number of index scans since the stats reset"""
+    cursor.execute("""
+        SELECT t.relname, i.relname, pg_relation_size(i.oid), COALESCE(s.idx_scan, 0)
+        FROM pg_index x
+        JOIN pg_class t ON t.oid = x.indrelid
+        JOIN pg_class i ON i.oid = x.indexrelid
+        LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = x.indexrelid
+        WHERE x.indrelid = ANY(%s::regclass[])
+        ORDER BY pg_relation_size(i.oid) DESC, i.relname
+    """, (list(tables),))
+    return [{'table': table, 'index': index, 'bytes': size, 'scans': scans}
+            for table, index, size, scans in cursor.fetchall()]
+
+
+def collect(cursor, tables: List[str], exact: bool = False, analyze: bool = False,
+            db_config: Optional[Dict[str, Any]] = None, workers: int = 4) -> Dict[str, Dict[str, int]]:
+    """{table: {'rows', 'table', 'indexes', 'total'}} for the tables that exist"""
+    tables = existing_tables(cursor, tables)
+    sizes = table_sizes(cursor, tables)
+    if exact:
+        # Commit first: the pool's connections must see everything this session wrote
+        cursor.connection.commit()
+        largest_first = sorted(tables, key=lambda t: sizes[t]['table'], reverse=True)
+        counts = exact_counts(largest_first, db_config, workers)
+    else:
+        counts = estimate_counts(cursor, tables, analyze)
+        cursor.connection.commit()
+    return {table: dict(rows=counts[table], **sizes[table]) for table in tables}
+
+
+def format_bytes(size: int) -> str:
+    for unit in ('B', 'kB', 'MB', 'GB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def print_table_stats(stats: Dict[str, Dict[str, int]], exact: bool, indent: str = '  '):
+    """One line per table: rows (~ = estimate), table size, index size"""
+    prefix = '' if exact else '~'
+    for table, s in stats.items():
+        print(f"{indent}{table:30s}: {prefix + format(s['rows'], ','):>12s} bản ghi"
+              f" | bảng {format_bytes(s['table']):>9s} | index {format_bytes(s['indexes']):>9s}")
+    if stats:
+        print(f"{indent}{'Tổng':30s}: {prefix + format(sum(s['rows'] for s in stats.values()), ','):>12s} bản ghi"
+              f" | bảng {format_bytes(sum(s['table'] for s in stats.values())):>9s}"
+              f" | index {format_bytes(sum(s['indexes'] for s in stats.values())):>9s}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Row counts and on-disk sizes of the tables')
+    parser.add_argument('--tables', nargs='+', help='Only these tables (default: all tables of the schema)')
+    parser.add_argument('--exact', action='store_true', help='Exact COUNT(*) in parallel instead of catalog estimates')
+    parser.add_argument('--analyze', action='store_true', help='ANALYZE the tables before reading the estimates')
+    parser.add_argument('--workers', type=int, default=4, help='Parallel connections for --exact')
+    parser.add_argument('--indexes', action='store_true', help='Also list the size of every index')
+    parser.add_argument('--json', dest='json_output', help='Write the statistics to this JSON file')
+    args = parser.parse_args()
+
+    db_config = get_db_config()
+    tables = args.tables or default_registry().order()
+
+    conn = db_connect(db_config)
+    cursor = conn.cursor()
+    try:
+        mode = f"COUNT(*) song song, {args.workers} kết nối" if args.exact else \
+            "ước tính từ catalog" + (" sau ANALYZE" if args.analyze else "")
+        print(f"📊 Thống kê bảng (schema {db_config.get('schema', 'public')}, {mode}):")
+        print("-" * 90)
+        stats = collect(cursor, tables, args.exact, args.analyze, db_config, args.workers)
+        print_table_stats(stats, args.exact)
+        print("-" * 90)
+
+        indexes = []
+        if args.indexes:
+            indexes = index_sizes(cursor, list(stats))
+            print("\n📇 Index (lớn nhất trước):")
+            print("-" * 90)
+            for ix in indexes:
+                print(f"  {ix['index']:45s} {ix['table']:25s} {format_bytes(ix['bytes']):>9s}"
+                      f" | {ix['scans']:,} lần scan")
+            print("-" * 90)
+
+        if args.json_output:
+            with open(args.json_output, 'w', encoding='utf-8') as f:
+                json.dump({'exact': args.exact, 'tables': stats, 'indexes': indexes}, f, indent=2)
+            print(f"✓ Đã ghi: {args.json_output}")
+    except Exception as e:
+        print(f"✗ Lỗi: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
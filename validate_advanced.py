@@ -1,26 +1,13 @@
 """
 Advanced validation - check correlation and outliers
 """
-import psycopg2
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-DB_CONFIG = {
-    'host': os.getenv('LOCAL_DB_HOST', 'localhost'),
-    'port': int(os.getenv('LOCAL_DB_PORT', 5432)),
-    'database': os.getenv('LOCAL_DB_NAME', 'Lovable'),
-    'user': os.getenv('LOCAL_DB_USER', 'postgres'),
-    'password': os.getenv('LOCAL_DB_PASSWORD'),
-}
+from db import connect
 
 def main():
     print("🔍 Chi tiết validation course_grades...\n")
     
-    conn = psycopg2.connect(**DB_CONFIG)
+    conn = connect()
     cursor = conn.cursor()
-    cursor.execute("SET search_path TO transform, public")
     
     # Get sample students with their quiz and grade performance
     print("📊 So sánh Quiz Performance vs Course Grades (Top 20 users):\n")
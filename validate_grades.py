@@ -1,26 +1,13 @@
 """
 Validate course_grades data
 """
-import psycopg2
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-DB_CONFIG = {
-    'host': os.getenv('LOCAL_DB_HOST', 'localhost'),
-    'port': int(os.getenv('LOCAL_DB_PORT', 5432)),
-    'database': os.getenv('LOCAL_DB_NAME', 'Lovable'),
-    'user': os.getenv('LOCAL_DB_USER', 'postgres'),
-    'password': os.getenv('LOCAL_DB_PASSWORD'),
-}
+from db import connect
 
 def main():
     print("🔍 Kiểm tra dữ liệu course_grades...\n")
     
-    conn = psycopg2.connect(**DB_CONFIG)
+    conn = connect()
     cursor = conn.cursor()
-    cursor.execute("SET search_path TO transform, public")
     
     # 1. Distribution by assessment type
     print("1️⃣ Phân bố theo loại đánh giá:")